@@ -0,0 +1,109 @@
+import asyncio
+
+import RIP_control
+
+
+class RouterProtocol(asyncio.DatagramProtocol):
+    """datagram endpoint for one input port, feeding received packets to its router"""
+
+    def __init__(self, runner):
+        self.runner = runner
+
+    def datagram_received(self, data, addr):
+        self.runner.packet_received(data)
+
+    def error_received(self, exc):
+        self.runner.router.log.error('Error receiving: %s', exc)
+
+
+class AsyncRouter:
+    """
+    Runs a Router on an asyncio event loop.
+    Each input socket is a datagram endpoint and the router's next timer deadline
+    is scheduled with loop.call_at instead of being polled.
+    """
+
+    def __init__(self, router, loop=None):
+        self.router = router
+        self.loop = loop or asyncio.get_running_loop()
+        self.transports = []
+        self.timer_handle = None
+        self.timer_deadline = None
+        self.pending_routes = []  # routes received since the last batch was processed
+        self.pending_datagrams = 0
+        self.flush_handle = None
+
+    async def start(self):
+        """attaches the router's bound input sockets to the loop and sends the first update"""
+        for sock in self.router.sockets:
+            transport, _ = await self.loop.create_datagram_endpoint(lambda: RouterProtocol(self), sock=sock)
+            self.transports.append(transport)
+        self.router.send_packets()  # share routing table with neighbors
+        self.arm_timer()
+
+    def packet_received(self, data):
+        """
+        Parses a datagram and queues its routes. All datagrams the loop reads in one
+        pass are processed together by a single calculate_routes_batch call.
+        """
+        self.pending_routes += self.router.receive_packet(data)
+        self.pending_datagrams += 1
+        if self.flush_handle is None:
+            self.flush_handle = self.loop.call_soon(self.process_batch)
+
+    def process_batch(self):
+        routes, datagrams = self.pending_routes, self.pending_datagrams
+        self.pending_routes, self.pending_datagrams, self.flush_handle = [], 0, None
+        self.router.record_receive_batch(datagrams)
+        try:
+            self.router.calculate_routes_batch(routes)
+        except Exception:
+            self.router.log.exception('Error processing received routes')
+        self.arm_timer()  # Received routes can add earlier deadlines
+
+    def timer_expired(self):
+        self.timer_handle = None
+        self.timer_deadline = None
+        self.router.update_timers()
+        self.arm_timer()
+
+    def arm_timer(self):
+        """(re)schedules the loop callback for the router's next deadline if it moved"""
+        deadline = self.router.scheduler.next_deadline()
+        if deadline == self.timer_deadline:
+            return
+        if self.timer_handle is not None:
+            self.timer_handle.cancel()
+        self.timer_handle = None
+        self.timer_deadline = deadline
+        if deadline is not None:
+            # Router deadlines are on the router's clock, the loop runs on its own monotonic clock
+            when = self.loop.time() + max(0, deadline - self.router.clock())
+            self.timer_handle = self.loop.call_at(when, self.timer_expired)
+
+    def close(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+        self.flush_handle = None
+        if self.timer_handle is not None:
+            self.timer_handle.cancel()
+        self.timer_handle = None
+        self.timer_deadline = None
+        for transport in self.transports:
+            transport.close()
+        self.transports = []
+
+
+async def run_router(router, control_port=None):
+    """runs a single router on the current event loop until cancelled, with a control socket if a port is given"""
+    runner = AsyncRouter(router)
+    await runner.start()
+    control = None
+    if control_port is not None:
+        control = await RIP_control.serve_control({router.id: router}, control_port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        if control is not None:
+            control.close()
+        runner.close()
@@ -0,0 +1,251 @@
+import sys
+import json
+import time
+import timeit
+import random
+import argparse
+import platform
+import tracemalloc
+
+import RIP_codec as codec
+import RIP_topology as topology
+from RIP_topology import build_topology
+from RIP_daemon import Router
+from RIP_simulator import Simulator
+from RIP_table import RoutingTable
+
+TABLE_SIZES = [10, 1000, 25000]
+HOT_PATH_SIZES = [10, 1000, 10000]
+TOPOLOGIES = ['mesh:10', 'ring:30', 'grid:8x8', 'random:200']
+LARGE_NETWORK = 'random:1000'
+
+
+def make_entries(count):
+    """builds count (dest_id, next_hop, cost) entries with varied next hops and costs"""
+    return [(dest_id, dest_id % 50 + 1, dest_id % 15 + 1) for dest_id in range(1, count + 1)]
+
+
+def decode_all(packet):
+    """decodes every entry of a packet the way the daemon does"""
+    codec.decode_header(packet)
+    for _ in codec.iter_entries(packet):
+        pass
+
+
+def seconds_per_call(func, repeat=5):
+    """runs func until it takes at least 0.2s and returns the best time per call"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def entries_per_second(func, entries_count, repeat=5):
+    return entries_count / seconds_per_call(func, repeat)
+
+
+def bench_codec(sizes=TABLE_SIZES):
+    """returns {table size: (encode entries/s, decode entries/s)}"""
+    results = {}
+    for size in sizes:
+        entries = make_entries(size)
+        packet = codec.encode_response(1, entries)
+        encode_rate = entries_per_second(lambda: codec.encode_response(1, entries), size)
+        decode_rate = entries_per_second(lambda: decode_all(packet), size)
+        results[size] = (encode_rate, decode_rate)
+    return results
+
+
+def loaded_router(size):
+    """
+    router 1 with neighbors 2 and 3, holding size routes learned from router 2.
+    Returns the router and the update router 2 keeps sending it.
+    """
+    router = Router(1, [], ["5001-1-2", "5002-1-3"], transmit=lambda *packet: None)
+    entries = [(dest_id, 2, 1) for dest_id in range(4, size + 4)]
+    packet = codec.encode_response(2, entries)
+    router.decode_packet(packet)
+    return router, packet
+
+
+def bench_hot_paths(sizes=HOT_PATH_SIZES):
+    """
+    per call latency and routes/second of the daemon's hot functions on a steady table,
+    where every update repeats routes the router already has.
+    """
+    results = []
+    for size in sizes:
+        router, packet = loaded_router(size)
+        routes = [(2, dest_id, 2, 1) for dest_id in range(4, size + 4)]
+        calls = {
+            'construct_packet': lambda: router.construct_packet(3),
+            'construct_packets': lambda: router.construct_packets(3),
+            'decode_packet': lambda: router.decode_packet(packet),
+            'calculate_routes_batch': lambda: router.calculate_routes_batch(routes),
+        }
+        for name, func in calls.items():
+            latency = seconds_per_call(func, repeat=3)
+            results.append({
+                'function': name,
+                'routes': size,
+                'seconds_per_call': latency,
+                'routes_per_second': size / latency,
+            })
+    return results
+
+
+def bytes_per_route(build, size):
+    """traced memory allocated by build(size), divided by size"""
+    tracemalloc.start()
+    try:
+        table = build(size)
+        allocated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del table
+    return allocated / size
+
+
+def build_dict_table(size):
+    return {dest_id: (dest_id % 15 + 1, (dest_id % 50 + 1, 5000 + dest_id % 50), True)
+            for dest_id in range(1, size + 1)}
+
+
+def build_routing_table(size):
+    table = RoutingTable()
+    for dest_id in range(1, size + 1):
+        table.set(dest_id, dest_id % 15 + 1, dest_id % 50 + 1, 5000 + dest_id % 50, True)
+    return table
+
+
+def bench_table_memory(sizes=TABLE_SIZES):
+    """memory per route of the array backed RoutingTable against the original dict of tuples"""
+    return [{
+        'routes': size,
+        'dict_bytes_per_route': bytes_per_route(build_dict_table, size),
+        'routing_table_bytes_per_route': bytes_per_route(build_routing_table, size),
+    } for size in sizes]
+
+
+def run_convergence(simulator):
+    """returns virtual, real and CPU seconds the simulator takes to converge"""
+    delivered = simulator.packets_delivered
+    started, cpu_started = time.perf_counter(), time.process_time()
+    converged = simulator.run_until_converged()
+    return {
+        'virtual_seconds': converged,
+        'real_seconds': time.perf_counter() - started,
+        'cpu_seconds': time.process_time() - cpu_started,
+        'packets': simulator.packets_delivered - delivered,
+    }
+
+
+def bench_convergence(specs=TOPOLOGIES, seed=0):
+    """
+    time to converge from cold start, after a link failure and after a router failure.
+    Raises ValueError for a topology wider than MAX_HOPS, as some of its routers could never converge.
+    """
+    graphs = {spec: build_topology(spec, seed) for spec in specs}
+    diameters = {spec: topology.hop_diameter(graph) for spec, graph in graphs.items()}
+    too_wide = [f'{spec} ({diameter} hops)' for spec, diameter in diameters.items() if diameter > topology.MAX_HOPS]
+    if too_wide:
+        raise ValueError(f"Topologies wider than RIP's {topology.MAX_HOPS} hop limit: {', '.join(too_wide)}.")
+
+    results = []
+    for spec, graph in graphs.items():
+        rng = random.Random(seed)
+        simulator = Simulator(seed=seed)
+        for config in topology.to_configs(graph):
+            simulator.add_config(config)
+
+        result = {
+            'topology': spec,
+            'routers': len(graph),
+            'links': len(topology.links(graph)),
+            'hop_diameter': diameters[spec],
+            'cold_start': run_convergence(simulator),
+        }
+        router_a, router_b, _ = rng.choice(topology.links(graph))
+        simulator.fail_link(router_a, router_b)
+        result['link_failure'] = dict(run_convergence(simulator), link=[router_a, router_b])
+
+        router_id = rng.choice(sorted(simulator.routers))
+        simulator.kill_router(router_id)
+        result['router_failure'] = dict(run_convergence(simulator), router=router_id)
+        results.append(result)
+    return results
+
+
+def bench_large_network(spec=LARGE_NETWORK, seed=0):
+    """
+    time a large network takes to converge from cold start and after a router failure,
+    with the default timers. Takes minutes, so it only runs when asked for with --only.
+    """
+    graph = build_topology(spec, seed)
+    simulator = Simulator(seed=seed)
+    started = time.perf_counter()
+    for config in topology.to_configs(graph):
+        simulator.add_config(config)
+    result = {
+        'topology': spec,
+        'routers': len(graph),
+        'links': len(topology.links(graph)),
+        'startup_real_seconds': time.perf_counter() - started,
+        'cold_start': run_convergence(simulator),
+    }
+    router_id = random.Random(seed).choice(sorted(simulator.routers))
+    simulator.kill_router(router_id)
+    result['router_failure'] = dict(run_convergence(simulator), router=router_id)
+    return result
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the RIPv2 daemon and emit the results as JSON")
+    parser.add_argument('--sizes', type=int, nargs='+', default=TABLE_SIZES,
+                        help="routing table sizes for the codec and table memory benchmarks")
+    parser.add_argument('--hot-path-sizes', type=int, nargs='+', default=HOT_PATH_SIZES,
+                        help="routing table sizes for the hot function benchmark")
+    parser.add_argument('--topologies', nargs='+', default=TOPOLOGIES,
+                        help="topologies for the convergence benchmark, at most 15 hops across, "
+                             "e.g. mesh:10 ring:30 grid:8x8 random:200 scalefree:500")
+    parser.add_argument('--large-network', default=LARGE_NETWORK,
+                        help="topology for the large_network benchmark")
+    parser.add_argument('--only', choices=['codec', 'table_memory', 'hot_paths', 'convergence', 'large_network'],
+                        action='append', help="only run the given benchmarks, can be repeated")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="file to write the JSON results to, defaults to stdout")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_arguments(sys.argv[1:])
+    only = args.only or ['codec', 'table_memory', 'hot_paths', 'convergence']
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+    }
+    if 'codec' in only:
+        results['codec'] = [
+            {'routes': size, 'encode_entries_per_second': encode_rate, 'decode_entries_per_second': decode_rate}
+            for size, (encode_rate, decode_rate) in bench_codec(args.sizes).items()
+        ]
+    if 'table_memory' in only:
+        results['table_memory'] = bench_table_memory(args.sizes)
+    if 'hot_paths' in only:
+        results['hot_paths'] = bench_hot_paths(args.hot_path_sizes)
+    if 'convergence' in only:
+        results['convergence'] = bench_convergence(args.topologies, args.seed)
+    if 'large_network' in only:
+        results['large_network'] = bench_large_network(args.large_network, args.seed)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
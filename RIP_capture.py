@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import mmap
+import time
+import socket
+import struct
+import argparse
+
+import RIP_logging
+
+MAGIC = b'RIPC'
+FORMAT_VERSION = 1
+LOGGER_NAME = RIP_logging.LOGGER_NAME + '.replay'
+
+# File header layout - magic, format version, id of the router that captured
+HEADER = struct.Struct('!4sHH')
+# Record header layout - receive time (router clock), source address, source port, input port, packet length.
+# The packet follows. Packets received in the same wakeup of the routing loop share a receive time.
+RECORD = struct.Struct('!dIHHH')
+
+HEADER_SIZE = HEADER.size  # 8 bytes
+RECORD_SIZE = RECORD.size  # 18 bytes
+
+
+class CaptureWriter:
+    """
+    Appends received datagrams to a capture file. Writes go through the file's buffer,
+    so recording costs a struct pack and a copy per packet. The routing loop flushes
+    once per receive batch, so a killed router loses at most the batch it was writing.
+    """
+
+    def __init__(self, path, router_id):
+        self.path = path
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, router_id))
+        self.ports = {}  # socket: the input port it is bound to
+        self.packets = 0
+
+    def record(self, received_at, address, port, packet):
+        host, source_port = address[:2]
+        self.file.write(RECORD.pack(received_at, int.from_bytes(socket.inet_aton(host), 'big'), source_port, port,
+                                    len(packet)))
+        self.file.write(packet)
+        self.packets += 1
+
+    def input_port(self, sock):
+        port = self.ports.get(sock)
+        if port is None:
+            port = self.ports[sock] = sock.getsockname()[1]
+        return port
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def iter_records(capture, allow_truncated=False):
+    """
+    yields (received_at, (source host, source port), input port, packet) for every record
+    of a capture's bytes, packets are memoryviews into it. A cut short last record, left
+    by a router killed while writing, raises ValueError unless allow_truncated is set,
+    then the records before it are yielded.
+    """
+    if len(capture) < HEADER_SIZE:
+        raise ValueError('Invalid capture, shorter than its header.')
+    view = memoryview(capture)
+    offset = HEADER_SIZE
+    unpack_from = RECORD.unpack_from
+    while offset < len(view):
+        if offset + RECORD_SIZE > len(view):
+            if allow_truncated:
+                return
+            raise ValueError(f'Invalid capture, record at byte {offset} is cut short.')
+        received_at, host, source_port, port, length = unpack_from(view, offset)
+        offset += RECORD_SIZE
+        if offset + length > len(view):
+            if allow_truncated:
+                return
+            raise ValueError(f'Invalid capture, packet at byte {offset} is cut short.')
+        yield received_at, (socket.inet_ntoa(host.to_bytes(4, 'big')), source_port), port, view[offset:offset + length]
+        offset += length
+
+
+def read_header(capture):
+    """returns the id of the router that captured, checking the capture's header"""
+    if len(capture) < HEADER_SIZE:
+        raise ValueError('Invalid capture, shorter than its header.')
+    magic, version, router_id = HEADER.unpack_from(capture)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f'Not a version {FORMAT_VERSION} packet capture.')
+    return router_id
+
+
+def start_time(capture):
+    """receive time of a capture's first record, None if it has none"""
+    if len(capture) < HEADER_SIZE + RECORD_SIZE:
+        return None
+    return RECORD.unpack_from(capture, HEADER_SIZE)[0]
+
+
+def batches(records):
+    """groups records into the batches they were received in, lists of records with the same receive time"""
+    batch = []
+    for record in records:
+        if batch and record[0] != batch[0][0]:
+            yield batch
+            batch = []
+        batch.append(record)
+    if batch:
+        yield batch
+
+
+def replay(capture, router, clock, paced=False, speed=1.0):
+    """
+    Feeds the packets of a capture's bytes to a router batch by batch, as the routing loop
+    received them, with clock (the router's VirtualClock) set to each batch's receive time.
+    Goes as fast as possible, or at the recorded pacing sped up by speed when paced.
+    A cut short last record is skipped and counted in truncated_bytes. Returns throughput figures.
+    """
+    perf_counter = time.perf_counter
+    packets = routes_count = size = batch_count = 0
+    decode_seconds = compute_seconds = 0.0
+    first = None
+    started = perf_counter()
+
+    for batch in batches(iter_records(capture, allow_truncated=True)):
+        received_at = batch[0][0]
+        if first is None:
+            first = received_at
+        if paced:
+            delay = started + (received_at - first) / speed - perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        clock.now = received_at
+
+        decode_started = perf_counter()
+        routes = []
+        for record in batch:
+            routes += router.receive_packet(record[3])
+            size += len(record[3])
+        compute_started = perf_counter()
+        router.calculate_routes_batch(routes)
+        router.update_timers()
+        compute_seconds += perf_counter() - compute_started
+        decode_seconds += compute_started - decode_started
+
+        packets += len(batch)
+        routes_count += len(routes)
+        batch_count += 1
+        del batch, record  # Nothing may hold on to the capture's memory once the replay ends
+
+    seconds = perf_counter() - started
+    truncated = len(capture) - HEADER_SIZE - packets * RECORD_SIZE - size
+    if truncated:
+        router.log.warning('Capture ends in a cut short record, skipped its %d bytes', truncated)
+    return {
+        'packets': packets,
+        'batches': batch_count,
+        'bytes': size,
+        'routes': routes_count,
+        'seconds': seconds,
+        'packets_per_second': packets / seconds if seconds else 0,
+        'decode_seconds': decode_seconds,
+        'decode_packets_per_second': packets / decode_seconds if decode_seconds else 0,
+        'compute_seconds': compute_seconds,
+        'compute_routes_per_second': routes_count / compute_seconds if compute_seconds else 0,
+        'update_cache_hits': router.stats['update_cache_hits'],
+        'routing_table_size': len(router.routing_table),
+        'truncated_bytes': truncated,
+    }
+
+
+def replay_file(path, config=None, paced=False, speed=1.0):
+    """
+    maps a capture file into memory and replays it into a fresh router, built from config
+    if given so it knows its neighbors, or else with the capturing router's id and no links
+    """
+    from RIP_daemon import Router, router_options  # The daemon records captures, so it is imported late
+    from RIP_simulator import VirtualClock
+
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise ValueError(f"Capture '{path}' is empty.")
+        capture = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        router_id = read_header(capture)
+        clock = VirtualClock(start_time(capture) or 0.0)
+        options = {}
+        if config is not None:
+            router_id = config['router-id']
+            options = router_options(config)
+        router = Router(router_id, config['input-ports'] if config else [],
+                        config['output-ports'] if config else [],
+                        clock=clock, transmit=lambda *packet: None,
+                        log=RIP_logging.router_logger(router_id, LOGGER_NAME), **options)
+        return replay(capture, router, clock, paced, speed)
+    finally:
+        try:
+            capture.close()
+        except BufferError:
+            pass  # A propagating error's traceback still holds packet views, the map closes once it is freed
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Replay a packet capture of RIP_daemon.py --capture-file into a router")
+    parser.add_argument('capture_file')
+    parser.add_argument('--config', help="config file of the router to replay into, so it knows its neighbors")
+    parser.add_argument('--paced', action='store_true', help="replay at the recorded pacing instead of as fast as possible")
+    parser.add_argument('--speed', type=float, default=1.0, help="speed up factor of a paced replay")
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        type=str.upper, help="lowest level of the replayed router's messages to log")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_arguments(sys.argv[1:])
+    listener = RIP_logging.configure(args.log_level)
+    try:
+        from RIP_daemon import read_config_file
+        config = read_config_file(args.config) if args.config else None
+        print(json.dumps(replay_file(args.capture_file, config, args.paced, args.speed), indent=2))
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"Error: {e}")
+    finally:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
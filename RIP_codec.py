@@ -0,0 +1,87 @@
+import struct
+
+COMMAND_RESPONSE = 2
+VERSION = 2
+AF_INET = 2
+
+# Header layout - command, version, router-id (in place of the zero field)
+HEADER = struct.Struct('!BBH')
+# Entry layout - address family, route tag, destination, subnet mask, next hop, metric
+ENTRY = struct.Struct('!HHIIII')
+
+HEADER_SIZE = HEADER.size  # 4 bytes
+ENTRY_SIZE = ENTRY.size    # 20 bytes
+MAX_ENTRIES = 25           # entries per response packet (RFC 2453)
+MAX_PACKET_SIZE = HEADER_SIZE + ENTRY_SIZE * MAX_ENTRIES  # 504 bytes
+SEGMENT_KEY_SIZE = HEADER_SIZE + 8  # header, then the first entry's address family, route tag and destination
+
+
+def encode_response(router_id, entries):
+    """
+    Packs a RIP response for router_id into a single preallocated buffer.
+    entries is a sequence of (dest_id, next_hop, cost) tuples.
+    """
+    packet = bytearray(HEADER_SIZE + ENTRY_SIZE * len(entries))
+    HEADER.pack_into(packet, 0, COMMAND_RESPONSE, VERSION, router_id)
+
+    pack_into = ENTRY.pack_into
+    offset = HEADER_SIZE
+    for dest_id, next_hop, cost in entries:
+        pack_into(packet, offset, AF_INET, 0, dest_id, 0, next_hop, cost)
+        offset += ENTRY_SIZE
+
+    return packet
+
+
+def encode_segments(router_id, entries, max_entries=MAX_ENTRIES):
+    """
+    Packs entries into as many response packets of at most max_entries entries as needed.
+    All the packets are built back to back in a single preallocated buffer and returned
+    as a list of memoryviews into it. No entries still gives one packet holding the header.
+    """
+    count = max(1, -(-len(entries) // max_entries))  # Number of packets, rounded up
+    buffer = bytearray(HEADER_SIZE * count + ENTRY_SIZE * len(entries))
+    view = memoryview(buffer)
+    segments = []
+
+    pack_into = ENTRY.pack_into
+    segment_size = HEADER_SIZE + ENTRY_SIZE * max_entries
+    offset = 0
+    for index, (dest_id, next_hop, cost) in enumerate(entries):
+        if index % max_entries == 0:  # Start of a packet
+            HEADER.pack_into(buffer, offset, COMMAND_RESPONSE, VERSION, router_id)
+            offset += HEADER_SIZE
+        pack_into(buffer, offset, AF_INET, 0, dest_id, 0, next_hop, cost)
+        offset += ENTRY_SIZE
+    if not entries:
+        HEADER.pack_into(buffer, 0, COMMAND_RESPONSE, VERSION, router_id)
+
+    for start in range(0, len(buffer), segment_size):
+        segments.append(view[start:start + segment_size])
+    return segments
+
+
+def segment_key(packet):
+    """
+    returns the header and first destination of a packet as bytes. A sender's update
+    segments are in destination order, so this tells apart the segments of one update.
+    """
+    return bytes(packet[:SEGMENT_KEY_SIZE])
+
+
+def decode_header(packet):
+    """returns (command, version, router_id) from the start of a packet"""
+    if len(packet) < HEADER_SIZE:
+        raise ValueError('Invalid packet, shorter than the RIP header. Packet dropped.')
+    return HEADER.unpack_from(packet)
+
+
+def iter_entries(packet):
+    """
+    Iterates over the raw entries of a packet without copying it.
+    Yields (address family, route tag, dest_id, subnet mask, next_hop, cost) tuples.
+    """
+    view = memoryview(packet)[HEADER_SIZE:]
+    if len(view) % ENTRY_SIZE != 0:
+        raise ValueError('Invalid packet length, entries must be 20 bytes each. Packet dropped.')
+    return ENTRY.iter_unpack(view)
@@ -0,0 +1,198 @@
+import sys
+import json
+import socket
+import asyncio
+import argparse
+
+CONTROL_HOST = '127.0.0.1'  # control sockets only listen on loopback
+MAX_REQUEST_SIZE = 4096
+MAX_DUMP_ROUTES = 2000  # routes per dump reply, so a reply fits in one datagram
+MAX_ROUTER_ID = 64000
+
+# Requests and replies are compact JSON objects, one per datagram. Requests:
+#   {"command": "dump", "after": <dest id>}  routes with destinations above after, in pages of MAX_DUMP_ROUTES
+#   {"command": "route", "destination": <dest id>}
+#   {"command": "counters"}
+#   {"command": "routers"}  ids of the routers behind the socket
+# Requests to a socket serving several routers name one with "router": <id>.
+# Routes are [destination, cost, next hop, is valid] rows. Errors are replied as {"error": <message>}.
+
+
+def dump_table(router, after=0, limit=None):
+    """
+    returns {'router': id, 'routes': rows, 'more': bool} for the destinations above after,
+    at most limit of them. The same format is read by tools that compare routing tables.
+    """
+    routes = []
+    for dest_id, cost, next_hop, is_valid in router.routing_table.entries(after + 1):
+        if limit is not None and len(routes) == limit:
+            return {'router': router.id, 'routes': routes, 'more': True}
+        routes.append([dest_id, cost, next_hop, bool(is_valid)])
+    return {'router': router.id, 'routes': routes, 'more': False}
+
+
+def lookup_route(router, dest_id):
+    table = router.routing_table
+    if dest_id not in table:
+        return {'router': router.id, 'route': None}
+    return {'router': router.id,
+            'route': [dest_id, table.cost(dest_id), table.next_hop(dest_id), table.is_valid(dest_id)]}
+
+
+def counters(router):
+    return dict(router.stats, router=router.id, routes=len(router.routing_table),
+                table_version=router.routing_table.version)
+
+
+def handle_request(routers, data):
+    """
+    Answers a request datagram. routers maps router ids to the Routers (or AsyncRouters
+    running them) the socket serves. Returns the encoded reply.
+    """
+    try:
+        reply = answer(routers, json.loads(data))
+    except (ValueError, TypeError, KeyError, RecursionError) as e:  # RecursionError from deeply nested JSON
+        reply = {'error': str(e)}
+    return json.dumps(reply, separators=(',', ':')).encode()
+
+
+def destination_field(request, field, default=None):
+    """a destination id field of a request, which must be a JSON integer no larger than a router id"""
+    value = request.get(field, default)
+    if type(value) is not int or not 0 <= value <= MAX_ROUTER_ID:
+        raise ValueError(f"'{field}' must be an integer between 0 and {MAX_ROUTER_ID}.")
+    return value
+
+
+def answer(routers, request):
+    command = request['command']
+    if command == 'routers':
+        return {'routers': sorted(routers)}
+
+    if 'router' in request:
+        router = routers.get(request['router'])
+        if router is None:
+            raise ValueError(f"Unknown router {request['router']}.")
+    elif len(routers) == 1:
+        router, = routers.values()
+    else:
+        raise ValueError("Request must name a router.")
+    router = getattr(router, 'router', router)
+
+    if command == 'dump':
+        return dump_table(router, destination_field(request, 'after', 0), MAX_DUMP_ROUTES)
+    if command == 'route':
+        return lookup_route(router, destination_field(request, 'destination'))
+    if command == 'counters':
+        return counters(router)
+    raise ValueError(f"Unknown command '{command}'.")
+
+
+class ControlSocket:
+    """loopback UDP control socket for the select loop, answers every waiting request when serve is called"""
+
+    def __init__(self, routers, port):
+        self.routers = routers
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((CONTROL_HOST, port))
+        self.sock.setblocking(False)
+
+    def serve(self):
+        while True:
+            try:
+                data, address = self.sock.recvfrom(MAX_REQUEST_SIZE)
+            except BlockingIOError:
+                return
+            try:
+                self.sock.sendto(handle_request(self.routers, data), address)
+            except OSError:
+                pass  # Requester went away, nothing to do
+
+    def close(self):
+        self.sock.close()
+
+
+class ControlProtocol(asyncio.DatagramProtocol):
+    """the control socket as an asyncio datagram endpoint"""
+
+    def __init__(self, routers):
+        self.routers = routers
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.transport.sendto(handle_request(self.routers, data), addr)
+
+
+async def serve_control(routers, port):
+    """opens the control socket on the running loop, returns its transport"""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: ControlProtocol(routers),
+                                                       local_addr=(CONTROL_HOST, port))
+    return transport
+
+
+def query(port, request, timeout=1):
+    """sends a request dictionary to the control socket on port and returns the reply"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(json.dumps(request).encode(), (CONTROL_HOST, port))
+        data, _ = sock.recvfrom(65535)
+    reply = json.loads(data)
+    if 'error' in reply:
+        raise ValueError(reply['error'])
+    return reply
+
+
+def query_table(port, router_id=None, timeout=1):
+    """fetches a router's whole table, page by page, in the dump_table format"""
+    request = {'command': 'dump', 'after': 0}
+    if router_id is not None:
+        request['router'] = router_id
+    reply = query(port, request, timeout)
+    routes = reply['routes']
+    while reply['more']:
+        request['after'] = routes[-1][0]
+        reply = query(port, request, timeout)
+        routes += reply['routes']
+    return {'router': reply['router'], 'routes': routes, 'more': False}
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Query a RIPv2 daemon's control socket")
+    parser.add_argument('port', type=int, help="control port of the daemon or host")
+    parser.add_argument('command', choices=['dump', 'route', 'counters', 'routers'])
+    parser.add_argument('destination', type=int, nargs='?', help="destination to look up with the route command")
+    parser.add_argument('--router', type=int, help="router to query when the socket serves several")
+    parser.add_argument('--timeout', type=float, default=1)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_arguments(sys.argv[1:])
+    try:
+        reply = run_query(args)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+    print(json.dumps(reply))
+
+
+def run_query(args):
+    if args.command == 'dump':
+        reply = query_table(args.port, args.router, args.timeout)
+    else:
+        request = {'command': args.command}
+        if args.router is not None:
+            request['router'] = args.router
+        if args.command == 'route':
+            if args.destination is None:
+                raise ValueError("route needs a destination")
+            request['destination'] = args.destination
+        reply = query(args.port, request, args.timeout)
+    return reply
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,147 @@
+import os
 import sys
 import time
+import random
 import select
+import signal
+import asyncio
+import logging
+import argparse
 import socket as s
+from itertools import repeat
+
+import RIP_async
+import RIP_capture
+import RIP_control
+import RIP_logging
+import RIP_metrics
+import RIP_profiling
+import RIP_snapshot
+import RIP_codec as codec
+from RIP_scheduler import DeadlineScheduler, TimerMap
+from RIP_table import RoutingTable, VALID, PROVISIONAL
 
-SOCKETS = []
 PERIODIC_UPDATE_INTERVAL = 5       # seconds
 ROUTE_TIMEOUT = 30                 # 6 × periodic
 GARBAGE_COLLECTION_INTERVAL = 20   # 4 × periodic
 ROUTING_TABLE_PRINT_INTERVAL = 15  # seconds
+SNAPSHOT_INTERVAL = 30             # seconds between routing table snapshots, when a snapshot file is set
+TRIGGERED_UPDATE_WINDOW = 0.5          # seconds to collect changes before a triggered update
+TRIGGERED_UPDATE_SUPPRESSION = (1, 5)  # random hold-down between triggered updates (RFC 2453)
+PERIODIC_UPDATE_JITTER = 1             # periodic updates are sent every interval ± jitter seconds
+# Router timer settings by timer-profile name, the fast profile detects failures in seconds at ten times the update rate
+TIMER_PROFILES = {
+    'default': {
+        'periodic_update_interval': PERIODIC_UPDATE_INTERVAL,
+        'route_timeout': ROUTE_TIMEOUT,
+        'garbage_collection_interval': GARBAGE_COLLECTION_INTERVAL,
+        'routing_table_print_interval': ROUTING_TABLE_PRINT_INTERVAL,
+        'periodic_update_jitter': PERIODIC_UPDATE_JITTER,
+        'triggered_update_window': TRIGGERED_UPDATE_WINDOW,
+        'triggered_update_suppression': TRIGGERED_UPDATE_SUPPRESSION,
+    },
+    'fast': {
+        'periodic_update_interval': 0.5,
+        'route_timeout': 3,
+        'garbage_collection_interval': 2,
+        'routing_table_print_interval': ROUTING_TABLE_PRINT_INTERVAL,  # The table is not logged any more often
+        'periodic_update_jitter': 0.1,
+        'triggered_update_window': 0.05,
+        'triggered_update_suppression': (0.1, 0.5),
+    },
+}
+TABLE_DISPLAY = 'full'                 # 'full' prints the whole table every interval, 'diff' only the changed routes
+RECEIVE_BUFFER_SIZE = 65535           # largest UDP datagram, so packets from unsegmented senders are not truncated
+SOCKET_RECEIVE_BUFFER_SIZE = 4194304  # kernel buffer per input socket, room for a burst of segments from a large table
 
 class Router:
     
-    def __init__(self, id, input_ports, output_ports):
+    def __init__(self, id, input_ports, output_ports,
+                 triggered_update_window=TRIGGERED_UPDATE_WINDOW,
+                 triggered_update_suppression=TRIGGERED_UPDATE_SUPPRESSION,
+                 periodic_update_jitter=PERIODIC_UPDATE_JITTER,
+                 periodic_update_interval=PERIODIC_UPDATE_INTERVAL,
+                 route_timeout=ROUTE_TIMEOUT,
+                 garbage_collection_interval=GARBAGE_COLLECTION_INTERVAL,
+                 routing_table_print_interval=ROUTING_TABLE_PRINT_INTERVAL,
+                 table_display=TABLE_DISPLAY,
+                 snapshot_file=None, snapshot_interval=SNAPSHOT_INTERVAL,
+                 clock=time.time, transmit=None, seed=None, log=None):
         self.id = id
         self.input_ports = input_ports
         self.output_ports = output_ports
-        self.routing_table = {}
-        self.send_socket = s.socket(s.AF_INET, s.SOCK_DGRAM)
+        self.triggered_update_window = triggered_update_window
+        self.triggered_update_suppression = triggered_update_suppression
+        self.periodic_update_jitter = periodic_update_jitter
+        self.periodic_update_interval = periodic_update_interval
+        self.route_timeout = route_timeout
+        self.garbage_collection_interval = garbage_collection_interval
+        self.routing_table_print_interval = routing_table_print_interval
+        self.table_display = table_display
+        self.snapshot_file = snapshot_file  # routing table snapshots are written here periodically when set
+        self.snapshot_interval = snapshot_interval
+        self.clock = clock  # returns the current time in seconds, replaced by a virtual clock in simulations
+        self.transmit = transmit  # transmit(sender_id, port, packet) replaces the sockets when set
+        self.random = random.Random(seed)
+        self.log = log or RIP_logging.router_logger(id)
+        self.triggered_update_hold = 0  # no triggered update may be sent before this time
+        self.packet_cache = {}  # neighbor id: encoded update segments, cleared when the routing table changes
+        self.packet_cache_version = None  # routing table version the cached updates were built from
+        self.update_cache = {}  # segment key: [received packet, its routes, generation it was last checked in,
+                                #               and once it repeats, the destinations whose timers it restarts
+                                #               and the destinations it carries with its sender]
+        self.route_generations = {}  # destination: update cache generation its route last changed in
+        self.update_generation = 0
+        self.pending_updates = []  # (segment key, packet, sender id, destinations) parsed, not yet calculated
+        self.stats = {
+            'packet_cache_hits': 0, 'packet_cache_misses': 0,
+            'update_cache_hits': 0, 'update_cache_misses': 0,
+            'triggered_updates_sent': 0, 'triggered_updates_suppressed': 0, 'triggered_updates_merged': 0,
+            'receive_batches': 0, 'datagrams_received': 0, 'largest_receive_batch': 0,
+            'packets_sent': 0, 'packets_dropped': 0, 'invalid_entries': 0,
+            'routes_added': 0, 'routes_withdrawn': 0, 'routes_removed': 0,
+        }
+        self.metrics = RIP_metrics.Registry(self.stats, {'router': id})
+        self.decode_seconds = self.metrics.histogram('decode_seconds', 'time to parse one received packet')
+        self.calculate_seconds = self.metrics.histogram(
+            'calculate_seconds', 'time to compute routes from one receive batch')
+        self.receive_batch_size = self.metrics.histogram(
+            'receive_batch_size', 'packets received per wakeup', RIP_metrics.SIZE_BUCKETS)
+        self.routing_table = RoutingTable()
+        self.sockets = []  # bound input sockets
+        self.send_socket = None
         self.check_constraints()
-        self.instantiate_ports()
+        if self.transmit is None:
+            self.send_socket = s.socket(s.AF_INET, s.SOCK_DGRAM)
+            self.instantiate_ports()
         self.convert_output_ports()
         self.neighbors = {output_port[2]: output_port[1] for output_port in self.output_ports}
+        self.neighbor_ports = {output_port[2]: output_port[0] for output_port in self.output_ports}
+        # Route timeout, garbage collection, periodic update and print deadlines
+        self.scheduler = DeadlineScheduler()
+        self.route_timers = TimerMap(self.scheduler, 'route', self.route_timeout)
+        self.garbage_timers = TimerMap(self.scheduler, 'garbage', self.garbage_collection_interval)
         self.initialise_routing_table()
-        self.periodic_update_timer = time.time()
-        self.routing_table_timer = time.time()
-        self.route_timers = {}
-        self.garbage_timers = {}
+        now = self.clock()
+        self.scheduler.schedule('periodic', None, now + self.periodic_interval())
+        self.scheduler.schedule('print', None, now + self.routing_table_print_interval)
+        if self.snapshot_file is not None:
+            self.scheduler.schedule('snapshot', None, now + self.snapshot_interval)
+
+    @property
+    def routing_table(self):
+        return self.table
+
+    @routing_table.setter
+    def routing_table(self, routes):
+        """accepts a RoutingTable or a dict of destination: (cost, (next hop, port), is_valid)"""
+        self.table = routes if isinstance(routes, RoutingTable) else RoutingTable(routes)
+        self.changed_routes = self.table.track()  # destinations changed since the last update was sent
+        self.displayed_routes = self.table.track()  # destinations changed since the table was last displayed
+        self.update_cache_changes = self.table.track()  # destinations changed since the update cache was checked
+        self.packet_cache.clear()
+        self.update_cache.clear()
+        self.route_generations.clear()
 
     def __str__(self):
         return f'Router ID: {self.id}\n' \
@@ -34,16 +150,33 @@ class Router:
             f'Neighbors: {self.neighbors}\n' \
     
     def display_routing_table(self):
-        print('--------------------------------')
-        print(f'Router: {self.id}')
-        for entry in self.routing_table.keys():
-            print(
-                f'Destination: {entry}, '
-                f'Cost: {self.routing_table[entry][0]}, '
-                f'Next hop: {self.routing_table[entry][1][0]}, '
-                f'Is valid: {self.routing_table[entry][2]}'
-            )
-        print('--------------------------------')
+        """
+        Logs the whole routing table, or in diff mode only the routes changed since it was
+        last displayed, with removed routes listed by destination.
+        """
+        changed = set(self.displayed_routes)
+        self.displayed_routes.clear()
+        if not self.log.isEnabledFor(logging.INFO):
+            return  # Don't build the table listing for nothing
+        table = self.routing_table
+
+        if self.table_display == 'diff':
+            if not changed:
+                return
+            routes = [
+                {'destination': entry, 'cost': table.cost(entry), 'next_hop': table.next_hop(entry),
+                 'valid': table.is_valid(entry)}
+                for entry in sorted(changed) if entry in table
+            ]
+            removed = sorted(entry for entry in changed if entry not in table)
+            self.log.info('Routing table changes', extra={'routes': routes, 'removed': removed})
+            return
+
+        routes = [
+            {'destination': entry, 'cost': cost, 'next_hop': next_hop, 'valid': is_valid}
+            for entry, cost, next_hop, is_valid in table.entries()
+        ]
+        self.log.info('Routing table', extra={'routes': routes})
 
     def instantiate_ports(self):
         """instantiate input ports and bind them to sockets"""
@@ -51,11 +184,21 @@ class Router:
             try:
                 sock = s.socket(s.AF_INET, s.SOCK_DGRAM)
                 sock.setsockopt(s.SOL_SOCKET, s.SO_REUSEADDR, 1)  # Allow address reuse
+                # Large tables arrive as a burst of segments, the kernel caps this at its maximum
+                sock.setsockopt(s.SOL_SOCKET, s.SO_RCVBUF, SOCKET_RECEIVE_BUFFER_SIZE)
                 sock.bind(('', port))
-                SOCKETS.append(sock)
+                self.sockets.append(sock)
                 # print(f"Successfully bound to input port {port}")
             except Exception as e:
-                print(f"Failed to bind to input port {port}: {e}")
+                self.log.error('Failed to bind to input port %d: %s', port, e)
+
+    def close(self):
+        """closes the router's input and send sockets"""
+        for sock in self.sockets:
+            sock.close()
+        self.sockets = []
+        if self.send_socket is not None:
+            self.send_socket.close()
 
     def check_constraints(self):
         """helper function to check constraints outlined in the specification"""
@@ -69,6 +212,14 @@ class Router:
             port = int(output[0])
             if port < 1024 or port > 64000:
                 raise Exception("Port numbers must be between 1024 and 64000 (inclusive).")
+        if self.periodic_update_jitter >= self.periodic_update_interval:
+            raise Exception("Periodic update jitter must be less than the periodic update interval.")
+        if self.route_timeout <= self.periodic_update_interval:
+            raise Exception("Route timeout must be longer than the periodic update interval.")
+        if self.garbage_collection_interval <= 0:
+            raise Exception("Garbage collection interval must be greater than 0.")
+        if self.garbage_collection_interval <= self.periodic_update_interval:
+            raise Exception("Garbage collection interval must be longer than the periodic update interval.")
 
     def convert_output_ports(self):
         """parses output ports into a list of tuples (port, cost, id)"""
@@ -77,90 +228,278 @@ class Router:
     def initialise_routing_table(self):
 
         # Routing table layout - Destination: cost, (next hop, port), is_valid
+        now = self.clock()
         for output in self.output_ports:
-            self.routing_table[output[2]] = (output[1], (output[2], output[0]), True)
+            self.set_route(output[2], output[1], output[2], output[0], True)
+            self.route_timers[output[2]] = now
 
-    def construct_packet(self, neighbor_id):
+    def set_route(self, dest_id, cost, next_hop, port, is_valid, provisional=False):
         """
-        Constructs a RIP packet to send to a neighbor.
-        The packet contains the routing table entries.
+        Writes a routing table entry. The table only records a change (dropping cached
+        update packets and adding to changed_routes) when the route really changes.
         """
-        packet = bytearray()
+        self.routing_table.set(dest_id, cost, next_hop, port, is_valid, provisional)
+
+    def save_snapshot(self, path=None):
+        """writes the routing table and the age of each route's timer to a snapshot file"""
+        now = self.clock()
+        entries = []
+        for dest_id, cost, next_hop, is_valid in self.routing_table.entries():
+            timers = self.route_timers if is_valid else self.garbage_timers
+            entries.append((dest_id, cost, next_hop, is_valid, now - timers.get(dest_id, now)))
+        RIP_snapshot.write_snapshot(path or self.snapshot_file, self.id, now, entries)
+
+    def load_snapshot(self, path=None):
+        """
+        Warm starts the routing table from a snapshot. Valid routes through a neighbor are added
+        as provisional, with their timers aged by the time since they were last refreshed,
+        including the time the router was down. Routes their next hop still advertises are
+        confirmed by the next update, the others time out as usual. Returns the number of routes loaded.
+        """
+        router_id, written_at, entries = RIP_snapshot.read_snapshot(path or self.snapshot_file)
+        if router_id != self.id:
+            raise ValueError(f"Snapshot is of router {router_id}, not router {self.id}.")
+        now = self.clock()
+        downtime = max(0, now - written_at)
+        loaded = 0
+        for dest_id, cost, next_hop, is_valid, age in entries:
+            age += downtime
+            if not is_valid or age >= self.route_timeout or next_hop not in self.neighbors \
+                    or dest_id == self.id or dest_id in self.routing_table:
+                continue  # Expired, unreachable, or already known from the config
+            self.set_route(dest_id, cost, next_hop, self.find_output_port(next_hop), True, provisional=True)
+            self.route_timers[dest_id] = now - age
+            loaded += 1
+        return loaded
+
+    def remove_route(self, dest_id):
+        """deletes a routing table entry if it exists"""
+        self.routing_table.remove(dest_id)
+
+    def invalidate_route(self, dest_id, now):
+        """marks a valid route as unreachable and starts its garbage collection timer"""
+        table = self.routing_table
+        if dest_id not in table or not table.is_valid(dest_id):
+            return False
+        self.log.info('Route to %d has timed out and is now invalid.', dest_id)
+        self.stats['routes_withdrawn'] += 1
+        self.set_route(dest_id, 16, table.next_hop(dest_id), table.port(dest_id), False)
+        self.route_timers.pop(dest_id, None)
+        self.garbage_timers[dest_id] = now  # Add garbage timer
+        return True
 
-        packet.append(2) #COMMAND: reponse
-        packet.append(2) #Version: 2
-        packet += self.id.to_bytes(2, 'big') #Router-ID in place of zero-byte field
+    def construct_packet(self, neighbor_id, destinations=None):
+        """
+        Constructs a single RIP packet to send to a neighbor, however many entries it holds.
+        The packet contains the routing table entries, or only the given destinations.
+        """
+        return codec.encode_response(self.id, self.update_entries(neighbor_id, destinations))
 
-        for entry in self.routing_table.keys():
-            dest_id = entry
-            cost, (next_hop, _), is_valid = self.routing_table[entry]
+    def construct_packets(self, neighbor_id, destinations=None):
+        """
+        Constructs the update for a neighbor as RIP packets of at most 25 entries,
+        returned as segments of one buffer to be sent as a burst.
+        """
+        return codec.encode_segments(self.id, self.update_entries(neighbor_id, destinations))
+
+    def update_entries(self, neighbor_id, destinations=None):
+        """
+        (dest_id, next_hop, cost) entries of an update for a neighbor, for the whole
+        routing table or only the given destinations.
+        """
+        entries = []
+        table = self.routing_table
+
+        if destinations is None:
+            routes = table.entries()
+        else:
+            routes = ((dest_id, table.cost(dest_id), table.next_hop(dest_id), table.is_valid(dest_id))
+                      for dest_id in destinations)
 
+        for dest_id, cost, next_hop, is_valid in routes:
             if next_hop == neighbor_id or not is_valid: #split-horizon with poison reverse 
                 cost = 16
+            entries.append((dest_id, next_hop, cost))
 
-            packet += (2).to_bytes(2, 'big') #address family identifier (AF_INET)
-            packet += (0).to_bytes(2, 'big') #Route tag (set to 0)
-            packet += dest_id.to_bytes(4, 'big')
-            packet += bytes(4) #Subnet mask not used
-            packet += next_hop.to_bytes(4, 'big')
-            packet += cost.to_bytes(4, 'big')
+        return entries
 
-        return packet
+    def cached_packets(self, neighbor_id):
+        """
+        Returns the update segments for a neighbor, only re-serializing the routing table
+        if it changed since the last update was built for that neighbor.
+        """
+        if self.packet_cache_version != self.routing_table.version:
+            self.packet_cache.clear()
+            self.packet_cache_version = self.routing_table.version
+        segments = self.packet_cache.get(neighbor_id)
+        if segments is None:
+            self.stats['packet_cache_misses'] += 1
+            segments = self.packet_cache[neighbor_id] = self.construct_packets(neighbor_id)
+        else:
+            self.stats['packet_cache_hits'] += 1
+        return segments
 
     def decode_packet(self, packet):
         """
-        Decodes a received RIP packet and processes its routes.
+        Decodes a received RIP packet and processes its routes, the routing loop's
+        receive_packet and calculate_routes_batch for a batch of one packet.
         """
-        if packet[0] != 2:  # Check Command field
-            print('Invalid packet header, Command incorrect. Packet dropped')
-            return
-        if packet[1] != 2:  # Check version field
-            print('Invalid packet header, version is not 2. Packet dropped')
-            return
-
-        sender_id = int.from_bytes(packet[2:4], 'big')  # Extract sender ID
-
-        self.route_timers[sender_id] = time.time()  # Reset the timer for this sender
-        index = 4  # Start reading RIP entries
-        routes = []
-
-        while index < len(packet):
-            if int.from_bytes(packet[index:index+2], 'big') != 2:
-                print("Invalid RIPv2 entry with incorrect Addr Family. Packet dropped.")
-                return
-            index += 2
-
-            if int.from_bytes(packet[index:index+2], 'big') != 0:
-                print("Invalid RIPv2 entry with Route Tag. Packet dropped.")
-                return
-            index += 2
-
-            dest_id = int.from_bytes(packet[index:index+4], 'big')
-            index += 4
+        self.calculate_routes_batch(self.receive_packet(packet))
 
-            if int.from_bytes(packet[index:index+4], 'big') != 0:
-                print('Invalid RIPv2 entry, Subnet mask should be 0. Packet dropped.')
-                return
-            index += 4
+    def receive_packet(self, packet):
+        """
+        parse_packet, timed for the decode latency histogram. A packet that repeats one
+        already processed at the current table version only restarts timers and gives no routes.
+        """
+        started = time.perf_counter()
+        if self.refresh_duplicate(packet):
+            self.stats['update_cache_hits'] += 1
+            routes = []
+        else:
+            self.stats['update_cache_misses'] += 1
+            routes = self.parse_packet(packet)
+            if routes:
+                self.pending_updates.append((codec.segment_key(packet), bytes(packet), routes))
+        self.decode_seconds.observe(time.perf_counter() - started)
+        return routes
+
+    def refresh_duplicate(self, packet):
+        """
+        Fast path for a packet byte-identical to the last one its sender sent in the same
+        segment, while none of the routes to its sender and destinations changed since that
+        one was calculated. Calculating it again could only restart the timers of the sender
+        and of the routes it confirmed, so those are restarted in bulk without validating
+        the packet. Returns False if the packet has to go through parse_packet.
+        """
+        generation = self.next_update_generation()
+        cached = self.update_cache.get(codec.segment_key(packet))
+        if cached is None or cached[0] != packet:
+            return False
+        packet, routes, checked, refreshed, carried = cached
+        sender_id = routes[0][0]
+        if carried is None:
+            # Worked out on the first repeat, most packets are never repeated before something changes
+            carried = cached[4] = [route[1] for route in routes] + [sender_id]
+        if generation != checked:
+            if max(map(self.route_generations.get, carried, repeat(0))) > checked:
+                return False
+            cached[2] = generation
+        if refreshed is None:
+            table = self.routing_table
+            via = table.routes_via(sender_id)
+            refreshed = cached[3] = [dest_id for _, dest_id, next_hop, cost in routes
+                                     if cost < 16 and dest_id in via and next_hop != self.id
+                                     and table.is_valid(dest_id) and not table.is_provisional(dest_id)]
+        now = self.clock()
+        self.route_timers[sender_id] = now
+        self.garbage_timers.pop(sender_id, None)
+        self.route_timers.refresh(refreshed, now)
+        return True
 
-            next_hop = int.from_bytes(packet[index:index+4], 'big')
-            index += 4
+    def next_update_generation(self):
+        """
+        Starts a new update cache generation if routes changed since the last one started,
+        recording it as the generation those routes last changed in. Returns the current generation.
+        """
+        changes = self.update_cache_changes
+        if changes:
+            self.update_generation += 1
+            self.route_generations.update(dict.fromkeys(changes, self.update_generation))
+            changes.clear()
+        return self.update_generation
+
+    def remember_updates(self):
+        """
+        Caches the packets calculated since the last call, with their routes, for
+        refresh_duplicate. A cached packet is only repeated while the routes to its sender
+        and to its destinations are unchanged since it was calculated.
+        """
+        generation = self.next_update_generation()
+        cache = self.update_cache
+        for key, packet, routes in self.pending_updates:
+            cache[key] = [packet, routes, generation, None, None]
+        self.pending_updates.clear()
 
-            cost = int.from_bytes(packet[index:index+4], 'big')
-            index += 4
+    def parse_packet(self, packet):
+        """
+        Validates a received RIP packet and resets the sender's timer.
+        Returns the packet's valid routes as (sender_id, dest_id, next_hop, cost) tuples,
+        or no routes if the packet is dropped. The packet can be a view of a reused buffer,
+        nothing refers to it once this returns.
+        """
+        try:
+            command, version, sender_id = codec.decode_header(packet)
+            entries = codec.iter_entries(packet)
+        except ValueError as e:
+            self.log.warning('%s', e, extra={'event': 'invalid_packet'})
+            self.stats['packets_dropped'] += 1
+            return []
+
+        if command != codec.COMMAND_RESPONSE:  # Check Command field
+            self.log.warning('Invalid packet header, Command incorrect. Packet dropped')
+            self.stats['packets_dropped'] += 1
+            return []
+        if version != codec.VERSION:  # Check version field
+            self.log.warning('Invalid packet header, version is not 2. Packet dropped')
+            self.stats['packets_dropped'] += 1
+            return []
+
+        self.route_timers[sender_id] = self.clock()  # Reset the timer for this sender
+        routes = []
+        append = routes.append
+        valid_sender = 1 <= sender_id <= 64000
+
+        for address_family, route_tag, dest_id, subnet_mask, next_hop, cost in entries:
+            # Common case first, one comparison chain per entry, then the checks that say what is wrong
+            if address_family == codec.AF_INET and not route_tag and not subnet_mask and valid_sender \
+                    and 1 <= dest_id <= 64000 and 1 <= next_hop <= 64000 and 1 <= cost <= 16:
+                append((sender_id, dest_id, next_hop, cost))
+                continue
+            if address_family != codec.AF_INET:
+                self.log.warning('Invalid RIPv2 entry with incorrect Addr Family. Packet dropped.')
+                self.stats['packets_dropped'] += 1
+                return []
+            if route_tag != 0:
+                self.log.warning('Invalid RIPv2 entry with Route Tag. Packet dropped.')
+                self.stats['packets_dropped'] += 1
+                return []
+            if subnet_mask != 0:
+                self.log.warning('Invalid RIPv2 entry, Subnet mask should be 0. Packet dropped.')
+                self.stats['packets_dropped'] += 1
+                return []
 
             try:
                 # Check received constraints
                 self.validate_route_entry(sender_id, dest_id, next_hop, cost)
-                routes.append((sender_id, dest_id, next_hop, cost))
+                append((sender_id, dest_id, next_hop, cost))
             except ValueError as e:
-                print(e)
+                self.log.warning('Invalid route entry: %s', e)
+                self.stats['invalid_entries'] += 1
 
-        # Process the routes (update the routing table)
-        self.calculate_routes(routes)
+        return routes
+
+    def record_receive_batch(self, datagrams):
+        """counts the datagrams handled in one wakeup of the routing loop"""
+        self.stats['receive_batches'] += 1
+        self.stats['datagrams_received'] += datagrams
+        self.receive_batch_size.observe(datagrams)
+        if datagrams > self.stats['largest_receive_batch']:
+            self.stats['largest_receive_batch'] = datagrams
+
+    def send_packets(self, triggered=False):
+        """
+        sends packets to all neighbors.
+        Periodic updates carry the whole routing table, triggered updates only
+        carry the routes that changed since the last update. Either is split into
+        packets of at most 25 entries.
+        """
+        destinations = None
+        if triggered:
+            destinations = [dest_id for dest_id in self.changed_routes if dest_id in self.routing_table]
+            if not destinations:
+                self.changed_routes.clear()
+                return
 
-    def send_packets(self):
-        """sends packets to all neighbors"""
         for output in self.output_ports:
             neighbor_port = output[0]
             neighbor_id = output[2]
@@ -168,136 +507,205 @@ class Router:
             # If the neighbor is not in the routing table, we don't send a packet
             if neighbor_id not in self.routing_table:
                 continue
-            
-            packet = self.construct_packet(neighbor_id)
-            self.send_socket.sendto(packet, ('localhost', neighbor_port))
 
-    def update_timers(self):
-        """ Checks which timers have expired and updates the routing table accordingly.
-         Also sends periodic and triggered updates to neighbors if neccesary.
-        """
-        # Periodic updates
-        if time.time() - self.periodic_update_timer >= PERIODIC_UPDATE_INTERVAL:
-            self.send_packets()
-            #print("Periodic update: Packets sent.")
-            self.periodic_update_timer = time.time()
+            if triggered:
+                segments = self.construct_packets(neighbor_id, destinations)
+            else:
+                segments = self.cached_packets(neighbor_id)
+            for segment in segments:  # Burst of 25 entry packets
+                self.send(segment, neighbor_port)
 
-        # Print routing table
-        if time.time() - self.routing_table_timer >= ROUTING_TABLE_PRINT_INTERVAL:
-            self.display_routing_table()
-            self.routing_table_timer = time.time()
+        self.changed_routes.clear()
 
-        triggered_update_needed = False  # Flag to track if a triggered update is needed
+    def periodic_interval(self):
+        """periodic update interval with random jitter, so routers started together drift apart"""
+        jitter = self.periodic_update_jitter
+        return self.periodic_update_interval + self.random.uniform(-jitter, jitter)
 
-        for entry in list(self.routing_table.keys()):  # Update the route timers
-            if entry not in self.route_timers:
-                self.route_timers[entry] = time.time()
-            else:
-                if self.routing_table[entry][2] == True:  # Only consider valid routes
-                    if time.time() - self.route_timers[entry] >= ROUTE_TIMEOUT:
-                        print(f"Route to {entry} has timed out and is now invalid.")
-                        # Set the route to invalid
-                        self.routing_table[entry] = (16, self.routing_table[entry][1], False)
-                        del self.route_timers[entry]
-                        self.garbage_timers[entry] = time.time()  # Add garbage timer
-                        triggered_update_needed = True  # Mark that a triggered update is needed
-
-        if triggered_update_needed:
-            self.send_packets()  # Send a triggered update immediately
-            print("Triggered update: Packets sent.")
-        
-        # Update the garbage collection timers and delete the routes if necessary
-        for entry in list(self.garbage_timers.keys()):
-            if time.time() - self.garbage_timers[entry] >= GARBAGE_COLLECTION_INTERVAL:
-                print(f"Route to {entry} has been garbage collected.")
+    def request_triggered_update(self, now):
+        """
+        Queues a triggered update. Changes made while one is already queued are merged into it,
+        and a new one is held back until the random suppression after the last one has passed.
+        """
+        if ('triggered', None) in self.scheduler.pending:
+            self.stats['triggered_updates_merged'] += 1
+            return
+        if now < self.triggered_update_hold:
+            self.stats['triggered_updates_suppressed'] += 1
+        send_time = max(now + self.triggered_update_window, self.triggered_update_hold)
+        self.scheduler.schedule('triggered', None, send_time)
+
+    def send(self, packet, port):
+        """sends a packet to a neighbor's input port"""
+        self.stats['packets_sent'] += 1
+        if self.transmit is not None:
+            self.transmit(self.id, port, packet)
+        else:
+            self.send_socket.sendto(packet, ('localhost', port))
+
+    def update_timers(self):
+        """ Handles the timers that have expired and updates the routing table accordingly.
+         Also sends periodic and triggered updates to neighbors if neccesary.
+         Only timers that are due are touched, so the cost does not grow with the table size.
+        """
+        now = self.clock()
+
+        for kind, entry in self.scheduler.pop_due(now):
+            if kind == 'periodic':  # Periodic updates
+                if ('triggered', None) in self.scheduler.pending:
+                    # The full table already carries the pending changes
+                    self.scheduler.cancel('triggered', None)
+                    self.stats['triggered_updates_merged'] += 1
+                self.send_packets()
+                self.log.debug('Periodic update: Packets sent.')
+                self.scheduler.schedule('periodic', None, now + self.periodic_interval())
+
+            elif kind == 'triggered':  # Coalesced triggered updates
+                self.send_packets(triggered=True)  # Send the changed routes
+                self.stats['triggered_updates_sent'] += 1
+                self.triggered_update_hold = now + self.random.uniform(*self.triggered_update_suppression)
+                self.log.info('Triggered update: Packets sent.')
+
+            elif kind == 'print':  # Print routing table
+                self.display_routing_table()
+                self.scheduler.schedule('print', None, now + self.routing_table_print_interval)
+
+            elif kind == 'snapshot':  # Routing table snapshots
+                try:
+                    self.save_snapshot()
+                except OSError as e:
+                    self.log.error('Failed to write snapshot %s: %s', self.snapshot_file, e)
+                self.scheduler.schedule('snapshot', None, now + self.snapshot_interval)
+
+            elif kind == 'route':  # Route timeouts
+                if not self.route_timers.is_expired(entry, now):
+                    continue  # Timer was refreshed since it was queued
                 del self.route_timers[entry]
-                del self.routing_table[entry]
+                if entry in self.neighbors:
+                    # Nothing heard from the neighbor, every route through it is gone as well
+                    destinations = [entry] + list(self.routing_table.routes_via(entry))
+                else:
+                    destinations = [entry]
+                invalidated = False
+                for dest_id in destinations:
+                    invalidated |= self.invalidate_route(dest_id, now)
+                if invalidated:
+                    self.request_triggered_update(now)
+
+            elif kind == 'garbage':  # Delete garbage collected routes
+                if not self.garbage_timers.is_expired(entry, now):
+                    continue
+                self.log.info('Route to %d has been garbage collected.', entry)
+                self.stats['routes_removed'] += 1
+                self.route_timers.pop(entry, None)
+                self.remove_route(entry)
                 del self.garbage_timers[entry]
 
+    def next_timeout(self):
+        """seconds until the next timer is due, used as the select timeout"""
+        return max(0, self.scheduler.next_deadline() - self.clock())
+
     def find_output_port(self, neighbor_id):
         """
         Given a neighbor router ID, find the correct output port number
         to reach that neighbor. Returns None if not found.
         """
-        for output_port in self.output_ports:
-            if output_port[2] == neighbor_id:
-                return output_port[0]
-        return None
+        return self.neighbor_ports.get(neighbor_id)
 
 
     def calculate_routes(self, routes):
+        """Updates the routing table from received routes, see calculate_routes_batch."""
+        self.calculate_routes_batch(routes)
+
+    def calculate_routes_batch(self, routes):
         """
-        Updates the routing table based on received routes.
-        Ensures no loops, ignores unreachable routes (cost=16),
-        and updates the table with the cheapest path.
-        Sends triggered updates when routes become invalid.
+        Updates the routing table from the routes of many received packets, possibly
+        from many senders, at once. The best offer for each destination is picked in one
+        pass over the batch and all resulting changes are committed together at the end,
+        so the table never holds the intermediate routes that processing packet by packet
+        goes through, and those never cause triggered updates of their own.
+        Routes are (sender_id, dest_id, next_hop, cost) tuples, as returned by parse_packet.
         """
+        started = time.perf_counter()
+        now = self.clock()
+        table = self.routing_table
+
+        # Senders are alive, revive them or reset their timers once per batch
+        senders = {route[0] for route in routes}
+        for sender_id in senders:
+            if sender_id in self.neighbors and (sender_id not in table or sender_id in self.garbage_timers):
+                self.set_route(sender_id, self.neighbors[sender_id], sender_id,
+                               self.find_output_port(sender_id), True)
+                self.route_timers[sender_id] = now
+                self.garbage_timers.pop(sender_id, None)
+            elif sender_id in self.route_timers:
+                self.route_timers[sender_id] = now
+                self.garbage_timers.pop(sender_id, None)
+
+        # Cost to reach each sender, only if the sender is valid
+        sender_costs = {sender_id: table.cost(sender_id) if sender_id in table and table.is_valid(sender_id) else 0
+                        for sender_id in senders}
+
+        current = {}  # dest_id: cost advertised through the current next hop
+        best = {}     # dest_id: (cost, sender_id) of the cheapest other offer
+        own_id = self.id
+        flags, next_hops, size = table.flags, table.next_hops, len(table.flags)  # Read the table's arrays directly
         for sender_id, dest_id, next_hop, cost in routes:
-
-            # Corresponding output port for sender_id
-            correct_port = self.find_output_port(sender_id)
-
-            # Routes with cost 16 are poisoned updates and need to be addressed
-            if cost == 16:
-                if dest_id in self.routing_table:
-                    # Only if it's still valid and the next hop was the sender
-                    if self.routing_table[dest_id][0] != 16 \
-                    and self.routing_table[dest_id][1][0] == sender_id:
-                        self.routing_table[dest_id] = (16, (sender_id, correct_port), False)
-                        self.garbage_timers[dest_id] = time.time()
-                continue
-
-            # This occurs when a router is revived, also check if its revived after timeout
-            # but before garbage collection
-            if sender_id not in self.routing_table and sender_id in self.neighbors \
-            or sender_id in self.garbage_timers and sender_id in self.neighbors:
-                # cost is from neighbors dictionary
-                self.routing_table[sender_id] = (self.neighbors[sender_id], (sender_id, correct_port), True)
-                self.route_timers[sender_id] = time.time()
-                if dest_id in self.garbage_timers:
-                        del self.garbage_timers[dest_id]  # Remove from garbage timers
-
-            # Reset the route timer for the destination if the sender is the next hop
-            if dest_id in self.routing_table and self.routing_table[dest_id][1][0] == sender_id:
-                self.route_timers[dest_id] = time.time()
-                if dest_id in self.garbage_timers:
-                    del self.garbage_timers[dest_id]  # Reset garbage timer
-
-            # Reset the route timer for the sender
-            if sender_id in self.route_timers:
-                self.route_timers[sender_id] = time.time()
-                if sender_id in self.garbage_timers:
-                    del self.garbage_timers[sender_id]
-
-            # Calculate the total cost
-            # Only if sender is valid
-            if sender_id in self.routing_table and self.routing_table[sender_id][2]:
-                total_cost = cost + self.routing_table[sender_id][0]
-            else:
-                total_cost = cost  # Default to the received cost if sender is not in the table
-
-            # Ignore if total cost exceeds the maximum allowed cost
-            if total_cost > 16:
-                continue
-
             # Check for loops: avoid adding a route back to the sender
-            if dest_id == self.id:
-                continue
-            if next_hop == self.id:
+            if dest_id == own_id or next_hop == own_id:
                 continue
-
-            # Update the routing table if:
-            # 1. The destination is not in the table, or
-            # 2. The new route has a lower cost, or
-            # 3. The next hop for the destination is the sender (to refresh the route)
-            if (dest_id not in self.routing_table or
-                total_cost < self.routing_table[dest_id][0] or
-                (self.routing_table[dest_id][1][0] == sender_id and total_cost < self.routing_table[dest_id][0])):
-                
-                self.routing_table[dest_id] = (total_cost, (sender_id, correct_port), True)
-                self.route_timers[dest_id] = time.time()  # Reset the timer for this route
-                if dest_id in self.garbage_timers:
-                    del self.garbage_timers[dest_id]  # Remove from garbage timers
+            total_cost = cost + sender_costs[sender_id]
+            if total_cost > 16:
+                total_cost = 16
+            if dest_id < size and flags[dest_id] and next_hops[dest_id] == sender_id:
+                current[dest_id] = total_cost
+            elif total_cost < 16:
+                offer = best.get(dest_id)
+                if offer is None or total_cost < offer[0]:
+                    best[dest_id] = (total_cost, sender_id)
+
+        # Work out every change before touching the table
+        commits = []
+        refreshed = []  # dest_id of routes confirmed unchanged, only their timers restart
+        costs = table.costs
+        for dest_id, cost in current.items():
+            # The current next hop's cost always applies, unless another sender offers less
+            offer = best.pop(dest_id, None)
+            dest_flags = flags[dest_id]
+            if offer is not None and offer[0] < cost:
+                commits.append((dest_id, offer[0], offer[1], True))
+            elif cost == costs[dest_id] and dest_flags & VALID and not dest_flags & PROVISIONAL:
+                refreshed.append(dest_id)
+            elif cost < 16:
+                commits.append((dest_id, cost, next_hops[dest_id], True))
+            elif dest_flags & VALID:
+                commits.append((dest_id, 16, next_hops[dest_id], False))  # Poisoned
+        for dest_id, (cost, sender_id) in best.items():
+            if dest_id >= size or not flags[dest_id] or cost < costs[dest_id]:
+                commits.append((dest_id, cost, sender_id, True))
+
+        # Commit
+        self.route_timers.refresh(refreshed, now)
+        poisoned = False
+        debug = self.log.isEnabledFor(logging.DEBUG)
+        for dest_id, cost, next_hop, is_valid in commits:
+            if dest_id not in table:
+                self.stats['routes_added'] += 1
+            self.set_route(dest_id, cost, next_hop, self.find_output_port(next_hop), is_valid)
+            if debug:
+                self.log.debug('Route to %d is now cost %d via %d.', dest_id, cost, next_hop,
+                               extra={'valid': is_valid})
+            if is_valid:
+                self.route_timers[dest_id] = now  # Reset the timer for this route
+                self.garbage_timers.pop(dest_id, None)
+            else:
+                self.garbage_timers[dest_id] = now
+                self.stats['routes_withdrawn'] += 1
+                poisoned = True
+        if poisoned:
+            self.request_triggered_update(now)
+        self.remember_updates()
+        self.calculate_seconds.observe(time.perf_counter() - started)
 
     def validate_route_entry(self, sender_id, dest_id, next_hop, cost):
         """
@@ -314,14 +722,69 @@ class Router:
             raise ValueError(f"Invalid cost {cost}. Must be between 1 and 16.")
         return True
 
+def parse_seconds(value):
+    """parses a non-negative number of seconds"""
+    seconds = float(value)
+    if seconds < 0:
+        raise ValueError("must not be negative")
+    return seconds
+
+
+def parse_interval(value):
+    """parses a positive number of seconds"""
+    seconds = float(value)
+    if seconds <= 0:
+        raise ValueError("must be positive")
+    return seconds
+
+
+def parse_timer_profile(value):
+    """parses a timer profile name, see TIMER_PROFILES"""
+    if value.lower() not in TIMER_PROFILES:
+        raise ValueError(f"must be one of {', '.join(TIMER_PROFILES)}")
+    return value.lower()
+
+
+def parse_seconds_range(value):
+    """parses a <min>-<max> range of seconds"""
+    parts = value.split('-')
+    if len(parts) != 2:
+        raise ValueError("must be in the format <min>-<max>")
+    low, high = parse_seconds(parts[0]), parse_seconds(parts[1])
+    if low > high:
+        raise ValueError("min must not be greater than max")
+    return (low, high)
+
+
+def parse_table_display(value):
+    """parses a routing table display mode, full or diff"""
+    if value.lower() not in ('full', 'diff'):
+        raise ValueError("must be full or diff")
+    return value.lower()
+
+
+# Optional config file lines after output-ports, in the format <option> <value>
+CONFIG_OPTIONS = {
+    'triggered-update-window': parse_seconds,
+    'triggered-update-suppression': parse_seconds_range,
+    'periodic-update-jitter': parse_seconds,
+    'table-display': parse_table_display,
+    'timer-profile': parse_timer_profile,
+    'periodic-update-interval': parse_interval,
+    'route-timeout': parse_interval,
+    'garbage-collection-interval': parse_interval,
+    'routing-table-print-interval': parse_interval,
+}
+
+
 def read_config_file(filename):
     #Reads a config file for a single router and returns a dictionary with the configuration.
 
     with open(filename, 'r') as file:
         lines = [line.strip() for line in file if line.strip()]
 
-    if len(lines) != 3:
-        raise Exception(f"Config file '{filename}' must contain exactly 3 non-empty lines.")
+    if len(lines) < 3:
+        raise Exception(f"Config file '{filename}' must contain at least 3 non-empty lines.")
 
     config = {}
 
@@ -370,45 +833,193 @@ def read_config_file(filename):
         except ValueError:
             raise ValueError("Output ports must be integers.")
 
+    #optional settings
+    for number, line in enumerate(lines[3:], start=4):
+        parts = line.split()
+        option = parts[0].lower()
+        if option not in CONFIG_OPTIONS or len(parts) != 2:
+            raise Exception(f"Line {number} in '{filename}' must be: <option> <value>, "
+                            f"where option is one of {', '.join(CONFIG_OPTIONS)}")
+        try:
+            config[option] = CONFIG_OPTIONS[option](parts[1])
+        except ValueError as e:
+            raise ValueError(f"Invalid {option} in '{filename}': {e}")
+
     return config
 
 
-def routing_loop():
-    ROUTER.send_packets() # share routing table with neighbors
+def router_options(config):
+    """
+    returns the optional config file settings as Router keyword arguments. A timer profile
+    gives every timer setting, settings given on their own lines override it.
+    """
+    options = dict(TIMER_PROFILES[config['timer-profile']]) if 'timer-profile' in config else {}
+    options.update((option.replace('-', '_'), config[option]) for option in CONFIG_OPTIONS
+                   if option in config and option != 'timer-profile')
+    return options
+
+
+def receive_batch(router, readable, buffer, capture=None):
+    """
+    Drains every readable (non-blocking) socket into the reused buffer.
+    Returns the number of datagrams received and the routes parsed from all of them.
+    Every datagram is also recorded to the capture, if one is given.
+    """
+    view = memoryview(buffer)
+    datagrams = 0
+    routes = []
+    received_at = router.clock() if capture is not None else None
+    for sock in readable:
+        while True:
+            try:
+                size, address = sock.recvfrom_into(buffer)
+            except BlockingIOError:
+                break  # Socket drained
+            except OSError as e:
+                router.log.error('Error receiving from socket %s: %s', sock.getsockname(), e)
+                break
+            datagrams += 1
+            if capture is not None:
+                capture.record(received_at, address, capture.input_port(sock), view[:size])
+            routes += router.receive_packet(view[:size])
+    return datagrams, routes
+
+
+def wait_readable(sockets, timeout):
+    """sleeps until a socket is readable or timeout seconds pass, returns the readable sockets"""
+    readable, _, _ = select.select(sockets, [], [], timeout)
+    return readable
+
+
+def routing_loop(router, control=None, capture=None):
+    """
+    runs the router until interrupted, answering requests on the control socket if one is
+    given and recording received datagrams to the capture if one is given
+    """
+    router.send_packets() # share routing table with neighbors
+    for sock in router.sockets:
+        sock.setblocking(False)
+    buffer = bytearray(RECEIVE_BUFFER_SIZE)
+    sockets = router.sockets + ([control.sock] if control is not None else [])
     
     while True:
-        readable, _, _ = select.select(SOCKETS, [], [], 1)
+        # Sleep until a packet arrives or the next timer is due
+        readable = wait_readable(sockets, router.next_timeout())
+        if control is not None and control.sock in readable:
+            try:
+                control.serve()
+            except Exception:
+                router.log.exception('Error answering control requests')
+            readable.remove(control.sock)
         if readable:
-            for sock in readable:
-                try:
-                    data, _ = sock.recvfrom(4096)
-                    ROUTER.decode_packet(data)
-                except Exception as e:
-                    print(f"Error receiving from socket {sock.getsockname()}: {e}")
+            datagrams, routes = receive_batch(router, readable, buffer, capture)
+            if capture is not None:
+                capture.flush()  # A killed router then loses at most the batch being written
+            router.record_receive_batch(datagrams)
+            try:
+                router.calculate_routes_batch(routes)  # One pass over the whole batch
+            except Exception:
+                router.log.exception('Error processing received routes')
         
-        # Always check timers
-        ROUTER.update_timers()
+        # Check timers once per batch
+        router.update_timers()
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="RIPv2 routing daemon")
+    parser.add_argument('config_file', help="router config file")
+    parser.add_argument('--asyncio', action='store_true',
+                        help="run on an asyncio event loop instead of the select loop")
+    parser.add_argument('--control-port', type=int,
+                        help="loopback UDP port answering table dumps, route lookups and counters")
+    parser.add_argument('--snapshot-file', help="file to write routing table snapshots to periodically and on exit")
+    parser.add_argument('--snapshot-interval', type=float, default=SNAPSHOT_INTERVAL,
+                        help="seconds between routing table snapshots")
+    parser.add_argument('--warm-start', action='store_true',
+                        help="load the snapshot file on startup, its routes are provisional until confirmed")
+    parser.add_argument('--capture-file',
+                        help="file to append received datagrams to, for replay with RIP_capture.py (select loop only)")
+    RIP_logging.add_arguments(parser)
+    RIP_metrics.add_arguments(parser)
+    RIP_profiling.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def interrupt(signum, frame):
+    raise KeyboardInterrupt
 
 
 def main():
-    if len(sys.argv) != 2:
-        raise Exception("Invalid command line arguments.")
-        sys.exit(1)
+    args = parse_arguments(sys.argv[1:])
+    listener = RIP_logging.configure(args.log_level, args.log_file)
+    signal.signal(signal.SIGTERM, interrupt)  # Shut down gracefully on SIGTERM as on Ctrl-C, writing the snapshot
+    try:
+        run(args)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.stop()
 
-    config_file = sys.argv[1]
-    config = read_config_file(config_file)
+
+def run(args):
+    config = read_config_file(args.config_file)
 
     router_id = config.get('router-id')
     input_ports = config.get('input-ports', [])
     output_ports = config.get('output-ports', [])
 
-    global ROUTER
-    ROUTER = Router(router_id, input_ports, output_ports)
-
-    print(ROUTER)
-    ROUTER.display_routing_table()
+    router = Router(router_id, input_ports, output_ports, snapshot_file=args.snapshot_file,
+                    snapshot_interval=args.snapshot_interval, **router_options(config))
 
-    routing_loop()
+    router.log.info('Router started', extra={
+        'input_ports': router.input_ports, 'output_ports': router.output_ports, 'neighbors': router.neighbors})
+    if args.warm_start and args.snapshot_file and os.path.exists(args.snapshot_file):
+        try:
+            loaded = router.load_snapshot()
+            router.log.info('Loaded %d provisional routes from %s', loaded, args.snapshot_file)
+        except (OSError, ValueError) as e:
+            router.log.warning('Ignoring snapshot %s: %s', args.snapshot_file, e)
+    router.display_routing_table()
+
+    exporters = RIP_metrics.start_exporters(args, lambda: [router.metrics])
+    profiler = RIP_profiling.from_arguments(args, f'router-{router.id}')
+    profiler.hook(router, RIP_profiling.ROUTER_PHASES)
+    if not args.asyncio:
+        profiler.hook(sys.modules[__name__], RIP_profiling.LOOP_PHASES)
+    profiler.install_signals()
+    if args.profile:
+        profiler.start()
+    try:
+        run_router(router, args)
+    finally:
+        if router.snapshot_file is not None:
+            router.save_snapshot()  # Freshest table for the next warm start
+        if profiler.enabled:
+            profiler.dump()
+        for exporter in exporters:
+            exporter.close()
+
+
+def run_router(router, args):
+    if args.asyncio:
+        if args.capture_file is not None:
+            raise Exception("Packet capture needs the select loop, it is not supported with --asyncio.")
+        asyncio.run(RIP_async.run_router(router, args.control_port))
+        return
+
+    control = capture = None
+    try:
+        if args.control_port is not None:
+            control = RIP_control.ControlSocket({router.id: router}, args.control_port)
+        if args.capture_file is not None:
+            capture = RIP_capture.CaptureWriter(args.capture_file, router.id)
+            router.log.info('Capturing received packets to %s', args.capture_file)
+        routing_loop(router, control, capture)
+    finally:
+        if control is not None:
+            control.close()
+        if capture is not None:
+            capture.close()
 
 
 if __name__ == "__main__":
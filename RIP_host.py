@@ -0,0 +1,136 @@
+import os
+import sys
+import asyncio
+import logging
+import argparse
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+import RIP_control
+import RIP_logging
+import RIP_metrics
+from RIP_async import AsyncRouter
+from RIP_daemon import Router, read_config_file, router_options
+
+
+def config_files(directory):
+    """returns the router config files (*.txt) in a directory, sorted by name"""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith('.txt') and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def raise_open_file_limit():
+    """every router holds a socket per input port, so allow as many open files as the hard limit does"""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+class RouterHost:
+    """
+    Runs many Router instances in one process, with all of their sockets
+    and timers multiplexed on a single asyncio event loop.
+    """
+
+    def __init__(self):
+        self.routers = {}  # router id: AsyncRouter
+        self.configs = {}  # router id: config, kept so a stopped router can be started again
+
+    def build_router(self, config):
+        return Router(config['router-id'], config['input-ports'], config['output-ports'], **router_options(config))
+
+    async def start_router(self, config):
+        """
+        builds a router from its config and attaches it to the running loop.
+        The router is registered while it starts, so the id can't be started twice,
+        and unregistered with its sockets closed if starting fails.
+        """
+        router_id = config['router-id']
+        if router_id in self.routers:
+            raise Exception(f"Router {router_id} is already running.")
+        self.configs[router_id] = config
+        runner = AsyncRouter(self.build_router(config))
+        self.routers[router_id] = runner
+        try:
+            await runner.start()
+        except BaseException:
+            self.stop_router(router_id)
+            raise
+        return runner
+
+    def stop_router(self, router_id):
+        """detaches a router from the loop and closes its sockets"""
+        runner = self.routers.pop(router_id)
+        runner.close()
+        runner.router.close()
+
+    async def start_directory(self, directory):
+        """starts a router for every config file in directory"""
+        configs = [read_config_file(filename) for filename in config_files(directory)]
+        ids = [config['router-id'] for config in configs]
+        if len(ids) != len(set(ids)):
+            raise Exception(f"Config files in '{directory}' contain duplicate router ids.")
+        for config in configs:
+            await self.start_router(config)
+
+    def registries(self):
+        """metrics registries of the running routers, safe to call from the exporter threads"""
+        return [runner.router.metrics for runner in list(self.routers.values())]
+
+    def close(self):
+        for router_id in list(self.routers):
+            self.stop_router(router_id)
+
+    async def run(self, directory, control_port=None):
+        """
+        starts every router in directory and runs them until cancelled.
+        A control port serves all the hosted routers, requests name the router they are for.
+        """
+        await self.start_directory(directory)
+        control = None
+        if control_port is not None:
+            control = await RIP_control.serve_control(self.routers, control_port)
+        logging.getLogger(RIP_logging.LOGGER_NAME).info('Hosting %d routers from %s', len(self.routers), directory)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            if control is not None:
+                control.close()
+            self.close()
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Run a directory of RIPv2 routers in one process")
+    parser.add_argument('config_directory', help="directory of router config files, e.g. figure_1")
+    parser.add_argument('--control-port', type=int,
+                        help="loopback UDP port answering table dumps, route lookups and counters for every router")
+    RIP_logging.add_arguments(parser)
+    RIP_metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_arguments(sys.argv[1:])
+    listener = RIP_logging.configure(args.log_level, args.log_file)
+    raise_open_file_limit()
+    host = RouterHost()
+    exporters = RIP_metrics.start_exporters(args, host.registries)
+    try:
+        asyncio.run(host.run(args.config_directory, args.control_port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for exporter in exporters:
+            exporter.close()
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
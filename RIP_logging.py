@@ -0,0 +1,126 @@
+import sys
+import copy
+import json
+import time
+import queue
+import logging
+import logging.handlers
+
+LOGGER_NAME = 'rip'
+RATE_LIMIT = 10          # records of one message type let through per interval
+RATE_LIMIT_INTERVAL = 1  # seconds
+
+# Attributes every LogRecord has, anything else on a record was passed in extra
+RECORD_ATTRIBUTES = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """formats a record as one JSON object per line, with any extra fields included"""
+
+    def format(self, record):
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class JsonQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records for JsonFormatter. The standard prepare() folds the traceback into the
+    message and drops exc_info, so the traceback is formatted here into the exception field.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exception = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = record.exc_text = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most limit records of each message type through per interval.
+    The message type is the record's event field if it has one, otherwise its unformatted
+    message, so a flood of one warning can't crowd out the others. The first record let
+    through after some were dropped carries the number dropped as its suppressed field.
+    """
+
+    def __init__(self, limit=RATE_LIMIT, interval=RATE_LIMIT_INTERVAL, clock=time.monotonic):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.clock = clock
+        self.windows = {}  # message type: [window start, records let through, records dropped]
+
+    def filter(self, record):
+        now = self.clock()
+        message_type = getattr(record, 'event', record.msg)
+        window = self.windows.get(message_type)
+        if window is None or now - window[0] >= self.interval:
+            suppressed = window[2] if window is not None else 0
+            window = self.windows[message_type] = [now, 0, suppressed]
+        if window[1] >= self.limit:
+            window[2] += 1
+            return False
+        window[1] += 1
+        if window[2]:
+            record.suppressed = window[2]
+            window[2] = 0
+        return True
+
+
+class RouterLogger(logging.LoggerAdapter):
+    """adds the router id to every record, keeping any other extra fields of the call"""
+
+    def process(self, msg, kwargs):
+        kwargs['extra'] = dict(kwargs.get('extra') or (), router=self.extra['router'])
+        return msg, kwargs
+
+
+def router_logger(router_id, name=LOGGER_NAME):
+    return RouterLogger(logging.getLogger(name), {'router': router_id})
+
+
+def configure(level='INFO', filename=None, limit=RATE_LIMIT, interval=RATE_LIMIT_INTERVAL):
+    """
+    Sends the rip loggers' records to stdout, or filename, as JSON lines.
+    Records are rate limited and put on a queue by the logging call, and a listener
+    thread does the formatting and writing, so logging never blocks the routing loop.
+    Returns the listener, stop it to write out the queued records before exiting.
+    """
+    if filename is None:
+        handler = logging.StreamHandler(sys.stdout)
+    else:
+        handler = logging.FileHandler(filename)
+    handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = JsonQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(limit, interval))
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers = [queue_handler]
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+
+def add_arguments(parser):
+    """adds the logging options to a command line parser"""
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        type=str.upper, help="lowest level of messages to log")
+    parser.add_argument('--log-file', help="file to write the JSON log lines to, defaults to stdout")
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_HOST = '127.0.0.1'  # the metrics endpoint only listens on loopback
+METRICS_INTERVAL = 10  # seconds between metrics snapshot files
+PREFIX = 'rip_'
+
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)  # seconds
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+# Router.stats keys: (type, help). Counters are kept as plain dict entries, the cheapest thing to increment.
+STATS = {
+    'packets_sent': ('counter', 'RIP packets sent to neighbors'),
+    'datagrams_received': ('counter', 'RIP packets received'),
+    'packets_dropped': ('counter', 'received packets dropped as invalid'),
+    'invalid_entries': ('counter', 'route entries dropped from received packets as invalid'),
+    'routes_added': ('counter', 'destinations added to the routing table'),
+    'routes_withdrawn': ('counter', 'routes marked unreachable by a timeout or a poisoned update'),
+    'routes_removed': ('counter', 'unreachable routes garbage collected'),
+    'triggered_updates_sent': ('counter', 'triggered updates sent'),
+    'triggered_updates_suppressed': ('counter', 'triggered updates held back by the suppression timer'),
+    'triggered_updates_merged': ('counter', 'changes merged into an already pending update'),
+    'packet_cache_hits': ('counter', 'periodic updates sent from the packet cache'),
+    'packet_cache_misses': ('counter', 'periodic updates serialized again'),
+    'update_cache_hits': ('counter', 'received packets repeating an already calculated one, only timers restarted'),
+    'update_cache_misses': ('counter', 'received packets parsed and calculated'),
+    'receive_batches': ('counter', 'wakeups of the routing loop that received packets'),
+    'largest_receive_batch': ('gauge', 'most packets received in one wakeup'),
+}
+
+
+class Histogram:
+    """fixed bucket histogram, observing a value is a bisect and two additions"""
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last one counts values above every bucket
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+
+class Registry:
+    """
+    A router's metrics: its stats dictionary as counters and gauges, plus histograms.
+    Rendering reads the values without locking, so an exporter thread may see a
+    snapshot that is one increment behind.
+    """
+
+    def __init__(self, stats, labels=None):
+        self.stats = stats
+        self.labels = labels or {}
+        self.histograms = []
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        histogram = Histogram(name, help, buckets)
+        self.histograms.append(histogram)
+        return histogram
+
+    def snapshot(self):
+        """the current values as a JSON friendly dictionary"""
+        return {
+            'labels': self.labels,
+            'stats': dict(self.stats),
+            'histograms': {
+                histogram.name: {
+                    'buckets': list(histogram.buckets),
+                    'counts': list(histogram.counts),
+                    'sum': histogram.sum,
+                    'count': histogram.count,
+                } for histogram in self.histograms
+            },
+        }
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+
+def render(registries):
+    """renders the registries in the Prometheus text exposition format, samples grouped by metric"""
+    families = {}  # metric name: (type, help, sample lines)
+
+    def add(name, kind, help, line):
+        families.setdefault(name, (kind, help, []))[2].append(line)
+
+    for registry in registries:
+        labels = format_labels(registry.labels)
+        for key, value in list(registry.stats.items()):
+            kind, help = STATS.get(key, ('untyped', key.replace('_', ' ')))
+            name = PREFIX + key + ('_total' if kind == 'counter' else '')
+            add(name, kind, help, f'{name}{labels} {value}')
+
+        for histogram in registry.histograms:
+            name = PREFIX + histogram.name
+            counts = list(histogram.cumulative_counts())
+            for bound, count in zip(histogram.buckets + ('+Inf',), counts):
+                add(name, 'histogram', histogram.help,
+                    f'{name}_bucket{format_labels(dict(registry.labels, le=bound))} {count}')
+            add(name, 'histogram', histogram.help, f'{name}_sum{labels} {histogram.sum}')
+            add(name, 'histogram', histogram.help, f'{name}_count{labels} {counts[-1]}')
+
+    lines = []
+    for name, (kind, help, samples) in families.items():
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """
+    Serves the Prometheus text format on http://127.0.0.1:<port>/metrics from a background thread.
+    registries is a function returning the registries to render, so routers can come and go.
+    """
+
+    def __init__(self, registries, port):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = render(registries()).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes are not worth a log line
+
+        self.server = ThreadingHTTPServer((METRICS_HOST, port), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics-server', daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def write_snapshot(registries, path):
+    """writes the registries' values as JSON, replacing the file atomically"""
+    snapshot = {'time': time.time(), 'routers': [registry.snapshot() for registry in registries]}
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(snapshot, file)
+    os.replace(temporary, path)
+
+
+class SnapshotWriter:
+    """writes a metrics snapshot file every interval seconds from a background thread, and once more on close"""
+
+    def __init__(self, registries, path, interval=METRICS_INTERVAL):
+        self.registries = registries
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='metrics-snapshots', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            write_snapshot(self.registries(), self.path)
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+        write_snapshot(self.registries(), self.path)
+
+
+def add_arguments(parser):
+    """adds the metrics options to a command line parser"""
+    parser.add_argument('--metrics-port', type=int, help="loopback port serving Prometheus metrics at /metrics")
+    parser.add_argument('--metrics-file', help="file to write a JSON metrics snapshot to periodically")
+    parser.add_argument('--metrics-interval', type=float, default=METRICS_INTERVAL,
+                        help="seconds between metrics snapshots")
+
+
+def start_exporters(args, registries):
+    """starts the exporters asked for on the command line, returns them so they can be closed"""
+    exporters = []
+    if args.metrics_port is not None:
+        exporters.append(MetricsServer(registries, args.metrics_port))
+    if args.metrics_file is not None:
+        exporters.append(SnapshotWriter(registries, args.metrics_file, args.metrics_interval))
+    return exporters
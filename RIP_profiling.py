@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import signal
+import cProfile
+import logging
+import tracemalloc
+
+import RIP_logging
+
+PROFILE_WINDOW = 30  # seconds cProfile and tracemalloc run for once started
+TRACEMALLOC_TOP = 25  # allocation sites listed in a dump
+
+# Router methods timed as routing loop phases, attribute: phase
+ROUTER_PHASES = {
+    'receive_packet': 'decode',
+    'calculate_routes_batch': 'calculate',
+    'update_timers': 'timers',
+    'send_packets': 'send',
+}
+# Select loop functions of RIP_daemon timed as phases, receive includes decode
+LOOP_PHASES = {
+    'wait_readable': 'select',
+    'receive_batch': 'receive',
+}
+
+
+class PhaseProfiler:
+    """
+    Records the cumulative time and call count of the routing loop phases.
+    Phases are hooked by replacing the functions on their objects or modules with timed
+    wrappers while profiling is on, and putting the originals back when it is turned off,
+    so a router that is not being profiled runs exactly the code it would without a profiler.
+    Optionally runs cProfile and tracemalloc for a bounded window when started.
+    """
+
+    def __init__(self, name='rip', directory='.', window=PROFILE_WINDOW, use_cprofile=False,
+                 use_tracemalloc=False, clock=time.perf_counter):
+        self.name = name
+        self.directory = directory
+        self.window = window
+        self.use_cprofile = use_cprofile
+        self.use_tracemalloc = use_tracemalloc
+        self.clock = clock
+        self.log = logging.getLogger(RIP_logging.LOGGER_NAME)
+        self.hooks = []  # (target, attribute, phase)
+        self.patched = []  # (target, attribute, original, whether target held the attribute itself)
+        self.seconds = {}  # phase: cumulative seconds
+        self.calls = {}  # phase: calls
+        self.enabled = False
+        self.profile = None  # cProfile.Profile of the current or last window
+        self.window_end = None  # when the running window ends, None when no window is running
+        self.allocations = None  # tracemalloc snapshot taken at the end of the last window
+        self.started = None
+        self.profiled_seconds = 0
+        self.dumps = 0
+
+    def hook(self, target, attributes):
+        """times target.attribute as the given phase for every attribute: phase"""
+        for attribute, phase in attributes.items():
+            self.hooks.append((target, attribute, phase))
+            self.seconds.setdefault(phase, 0.0)
+            self.calls.setdefault(phase, 0)
+            if self.enabled:
+                self.patch(target, attribute, phase)
+
+    def patch(self, target, attribute, phase):
+        original = getattr(target, attribute)
+        self.patched.append((target, attribute, original, attribute in vars(target)))
+        setattr(target, attribute, self.timed(phase, original))
+
+    def timed(self, phase, func):
+        clock, seconds, calls = self.clock, self.seconds, self.calls
+
+        def timed_phase(*args, **kwargs):
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                finished = clock()
+                seconds[phase] += finished - started
+                calls[phase] += 1
+                if self.window_end is not None and finished >= self.window_end:
+                    self.end_window()
+
+        return timed_phase
+
+    def start(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started = self.clock()
+        for target, attribute, phase in self.hooks:
+            self.patch(target, attribute, phase)
+        if self.use_cprofile or self.use_tracemalloc:
+            self.start_window()
+        self.log.info('Profiling started', extra={'profile': self.name})
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.end_window()
+        for target, attribute, original, held in reversed(self.patched):
+            if held:
+                setattr(target, attribute, original)
+            else:
+                delattr(target, attribute)  # The instance falls back to the class's method again
+        self.patched = []
+        self.enabled = False
+        self.profiled_seconds += self.clock() - self.started
+        self.log.info('Profiling stopped', extra={'profile': self.name})
+
+    def toggle(self):
+        if self.enabled:
+            self.stop()
+        else:
+            self.start()
+
+    def start_window(self):
+        if self.use_cprofile:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        if self.use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.window_end = self.clock() + self.window
+
+    def end_window(self):
+        if self.window_end is None:
+            return
+        self.window_end = None
+        if self.profile is not None:
+            self.profile.disable()
+        if tracemalloc.is_tracing():
+            self.allocations = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+    def results(self):
+        """per phase seconds, calls and mean seconds per call"""
+        profiled = self.profiled_seconds + (self.clock() - self.started if self.enabled else 0)
+        return {
+            'profile': self.name,
+            'profiled_seconds': profiled,
+            'phases': {
+                phase: {
+                    'seconds': self.seconds[phase],
+                    'calls': self.calls[phase],
+                    'mean_seconds': self.seconds[phase] / self.calls[phase] if self.calls[phase] else 0,
+                } for phase in self.seconds
+            },
+        }
+
+    def dump(self):
+        """
+        Writes the phase results as JSON, plus the cProfile stats and the top tracemalloc
+        allocation sites of the last window if there are any. Returns the paths written.
+        A running window is ended first so its results are complete.
+        """
+        self.end_window()
+        os.makedirs(self.directory, exist_ok=True)
+        self.dumps += 1
+        base = os.path.join(self.directory, f'{self.name}-{time.strftime("%Y%m%d-%H%M%S")}-{self.dumps}')
+        results = self.results()
+        paths = []
+
+        if self.profile is not None:
+            self.profile.dump_stats(base + '.pstats')
+            paths.append(base + '.pstats')
+        if self.allocations is not None:
+            results['allocations'] = [str(stat) for stat in self.allocations.statistics('lineno')[:TRACEMALLOC_TOP]]
+
+        with open(base + '.json', 'w') as file:
+            json.dump(results, file, indent=2)
+        paths.insert(0, base + '.json')
+        self.log.info('Profile written', extra={'profile': self.name, 'paths': paths})
+        return paths
+
+    def install_signals(self):
+        """SIGUSR1 dumps the results, SIGUSR2 turns profiling on and off, where the platform has them"""
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.dump())
+        if hasattr(signal, 'SIGUSR2'):
+            signal.signal(signal.SIGUSR2, lambda signum, frame: self.toggle())
+
+
+def add_arguments(parser):
+    """adds the profiling options to a command line parser"""
+    parser.add_argument('--profile', action='store_true',
+                        help="time the routing loop phases from the start, SIGUSR2 toggles it and SIGUSR1 dumps results")
+    parser.add_argument('--profile-dir', default='.', help="directory profiling results are written to")
+    parser.add_argument('--profile-window', type=float, default=PROFILE_WINDOW,
+                        help="seconds cProfile and tracemalloc run for after profiling starts")
+    parser.add_argument('--cprofile', action='store_true', help="also run cProfile while profiling")
+    parser.add_argument('--tracemalloc', action='store_true', help="also trace memory allocations while profiling")
+
+
+def from_arguments(args, name):
+    return PhaseProfiler(name, args.profile_dir, args.profile_window, args.cprofile, args.tracemalloc)
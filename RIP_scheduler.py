@@ -0,0 +1,97 @@
+import heapq
+import itertools
+
+
+class DeadlineScheduler:
+    """
+    Min-heap of (deadline, kind, key) events.
+    Only the earliest queued deadline of each (kind, key) is live, any other heap
+    entry for it is stale and skipped when it reaches the top.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.pending = {}  # (kind, key): earliest live deadline
+        self.sequence = itertools.count()  # tie breaker so keys are never compared
+
+    def __len__(self):
+        return len(self.pending)
+
+    def schedule(self, kind, key, deadline):
+        """queues an event, unless the same event is already queued at or before deadline. O(log n)"""
+        pending = self.pending.get((kind, key))
+        if pending is not None and pending <= deadline:
+            return
+        self.pending[(kind, key)] = deadline
+        heapq.heappush(self.heap, (deadline, next(self.sequence), kind, key))
+
+    def cancel(self, kind, key):
+        self.pending.pop((kind, key), None)
+
+    def discard_stale(self):
+        """pops heap entries that no longer match their pending deadline"""
+        heap = self.heap
+        while heap:
+            deadline, _, kind, key = heap[0]
+            if self.pending.get((kind, key)) == deadline:
+                return
+            heapq.heappop(heap)
+
+    def next_deadline(self):
+        """returns the earliest live deadline, or None if nothing is queued"""
+        self.discard_stale()
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now):
+        """yields (kind, key) for every live event with a deadline at or before now"""
+        heap = self.heap
+        while True:
+            self.discard_stale()
+            if not heap or heap[0][0] > now:
+                return
+            _, _, kind, key = heapq.heappop(heap)
+            del self.pending[(kind, key)]
+            yield kind, key
+
+
+class TimerMap(dict):
+    """
+    Dictionary of key: start time, like the original route/garbage timer dicts.
+    Every assignment queues the timer's expiry on the scheduler. A refresh that moves
+    the expiry later is O(1), the stale deadline is re-queued lazily by is_expired().
+    """
+
+    def __init__(self, scheduler, kind, interval):
+        super().__init__()
+        self.scheduler = scheduler
+        self.kind = kind
+        self.interval = interval
+
+    def __setitem__(self, key, start):
+        super().__setitem__(key, start)
+        self.scheduler.schedule(self.kind, key, start + self.interval)
+
+    def refresh(self, keys, start):
+        """
+        restarts the timers of every key at start, no earlier than they last started.
+        Keys already timing have an expiry queued before the new one, only new keys are queued.
+        """
+        new_keys = [key for key in keys if key not in self]
+        self.update(dict.fromkeys(keys, start))
+        schedule, kind, deadline = self.scheduler.schedule, self.kind, start + self.interval
+        for key in new_keys:
+            schedule(kind, key, deadline)
+
+    def is_expired(self, key, now):
+        """
+        Called when the scheduler reports key as due.
+        Returns True if the timer really ran out, otherwise re-queues it at its current deadline.
+        """
+        start = self.get(key)
+        if start is None:
+            return False
+        deadline = start + self.interval
+        if deadline > now:
+            self.scheduler.schedule(self.kind, key, deadline)
+            return False
+        return True
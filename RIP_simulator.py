@@ -0,0 +1,240 @@
+import os
+import sys
+import heapq
+import random
+import logging
+import argparse
+import itertools
+
+import RIP_logging
+from RIP_daemon import Router, read_config_file, router_options
+
+LINK_DELAY = 0.001  # seconds a packet spends on a link
+LOGGER_NAME = RIP_logging.LOGGER_NAME + '.simulator'
+
+
+class VirtualClock:
+    """clock for Router instances that only moves when the simulator advances it"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class Simulator:
+    """
+    Discrete-event simulation of a network of Router instances.
+    Routers run on a shared virtual clock and exchange packets over an in-memory
+    link layer, so no sockets are opened and no real time is spent waiting on timers.
+    Runs with the same seed and events are reproducible.
+    """
+
+    def __init__(self, seed=0, link_delay=LINK_DELAY, quiet=True):
+        self.clock = VirtualClock()
+        self.random = random.Random(seed)
+        self.link_delay = link_delay
+        # Quiet simulations log to a logger of their own that discards everything,
+        # outside the logging hierarchy so other users of the rip loggers are unaffected
+        if quiet:
+            self.logger = logging.Logger(LOGGER_NAME, logging.CRITICAL + 1)
+        else:
+            self.logger = logging.getLogger(LOGGER_NAME)
+        self.events = []  # heap of (time, sequence, kind, router id, packets)
+        self.inbox = {}  # (router id, delivery time): packets of its queued delivery event
+        self.sequence = itertools.count()
+        self.routers = {}  # router id: Router, only routers that are up
+        self.configs = {}  # router id: config
+        self.port_owners = {}  # input port: router id
+        self.timer_deadlines = {}  # router id: deadline of its queued timer event
+        self.failed_links = set()  # frozenset({router id, router id})
+        self.last_change = 0.0  # virtual time a routing table last changed
+        self.packets_delivered = 0
+        self.packets_dropped = 0
+
+    def add_config(self, config):
+        """adds a router to the topology and starts it"""
+        router_id = config['router-id']
+        self.configs[router_id] = config
+        for port in config['input-ports']:
+            self.port_owners[port] = router_id
+        self.start_router(router_id)
+
+    def load_directory(self, directory):
+        """adds a router for every config file in directory"""
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.txt'):
+                self.add_config(read_config_file(os.path.join(directory, name)))
+
+    def start_router(self, router_id):
+        config = self.configs[router_id]
+        router = Router(router_id, config['input-ports'], config['output-ports'],
+                        clock=self.clock, transmit=self.transmit, seed=self.random.random(),
+                        log=RIP_logging.RouterLogger(self.logger, {'router': router_id}), **router_options(config))
+        self.routers[router_id] = router
+        self.last_change = self.clock.now
+        router.send_packets()  # share routing table with neighbors
+        self.arm_timer(router)
+
+    def kill_router(self, router_id):
+        """router stops running, packets sent to it are dropped"""
+        del self.routers[router_id]
+        self.timer_deadlines.pop(router_id, None)
+        self.last_change = self.clock.now
+
+    def revive_router(self, router_id):
+        """router restarts from its config with an empty table"""
+        self.start_router(router_id)
+
+    def fail_link(self, router_a, router_b):
+        self.failed_links.add(frozenset((router_a, router_b)))
+        self.last_change = self.clock.now
+
+    def restore_link(self, router_a, router_b):
+        self.failed_links.discard(frozenset((router_a, router_b)))
+        self.last_change = self.clock.now
+
+    def transmit(self, sender_id, port, packet):
+        """
+        link layer for all routers, queues delivery of the packet to the owner of port.
+        Packets arriving at a router at the same time are delivered as one receive batch,
+        as the routing loop reads every datagram waiting on its sockets at once.
+        """
+        receiver_id = self.port_owners.get(port)
+        if receiver_id is None or frozenset((sender_id, receiver_id)) in self.failed_links:
+            self.packets_dropped += 1
+            return
+        when = self.clock.now + self.link_delay
+        packets = self.inbox.get((receiver_id, when))
+        if packets is None:
+            packets = self.inbox[(receiver_id, when)] = []
+            heapq.heappush(self.events, (when, next(self.sequence), 'deliver', receiver_id, packets))
+        packets.append(bytes(packet))
+
+    def arm_timer(self, router):
+        """queues a timer event for the router's next deadline if it moved"""
+        deadline = router.scheduler.next_deadline()
+        if deadline is None or self.timer_deadlines.get(router.id) == deadline:
+            return
+        self.timer_deadlines[router.id] = deadline
+        heapq.heappush(self.events, (deadline, next(self.sequence), 'timer', router.id, None))
+
+    def step(self):
+        """processes the next event"""
+        when, _, kind, router_id, packets = heapq.heappop(self.events)
+        self.clock.now = max(self.clock.now, when)
+        if kind == 'deliver':
+            del self.inbox[(router_id, when)]
+        router = self.routers.get(router_id)
+        if router is None:
+            if kind == 'deliver':
+                self.packets_dropped += len(packets)
+            return
+        if kind == 'timer':
+            if self.timer_deadlines.get(router_id) != when:
+                return  # Stale, the router's next deadline moved
+            del self.timer_deadlines[router_id]
+
+        version = router.routing_table.version
+        if kind == 'deliver':
+            self.packets_delivered += len(packets)
+            routes = []
+            for packet in packets:
+                routes += router.receive_packet(packet)
+            router.calculate_routes_batch(routes)
+        else:
+            router.update_timers()
+        if router.routing_table.version != version:
+            self.last_change = self.clock.now
+        self.arm_timer(router)
+
+    def run_until(self, end):
+        """processes every event up to virtual time end"""
+        while self.events and self.events[0][0] <= end:
+            self.step()
+        self.clock.now = max(self.clock.now, end)
+
+    def run_for(self, duration):
+        self.run_until(self.clock.now + duration)
+
+    def update_round(self):
+        """longest time between two periodic updates of a running router, plus their delivery"""
+        return max((router.periodic_update_interval + router.periodic_update_jitter
+                    for router in self.routers.values()), default=0) + self.link_delay
+
+    def settled(self, since):
+        """
+        True if no running router has a timer left that can change its table: nothing
+        is waiting for garbage collection or a triggered update, and every route timer
+        was restarted at or after since, so the routes are still being refreshed.
+        """
+        for router in self.routers.values():
+            if router.garbage_timers or ('triggered', None) in router.scheduler.pending:
+                return False
+            if router.route_timers and min(router.route_timers.values()) < since:
+                return False
+        return True
+
+    def run_until_converged(self, quiet_period=None, timeout=3600):
+        """
+        Runs until the network is converged: no routing table changed for a whole
+        update_round(), so every router has advertised its table and none of its
+        neighbors changed theirs, and no timer is left that would change a table.
+        With quiet_period, instead runs until no table changed for that many seconds.
+        Returns the virtual seconds from the start of the run to the last change,
+        or None if the network did not settle within timeout seconds.
+        """
+        start = self.clock.now
+        self.last_change = max(self.last_change, start)
+        round_length = self.update_round() if quiet_period is None else quiet_period
+        deadline = self.last_change + round_length
+        while self.clock.now < start + timeout:
+            self.run_until(min(deadline, start + timeout))
+            if self.clock.now < self.last_change + round_length:
+                deadline = self.last_change + round_length  # A table changed, wait for a quiet round again
+            elif quiet_period is not None or self.settled(self.clock.now - round_length):
+                return self.last_change - start
+            else:
+                deadline = self.clock.now + round_length  # Routes still have to time out or be collected
+        return None
+
+    def tables(self):
+        """returns {router id: {dest id: (cost, next hop, is valid)}} for every running router"""
+        return {
+            router_id: {dest_id: (cost, next_hop, is_valid)
+                        for dest_id, cost, next_hop, is_valid in router.routing_table.entries()}
+            for router_id, router in self.routers.items()
+        }
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Simulate a directory of RIPv2 routers on a virtual clock")
+    parser.add_argument('config_directory', help="directory of router config files, e.g. figure_1")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--kill', type=int, action='append', default=[],
+                        help="router id to kill after the first convergence, can be repeated")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_arguments(sys.argv[1:])
+    simulator = Simulator(seed=args.seed)
+    simulator.load_directory(args.config_directory)
+
+    converged = simulator.run_until_converged()
+    print(f"{len(simulator.routers)} routers converged after {converged} virtual seconds")
+
+    if args.kill:
+        for router_id in args.kill:
+            simulator.kill_router(router_id)
+        converged = simulator.run_until_converged()
+        print(f"Re-converged {converged} virtual seconds after killing routers {args.kill}")
+
+    for router_id, table in sorted(simulator.tables().items()):
+        routes = ', '.join(f'{dest_id}: {cost} via {next_hop}' for dest_id, (cost, next_hop, _) in sorted(table.items()))
+        print(f'Router {router_id}: {routes}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import mmap
+import struct
+
+MAGIC = b'RIPS'
+FORMAT_VERSION = 1
+
+# Header layout - magic, format version, router id, time written (router clock), route count
+HEADER = struct.Struct('!4sHHdI')
+# Entry layout - destination, cost, next hop, is valid, seconds since the route's timer was last reset
+ENTRY = struct.Struct('!HBHBf')
+
+HEADER_SIZE = HEADER.size  # 20 bytes
+ENTRY_SIZE = ENTRY.size    # 10 bytes
+
+
+def encode_snapshot(router_id, written_at, entries):
+    """
+    Packs a routing table snapshot into a single preallocated buffer.
+    entries is a sequence of (dest_id, cost, next_hop, is_valid, age) tuples.
+    """
+    snapshot = bytearray(HEADER_SIZE + ENTRY_SIZE * len(entries))
+    HEADER.pack_into(snapshot, 0, MAGIC, FORMAT_VERSION, router_id, written_at, len(entries))
+
+    pack_into = ENTRY.pack_into
+    offset = HEADER_SIZE
+    for dest_id, cost, next_hop, is_valid, age in entries:
+        pack_into(snapshot, offset, dest_id, cost, next_hop, is_valid, age)
+        offset += ENTRY_SIZE
+
+    return snapshot
+
+
+def decode_snapshot(snapshot):
+    """returns (router_id, written_at, entries) with entries as a list of (dest_id, cost, next_hop, is_valid, age)"""
+    if len(snapshot) < HEADER_SIZE:
+        raise ValueError('Invalid snapshot, shorter than its header.')
+    magic, version, router_id, written_at, count = HEADER.unpack_from(snapshot)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f'Not a version {FORMAT_VERSION} routing table snapshot.')
+    if len(snapshot) != HEADER_SIZE + ENTRY_SIZE * count:
+        raise ValueError('Invalid snapshot, its length does not match its route count.')
+    view = memoryview(snapshot)[HEADER_SIZE:]
+    try:
+        return router_id, written_at, list(ENTRY.iter_unpack(view))
+    finally:
+        view.release()  # So an mmap under it can be closed
+
+
+def write_snapshot(path, router_id, written_at, entries):
+    """writes a snapshot to a temporary file and renames it over path, so readers never see half a snapshot"""
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(encode_snapshot(router_id, written_at, entries))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def read_snapshot(path):
+    """maps a snapshot file into memory and decodes it, see decode_snapshot"""
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise ValueError(f"Snapshot '{path}' is empty.")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as snapshot:
+            return decode_snapshot(snapshot)
@@ -0,0 +1,255 @@
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from RIP_control import query, query_table
+from RIP_daemon import read_config_file
+from RIP_host import config_files
+from RIP_topology import graph_from_configs
+
+INFINITY = 16  # RIP metric of an unreachable destination
+CHUNK_CELLS = 1 << 23  # offers computed at once, bounds the memory a relaxation step uses (8 MB)
+MAX_DIFFERENCES = 20  # differences printed by the command line tool
+
+
+def load_graph(directory):
+    """reads every config file of a directory into a topology, see graph_from_configs"""
+    return graph_from_configs([read_config_file(filename) for filename in config_files(directory)])
+
+
+class Solution:
+    """
+    The routing tables a converged RIP network should hold. Matrices are indexed by the
+    position of a router id in ids: costs[a, d] is the cost from a to d, capped at
+    INFINITY, and next_hops[a, d] the position of the lowest id neighbor on a cheapest
+    path, len(ids) if there is none. links[a, b] is the link cost from a to neighbor b.
+    """
+
+    def __init__(self, ids, links, costs, next_hops):
+        self.ids = ids
+        self.index = {router_id: position for position, router_id in enumerate(ids.tolist())}
+        self.lookup = np.full(int(ids.max()) + 1 if len(ids) else 1, -1, dtype=np.intp)
+        self.lookup[ids] = np.arange(len(ids))
+        self.links = links
+        self.costs = costs
+        self.next_hops = next_hops
+
+    def positions(self, router_ids):
+        """positions of an array of router ids, -1 for ids not in the topology"""
+        known = (router_ids >= 0) & (router_ids < len(self.lookup))
+        return np.where(known, self.lookup[np.where(known, router_ids, 0)], -1)
+
+    def tables(self):
+        """the expected tables as {router id: {dest id: (cost, next hop, is valid)}}, like Simulator.tables()"""
+        ids = self.ids.tolist() + [None]
+        tables = {}
+        for position, router_id in enumerate(ids[:-1]):
+            row = self.costs[position]
+            reachable = np.flatnonzero(row < INFINITY)
+            tables[router_id] = {ids[dest]: (int(row[dest]), ids[self.next_hops[position, dest]], True)
+                                 for dest in reachable.tolist() if dest != position}
+        return tables
+
+
+def link_arrays(graph, index):
+    """every link as (sources, targets, costs) position arrays, sorted by source"""
+    links = sorted((index[router_id], index[neighbor], min(cost, INFINITY))
+                   for router_id, neighbors in graph.items()
+                   for neighbor, cost in neighbors.items() if neighbor in index)
+    if not links:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty, np.zeros(0, dtype=np.int8)
+    sources, targets, costs = zip(*links)
+    return np.array(sources, dtype=np.intp), np.array(targets, dtype=np.intp), np.array(costs, dtype=np.int8)
+
+
+def link_groups(sources, size):
+    """
+    splits links into index arrays of at most size links in which no source repeats, the
+    first link of every router, then the second and so on, so a group's offers can be
+    merged into the routers' rows with plain elementwise operations
+    """
+    if not len(sources):
+        return
+    ranks = np.arange(len(sources)) - np.searchsorted(sources, sources)  # sources are sorted
+    order = np.argsort(ranks, kind='stable')
+    for group in np.split(order, np.cumsum(np.bincount(ranks))[:-1]):
+        for start in range(0, len(group), size):
+            yield group[start:start + size]
+
+
+def relax(costs, sources, targets, link_costs, size):
+    """
+    One min-plus Bellman-Ford step: every router's costs to every destination through each
+    of its links, (link cost + the neighbor's cost), keeping the cheapest per router.
+    """
+    relaxed = costs.copy()
+    for group in link_groups(sources, size):
+        rows = sources[group]
+        relaxed[rows] = np.minimum(relaxed[rows], costs[targets[group]] + link_costs[group, None])
+    np.minimum(relaxed, INFINITY, out=relaxed)
+    return relaxed
+
+
+def solve(graph):
+    """
+    Computes the converged routing tables of a topology with a vectorized min-plus
+    Bellman-Ford over its links. Every path cheaper than INFINITY has fewer than INFINITY
+    links, so it takes at most that many steps. Returns a Solution.
+    """
+    ids = np.array(sorted(graph), dtype=np.int64)
+    count = len(ids)
+    index = {router_id: position for position, router_id in enumerate(ids.tolist())}
+    sources, targets, link_costs = link_arrays(graph, index)
+    size = max(1, CHUNK_CELLS // max(count, 1))
+
+    links = np.full((count, count), INFINITY, dtype=np.int8)
+    links[sources, targets] = link_costs
+    costs = links.copy()
+    np.fill_diagonal(costs, 0)
+    changed = np.ones(count, dtype=bool)  # routers whose costs changed in the last step
+    for _ in range(INFINITY):
+        active = changed[targets]  # Only links to those can offer anything new
+        relaxed = relax(costs, sources[active], targets[active], link_costs[active], size)
+        changed = (relaxed != costs).any(axis=1)
+        if not changed.any():
+            break
+        costs = relaxed
+
+    # Lowest neighbor on a cheapest path, found with the same pass over the links
+    next_hops = np.full((count, count), count, dtype=np.uint16)
+    for group in link_groups(sources, size):
+        rows = sources[group]
+        on_path = costs[targets[group]] + link_costs[group, None] == costs[rows]
+        candidates = np.where(on_path, targets[group, None], count).astype(np.uint16)
+        next_hops[rows] = np.minimum(next_hops[rows], candidates)
+    next_hops[costs >= INFINITY] = count
+    np.fill_diagonal(next_hops, count)
+    return Solution(ids, links, costs, next_hops)
+
+
+def tables_from_dumps(dumps):
+    """converts control socket dumps, see RIP_control.dump_table, into the Simulator.tables() format"""
+    return {dump['router']: {dest_id: (cost, next_hop, bool(is_valid))
+                             for dest_id, cost, next_hop, is_valid in dump['routes']}
+            for dump in dumps}
+
+
+def diff_tables(solution, tables):
+    """
+    Compares routing tables in the Simulator.tables() format with a solution. Only the
+    routers in tables are checked. A route is correct if it has the expected cost and
+    its next hop is a neighbor on a cheapest path, ties between neighbors are both fine.
+    Invalid routes count as unreachable. Returns (router id, dest id, expected cost or
+    None if unreachable, observed (cost, next hop, is valid) or None if absent) tuples.
+    """
+    count = len(solution.ids)
+    ids = solution.ids.tolist()
+    differences = []
+    for router_id, table in sorted(tables.items()):
+        if router_id not in solution.index:
+            raise ValueError(f"Router {router_id} is not in the topology.")
+        position = solution.index[router_id]
+        expected = solution.costs[position]
+
+        rows = np.array([(dest_id, cost, next_hop or 0, is_valid)
+                         for dest_id, (cost, next_hop, is_valid) in table.items()], dtype=np.int64).reshape(-1, 4)
+        dests = solution.positions(rows[:, 0])
+        for dest_id, cost, next_hop, is_valid in rows[(dests < 0) & (rows[:, 3] != 0) & (rows[:, 1] < INFINITY)].tolist():
+            differences.append((router_id, dest_id, None, (cost, next_hop, bool(is_valid))))  # Not in the topology
+        valid = (dests >= 0) & (rows[:, 3] != 0)
+
+        observed = np.full(count, INFINITY, dtype=np.int8)
+        observed[dests[valid]] = np.minimum(rows[valid, 1], INFINITY)
+        next_hops = np.full(count, count, dtype=np.intp)
+        hop_positions = solution.positions(rows[valid, 2])
+        next_hops[dests[valid]] = np.where(hop_positions < 0, count, hop_positions)
+        observed[position] = 0
+
+        # Next hops have to be neighbors whose own cost plus the link cost is the route's cost
+        reachable = observed < INFINITY
+        hops = np.minimum(next_hops, count - 1)
+        hop_costs = solution.links[position, hops].astype(np.int32) + solution.costs[hops, np.arange(count)]
+        wrong_hop = reachable & ((next_hops == count) | (hop_costs != expected))
+        wrong_hop[position] = False
+
+        for dest in np.flatnonzero((observed != expected) | wrong_hop).tolist():
+            dest_id = ids[dest]
+            cost = int(expected[dest])
+            differences.append((router_id, dest_id, cost if cost < INFINITY else None, table.get(dest_id)))
+    return differences
+
+
+def format_difference(difference):
+    router_id, dest_id, expected, observed = difference
+    expected = 'unreachable' if expected is None else f'cost {expected}'
+    if observed is None:
+        observed = 'no route'
+    else:
+        cost, next_hop, is_valid = observed
+        observed = f"cost {cost} via {next_hop}" + ('' if is_valid else ' (invalid)')
+    return f"Router {router_id} to {dest_id}: expected {expected}, found {observed}"
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(
+        description="Compute the converged routing tables of a directory of router configs and check running routers against them")
+    parser.add_argument('config_directory', help="directory of router config files, e.g. figure_1")
+    parser.add_argument('--dumps', help="JSON file of control socket dumps to check, a list of dump replies")
+    parser.add_argument('--control-port', type=int, action='append', default=[],
+                        help="control port of a daemon or host whose routers to check, can be repeated")
+    parser.add_argument('--simulate', action='store_true', help="check the tables the routers converge to in the simulator")
+    parser.add_argument('--timeout', type=float, default=1, help="seconds to wait for a control socket reply")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_arguments(sys.argv[1:])
+    graph = load_graph(args.config_directory)
+    started = time.perf_counter()
+    solution = solve(graph)
+    print(f"Solved {len(graph)} routers in {time.perf_counter() - started:.3f} seconds")
+
+    tables = observed_tables(args)
+    if tables is None:
+        for router_id, table in sorted(solution.tables().items()):
+            routes = ', '.join(f'{dest_id}: {cost} via {next_hop}' for dest_id, (cost, next_hop, _) in sorted(table.items()))
+            print(f'Router {router_id}: {routes}')
+        return
+
+    differences = diff_tables(solution, tables)
+    for difference in differences[:MAX_DIFFERENCES]:
+        print(format_difference(difference))
+    if len(differences) > MAX_DIFFERENCES:
+        print(f"... and {len(differences) - MAX_DIFFERENCES} more")
+    print(f"Checked {len(tables)} routers, {len(differences)} differences")
+    if differences:
+        raise SystemExit(1)
+
+
+def observed_tables(args):
+    """the tables to check, from the source named on the command line, None if there is none"""
+    if args.simulate:
+        from RIP_simulator import Simulator
+        simulator = Simulator()
+        simulator.load_directory(args.config_directory)
+        if simulator.run_until_converged() is None:
+            raise SystemExit("The simulated routers did not converge.")
+        return simulator.tables()
+    if args.dumps:
+        with open(args.dumps) as file:
+            return tables_from_dumps(json.load(file))
+    if args.control_port:
+        dumps = []
+        for port in args.control_port:
+            for router_id in query(port, {'command': 'routers'}, args.timeout)['routers']:
+                dumps.append(query_table(port, router_id, args.timeout))
+        return tables_from_dumps(dumps)
+    return None
+
+
+if __name__ == "__main__":
+    main()
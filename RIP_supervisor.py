@@ -0,0 +1,267 @@
+import os
+import sys
+import signal
+import select
+import asyncio
+import argparse
+import logging
+import multiprocessing
+
+import RIP_logging
+from RIP_control import dump_table
+from RIP_daemon import read_config_file
+from RIP_host import RouterHost, config_files, raise_open_file_limit
+
+CHECK_INTERVAL = 1    # seconds between checks for crashed workers
+COMMAND_TIMEOUT = 5   # seconds to wait for a worker to answer a command
+SHUTDOWN_TIMEOUT = 5  # seconds a worker gets to stop before it is terminated
+
+# Workers are spawned rather than forked, so they start without the supervisor's threads or sockets
+CONTEXT = multiprocessing.get_context('spawn')
+
+
+def shard_configs(configs, workers):
+    """spreads router configs over at most workers shards, round robin in router id order"""
+    configs = sorted(configs, key=lambda config: config['router-id'])
+    count = max(1, min(workers, len(configs)))
+    return [configs[index::count] for index in range(count)]
+
+
+async def execute(host, command, router_id):
+    """runs a supervisor command on a worker's RouterHost"""
+    if command == 'kill':
+        if router_id not in host.routers:
+            raise Exception(f"Router {router_id} is not running.")
+        host.stop_router(router_id)
+    elif command == 'revive':
+        await host.start_router(host.configs[router_id])
+    elif command == 'status':
+        return sorted(host.routers)
+    elif command == 'dump':
+        return dump_table(host.routers[router_id].router)
+    else:
+        raise Exception(f"Unknown command '{command}'.")
+
+
+async def run_worker(configs, killed, connection):
+    """hosts configs, except the killed routers, and answers commands from the supervisor until told to stop"""
+    host = RouterHost()
+    for config in configs:
+        if config['router-id'] in killed:
+            host.configs[config['router-id']] = config  # Down, but can be revived
+        else:
+            await host.start_router(config)
+
+    loop = asyncio.get_running_loop()
+    commands = asyncio.Queue()
+
+    def readable():
+        try:
+            commands.put_nowait(connection.recv())
+        except EOFError:
+            commands.put_nowait(('stop', None))  # The supervisor is gone
+
+    loop.add_reader(connection.fileno(), readable)
+    try:
+        while True:
+            command, router_id = await commands.get()
+            if command == 'stop':
+                break
+            try:
+                reply = ('ok', await execute(host, command, router_id))
+            except Exception as e:
+                reply = ('error', str(e))
+            connection.send(reply)
+    finally:
+        loop.remove_reader(connection.fileno())
+        host.close()
+
+
+def worker_main(configs, killed, connection, log_level='INFO', log_file=None):
+    """entry point of a worker process"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C reaches the whole process group, the supervisor stops workers
+    listener = RIP_logging.configure(log_level, log_file)
+    raise_open_file_limit()
+    try:
+        asyncio.run(run_worker(configs, killed, connection))
+    finally:
+        listener.stop()
+
+
+class Worker:
+    def __init__(self, process, connection):
+        self.process = process
+        self.connection = connection
+
+
+class Supervisor:
+    """
+    Runs the routers of a topology directory across several worker processes, each
+    hosting its share of the routers on its own event loop. Workers that die are restarted
+    with their routers, except those killed on purpose, which stay down until revived.
+    """
+
+    def __init__(self, directory, workers=None, log_level='INFO', log_file=None):
+        configs = [read_config_file(filename) for filename in config_files(directory)]
+        ids = [config['router-id'] for config in configs]
+        if len(ids) != len(set(ids)):
+            raise Exception(f"Config files in '{directory}' contain duplicate router ids.")
+        self.shards = shard_configs(configs, workers or os.cpu_count() or 1)
+        self.owners = {config['router-id']: index for index, shard in enumerate(self.shards) for config in shard}
+        self.workers = [None] * len(self.shards)
+        self.killed = set()  # routers killed on purpose, kept down when their worker restarts
+        self.restarts = 0
+        self.log_level = log_level
+        self.log_file = log_file
+        self.log = logging.getLogger(RIP_logging.LOGGER_NAME)
+
+    def start(self):
+        for index in range(len(self.shards)):
+            self.start_worker(index)
+
+    def start_worker(self, index):
+        connection, worker_connection = CONTEXT.Pipe()
+        process = CONTEXT.Process(
+            target=worker_main, name=f'rip-worker-{index}', daemon=True,
+            args=(self.shards[index], set(self.killed), worker_connection, self.log_level, self.log_file))
+        process.start()
+        worker_connection.close()  # Only the worker holds its end, so the supervisor sees EOF if it dies
+        self.workers[index] = Worker(process, connection)
+
+    def check_workers(self):
+        """restarts every worker that has exited, returns their indexes"""
+        restarted = []
+        for index, worker in enumerate(self.workers):
+            if worker is not None and not worker.process.is_alive():
+                self.log.warning('Worker %d exited with code %s, restarting it', index, worker.process.exitcode)
+                worker.connection.close()
+                self.start_worker(index)
+                self.restarts += 1
+                restarted.append(index)
+        return restarted
+
+    def command(self, index, command, router_id=None):
+        worker = self.workers[index]
+        try:
+            worker.connection.send((command, router_id))
+            if not worker.connection.poll(COMMAND_TIMEOUT):
+                raise Exception(f"Worker {index} did not answer '{command}'.")
+            status, value = worker.connection.recv()
+        except (EOFError, OSError):
+            raise Exception(f"Worker {index} is not running.")
+        if status == 'error':
+            raise Exception(value)
+        return value
+
+    def worker_of(self, router_id):
+        if router_id not in self.owners:
+            raise Exception(f"Router {router_id} is not in the topology.")
+        return self.owners[router_id]
+
+    def kill_router(self, router_id):
+        """stops a router in its worker, it stays down until revived"""
+        self.command(self.worker_of(router_id), 'kill', router_id)
+        self.killed.add(router_id)
+
+    def revive_router(self, router_id):
+        """starts a killed router again from its config, with an empty table"""
+        self.command(self.worker_of(router_id), 'revive', router_id)
+        self.killed.discard(router_id)
+
+    def dump(self, router_id):
+        return self.command(self.worker_of(router_id), 'dump', router_id)
+
+    def status(self):
+        """{worker index: running router ids}"""
+        return {index: self.command(index, 'status') for index in range(len(self.workers))}
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """asks every worker to stop its routers, terminating those that don't exit in time"""
+        for worker in self.workers:
+            if worker is not None and worker.process.is_alive():
+                try:
+                    worker.connection.send(('stop', None))
+                except OSError:
+                    pass
+        for worker in self.workers:
+            if worker is None:
+                continue
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+            worker.connection.close()
+        self.workers = [None] * len(self.shards)
+
+    def handle_line(self, line):
+        """runs a command typed on stdin, returns False to stop"""
+        parts = line.split()
+        if not parts:
+            return True
+        if parts[0] in ('quit', 'exit'):
+            return False
+        try:
+            if parts[0] == 'status':
+                for index, routers in self.status().items():
+                    print(f"Worker {index}: {routers}")
+            elif parts[0] in ('kill', 'revive', 'dump') and len(parts) == 2:
+                router_id = int(parts[1])
+                if parts[0] == 'kill':
+                    self.kill_router(router_id)
+                elif parts[0] == 'revive':
+                    self.revive_router(router_id)
+                else:
+                    print(self.dump(router_id))
+            else:
+                print("Commands: status, kill <router id>, revive <router id>, dump <router id>, quit")
+        except Exception as e:
+            print(f"Error: {e}")
+        return True
+
+    def run(self, commands=sys.stdin):
+        """starts the workers and supervises them until quit, Ctrl-C or SIGTERM, reading commands from commands"""
+        self.start()
+        self.log.info('Supervising %d routers in %d workers', len(self.owners), len(self.workers))
+        try:
+            while True:
+                if commands is not None:
+                    readable, _, _ = select.select([commands], [], [], CHECK_INTERVAL)
+                    if readable:
+                        line = commands.readline()
+                        if not line:
+                            commands = None  # End of input, keep supervising
+                        elif not self.handle_line(line):
+                            break
+                else:
+                    select.select([], [], [], CHECK_INTERVAL)
+                self.check_workers()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+
+def interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Run a directory of RIPv2 routers across worker processes")
+    parser.add_argument('config_directory', help="directory of router config files, e.g. figure_1")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="number of worker processes")
+    RIP_logging.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_arguments(sys.argv[1:])
+    listener = RIP_logging.configure(args.log_level, args.log_file)
+    signal.signal(signal.SIGTERM, interrupt)  # Shut down gracefully on SIGTERM as on Ctrl-C
+    try:
+        Supervisor(args.config_directory, args.workers, args.log_level, args.log_file).run()
+    finally:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
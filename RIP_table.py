@@ -0,0 +1,152 @@
+from array import array
+from itertools import compress, islice
+from collections.abc import MutableMapping
+
+# Flag bits, a destination is in the table while its flags are non-zero
+PRESENT = 1
+VALID = 2
+PROVISIONAL = 4  # loaded from a snapshot and not yet confirmed by the next hop
+
+
+class RoutingTable(MutableMapping):
+    """
+    Routing table stored in parallel arrays indexed by destination ID.
+    Router IDs are bounded to 1 - 64000 and costs to 16, so a route takes 6 bytes of array
+    instead of a dict entry holding two nested tuples, and updating it allocates nothing.
+    The arrays grow up to the highest destination ID seen and take 6 bytes for every ID
+    below it, routed or not: one route to destination 64000 costs 384 KB. That suits networks
+    numbered from 1 up, sparse IDs in the tens of thousands pay for the whole range.
+
+    Works as a mapping of destination: (cost, (next hop, port), is_valid) like the
+    original dict, for existing callers and tests. The table also keeps the next hop
+    index and the change tracking, so every write, including mapping style ones, keeps them in sync.
+    """
+
+    def __init__(self, routes=None):
+        self.costs = array('B')
+        self.next_hops = array('H')  # 0 when there is no next hop
+        self.ports = array('H')      # 0 when there is no port
+        self.flags = array('B')
+        self.count = 0
+        self.next_hop_routes = {}  # next hop: set of destinations routed through it
+        self.change_sets = []  # sets that collect the destinations that change
+        self.version = 0  # incremented on every change
+        if routes:
+            self.update(routes)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """destinations in ascending order"""
+        return compress(range(len(self.flags)), self.flags)
+
+    def __contains__(self, dest_id):
+        return 0 < dest_id < len(self.flags) and self.flags[dest_id] != 0
+
+    def __getitem__(self, dest_id):
+        if dest_id not in self:
+            raise KeyError(dest_id)
+        return (self.costs[dest_id], (self.next_hops[dest_id] or None, self.ports[dest_id] or None),
+                bool(self.flags[dest_id] & VALID))
+
+    def __setitem__(self, dest_id, entry):
+        cost, (next_hop, port), is_valid = entry
+        self.set(dest_id, cost, next_hop, port, is_valid)
+
+    def __delitem__(self, dest_id):
+        if not self.remove(dest_id):
+            raise KeyError(dest_id)
+
+    def __repr__(self):
+        return f'RoutingTable({dict(self.items())})'
+
+    # Accessors for callers that only need one field, they assume dest_id is in the table
+    def cost(self, dest_id):
+        return self.costs[dest_id]
+
+    def next_hop(self, dest_id):
+        return self.next_hops[dest_id] or None
+
+    def port(self, dest_id):
+        return self.ports[dest_id] or None
+
+    def is_valid(self, dest_id):
+        return bool(self.flags[dest_id] & VALID)
+
+    def is_provisional(self, dest_id):
+        return bool(self.flags[dest_id] & PROVISIONAL)
+
+    def routes_via(self, next_hop):
+        """destinations whose next hop is next_hop"""
+        return self.next_hop_routes.get(next_hop, set())
+
+    def entries(self, start=0):
+        """
+        yields (dest_id, cost, next_hop, is_valid) without building the nested tuples,
+        for destinations from start up
+        """
+        costs, next_hops, flags = self.costs, self.next_hops, self.flags
+        for dest_id in compress(range(start, len(flags)), islice(flags, start, None)):
+            yield dest_id, costs[dest_id], next_hops[dest_id], (flags[dest_id] & VALID) != 0
+
+    def track(self):
+        """returns a set that every destination changed from now on is added to"""
+        changes = set()
+        self.change_sets.append(changes)
+        return changes
+
+    def changed(self, dest_id):
+        self.version += 1
+        for changes in self.change_sets:
+            changes.add(dest_id)
+
+    def grow(self, dest_id):
+        """extends the arrays so dest_id can be stored"""
+        missing = dest_id + 1 - len(self.flags)
+        self.costs.extend(bytes(missing))
+        self.next_hops.extend(array('H', bytes(2 * missing)))
+        self.ports.extend(array('H', bytes(2 * missing)))
+        self.flags.extend(bytes(missing))
+
+    def set(self, dest_id, cost, next_hop, port, is_valid, provisional=False):
+        """writes a route, returns False if the route was already exactly that"""
+        next_hop = next_hop or 0
+        port = port or 0
+        flags = PRESENT | VALID if is_valid else PRESENT
+        if provisional:
+            flags |= PROVISIONAL
+
+        if dest_id < 1:
+            raise KeyError(dest_id)
+        if dest_id >= len(self.flags):
+            self.grow(dest_id)
+        old_flags = self.flags[dest_id]
+        old_next_hop = self.next_hops[dest_id]
+
+        if old_flags:
+            if self.costs[dest_id] == cost and old_next_hop == next_hop and self.ports[dest_id] == port \
+                    and old_flags == flags:
+                return False
+            if old_next_hop != next_hop:
+                self.next_hop_routes[old_next_hop].discard(dest_id)
+        else:
+            self.count += 1
+
+        self.costs[dest_id] = cost
+        self.next_hops[dest_id] = next_hop
+        self.ports[dest_id] = port
+        self.flags[dest_id] = flags
+        self.next_hop_routes.setdefault(next_hop, set()).add(dest_id)
+        self.changed(dest_id)
+        return True
+
+    def remove(self, dest_id):
+        """deletes a route, returns False if there was no route to dest_id"""
+        if dest_id not in self:
+            return False
+        self.next_hop_routes[self.next_hops[dest_id]].discard(dest_id)
+        self.flags[dest_id] = 0
+        self.count -= 1
+        self.changed(dest_id)
+        return True
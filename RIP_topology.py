@@ -0,0 +1,377 @@
+import os
+import sys
+import math
+import random
+import argparse
+from collections import deque
+
+from RIP_daemon import read_config_file
+from RIP_host import config_files
+
+BASE_PORT = 20000
+MAX_PORT = 64000
+MAX_HOPS = 15  # longest path RIP can route over unit cost links, a metric of 16 is unreachable
+
+# A topology is a dictionary of router id: {neighbor id: link cost}, with every link listed at both ends.
+
+
+def add_link(graph, router_a, router_b, cost=1):
+    graph.setdefault(router_a, {})[router_b] = cost
+    graph.setdefault(router_b, {})[router_a] = cost
+
+
+def mesh_topology(count, cost=1):
+    """every router is linked to every other router"""
+    graph = {router_id: {} for router_id in range(1, count + 1)}
+    for router_a in range(1, count + 1):
+        for router_b in range(router_a + 1, count + 1):
+            add_link(graph, router_a, router_b, cost)
+    return graph
+
+
+def ring_topology(count, cost=1):
+    """routers 1 .. count linked in a cycle"""
+    graph = {router_id: {} for router_id in range(1, count + 1)}
+    for router_id in range(1, count + 1):
+        if count > 1:
+            add_link(graph, router_id, router_id % count + 1, cost)
+    return graph
+
+
+def grid_topology(rows, columns, cost=1):
+    """routers laid out in a rows x columns grid, linked to the routers next to them"""
+    graph = {router_id: {} for router_id in range(1, rows * columns + 1)}
+    for row in range(rows):
+        for column in range(columns):
+            router_id = row * columns + column + 1
+            if column + 1 < columns:
+                add_link(graph, router_id, router_id + 1, cost)
+            if row + 1 < rows:
+                add_link(graph, router_id, router_id + columns, cost)
+    return graph
+
+
+def random_topology(count, degree=4, max_cost=1, seed=0):
+    """
+    connected random graph, a random spanning tree plus extra links
+    until routers have degree links on average. Link costs are random in 1 .. max_cost.
+    """
+    rng = random.Random(seed)
+    graph = {router_id: {} for router_id in range(1, count + 1)}
+    for router_id in range(2, count + 1):
+        add_link(graph, router_id, rng.randint(1, router_id - 1), rng.randint(1, max_cost))
+
+    links = count - 1
+    wanted = min(count * degree // 2, count * (count - 1) // 2)
+    while links < wanted:
+        router_a, router_b = rng.randint(1, count), rng.randint(1, count)
+        if router_a != router_b and router_b not in graph[router_a]:
+            add_link(graph, router_a, router_b, rng.randint(1, max_cost))
+            links += 1
+    return graph
+
+
+def tree_topology(count, branching=2, cost=1):
+    """routers 1 .. count in a tree, router n's parent is router (n - 2) // branching + 1"""
+    graph = {router_id: {} for router_id in range(1, count + 1)}
+    for router_id in range(2, count + 1):
+        add_link(graph, router_id, (router_id - 2) // branching + 1, cost)
+    return graph
+
+
+def geometric_topology(count, degree=4, max_cost=1, seed=0):
+    """
+    random geometric graph: routers at random points of the unit square, linked to every
+    router within the radius that gives degree links on average. Routers are bucketed into
+    cells of that radius, so only neighboring cells are searched. Parts left apart are
+    linked to the largest part through their closest pair of routers. Link costs grow with
+    distance up to max_cost.
+    """
+    rng = random.Random(seed)
+    points = {router_id: (rng.random(), rng.random()) for router_id in range(1, count + 1)}
+    radius = min(1.0, math.sqrt(degree / (math.pi * max(count, 1))))
+    graph = {router_id: {} for router_id in points}
+
+    def cost(router_a, router_b):
+        return max(1, math.ceil(max_cost * math.dist(points[router_a], points[router_b]) / radius))
+
+    cells = {}
+    for router_id, (x, y) in points.items():
+        cells.setdefault((int(x / radius), int(y / radius)), []).append(router_id)
+    for (column, row), routers in cells.items():
+        for router_a in routers:
+            for other in ((column + dx, row + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+                for router_b in cells.get(other, ()):
+                    if router_a < router_b and math.dist(points[router_a], points[router_b]) <= radius:
+                        add_link(graph, router_a, router_b, min(cost(router_a, router_b), max_cost))
+
+    # Join every other part to the largest one, through the closest pair of routers
+    parts = []
+    remaining = set(graph)
+    while remaining:
+        part = reachable(graph, min(remaining))
+        parts.append(part)
+        remaining -= part
+    parts.sort(key=len, reverse=True)
+    side = int(1 / radius) + 1  # cells along each side of the square
+    joined = parts[0] if parts else set()
+
+    def nearest(router_id):
+        """(distance, router_id, closest joined router), searching the cells around router_id ring by ring"""
+        x, y = points[router_id]
+        column, row = int(x / radius), int(y / radius)
+        best = (math.inf, router_id, None)
+        for ring in range(side + 1):
+            if (ring - 1) * radius > best[0]:
+                break  # Every cell from this ring on is further away
+            for cell in ring_cells(column, row, ring):
+                for other in cells.get(cell, ()):
+                    if other in joined:
+                        best = min(best, (math.dist(points[router_id], points[other]), router_id, other))
+        return best
+
+    for part in parts[1:]:
+        distance, router_a, router_b = min(nearest(router_id) for router_id in part)
+        add_link(graph, router_a, router_b, min(cost(router_a, router_b), max_cost))
+        joined |= part
+
+    return graph
+
+
+def ring_cells(column, row, ring):
+    """the cells on the square ring distance cells around (column, row)"""
+    if ring == 0:
+        return [(column, row)]
+    cells = []
+    for offset in range(-ring, ring + 1):
+        cells += [(column + offset, row - ring), (column + offset, row + ring)]
+    for offset in range(-ring + 1, ring):
+        cells += [(column - ring, row + offset), (column + ring, row + offset)]
+    return cells
+
+
+def scale_free_topology(count, links_per_router=2, max_cost=1, seed=0):
+    """
+    Barabasi-Albert graph: routers join one at a time, each linking to links_per_router
+    existing routers picked with a probability proportional to their number of links,
+    which gives a few highly connected hubs. Link costs are random in 1 .. max_cost.
+    """
+    rng = random.Random(seed)
+    graph = {router_id: {} for router_id in range(1, count + 1)}
+    ends = []  # every link's two routers, picking from it favours routers with many links
+    for router_id in range(2, count + 1):
+        targets = set()
+        wanted = min(links_per_router, router_id - 1)
+        while len(targets) < wanted:
+            targets.add(rng.choice(ends) if ends else 1)
+        for target in sorted(targets):
+            add_link(graph, router_id, target, rng.randint(1, max_cost))
+            ends += (router_id, target)
+    return graph
+
+
+def build_topology(spec, seed=0, max_cost=1):
+    """
+    builds a topology from a spec like mesh:10, ring:30, grid:10x10, tree:100, random:200,
+    geometric:1000 or scalefree:1000. max_cost applies to the random kinds.
+    """
+    kind, _, size = spec.partition(':')
+    if kind == 'mesh':
+        return mesh_topology(int(size))
+    if kind == 'ring':
+        return ring_topology(int(size))
+    if kind == 'grid':
+        rows, _, columns = size.partition('x')
+        return grid_topology(int(rows), int(columns or rows))
+    if kind == 'tree':
+        return tree_topology(int(size))
+    if kind == 'random':
+        return random_topology(int(size), max_cost=max_cost, seed=seed)
+    if kind == 'geometric':
+        return geometric_topology(int(size), max_cost=max_cost, seed=seed)
+    if kind == 'scalefree':
+        return scale_free_topology(int(size), max_cost=max_cost, seed=seed)
+    raise ValueError(f"Unknown topology '{spec}', expected mesh, ring, grid, tree, random, geometric or scalefree.")
+
+
+def reachable(graph, source):
+    """routers reachable from source"""
+    seen = {source}
+    queue = deque([source])
+    while queue:
+        for neighbor in graph[queue.popleft()]:
+            if neighbor not in seen:
+                seen.add(neighbor)
+                queue.append(neighbor)
+    return seen
+
+
+def links(graph):
+    """returns every link once as (router a, router b, cost) with router a < router b"""
+    return [(router_a, router_b, cost) for router_a, neighbors in graph.items()
+            for router_b, cost in neighbors.items() if router_a < router_b]
+
+
+def hop_diameter(graph):
+    """longest shortest path in hops, found with a breadth first search from every router"""
+    diameter = 0
+    for source in graph:
+        hops = {source: 0}
+        queue = deque([source])
+        while queue:
+            router_id = queue.popleft()
+            for neighbor in graph[router_id]:
+                if neighbor not in hops:
+                    hops[neighbor] = hops[router_id] + 1
+                    queue.append(neighbor)
+        diameter = max(diameter, max(hops.values()))
+    return diameter
+
+
+def to_configs(graph, base_port=BASE_PORT):
+    """
+    builds a config (in the read_config_file format) for every router in graph.
+    Every link end gets its own input port, allocated sequentially from base_port.
+    """
+    ports = {}  # (router, neighbor): input port on router for packets from neighbor
+    port = base_port
+    for router_id in sorted(graph):
+        for neighbor in sorted(graph[router_id]):
+            ports[(router_id, neighbor)] = port
+            port += 1
+    if port - 1 > MAX_PORT:
+        raise ValueError(f"Topology needs {port - base_port} ports, more than fit between {base_port} and {MAX_PORT}.")
+
+    configs = []
+    for router_id in sorted(graph):
+        neighbors = sorted(graph[router_id])
+        configs.append({
+            'router-id': router_id,
+            'input-ports': [ports[(router_id, neighbor)] for neighbor in neighbors],
+            'output-ports': [f'{ports[(neighbor, router_id)]}-{graph[router_id][neighbor]}-{neighbor}'
+                             for neighbor in neighbors],
+        })
+    return configs
+
+
+def graph_from_configs(configs):
+    """
+    builds a topology, {router id: {neighbor id: link cost}}, from router configs in the
+    read_config_file format. A router only routes through neighbors that send it updates,
+    so a link is only kept if both of its ends list each other. Each end's cost is its own.
+    """
+    outputs = {}
+    for config in configs:
+        outputs[config['router-id']] = {}
+        for output in config['output-ports']:
+            _, cost, neighbor = map(int, output.split('-'))
+            outputs[config['router-id']][neighbor] = cost
+    return {router_id: {neighbor: cost for neighbor, cost in neighbors.items()
+                        if router_id in outputs.get(neighbor, {})}
+            for router_id, neighbors in outputs.items()}
+
+
+def write_configs(configs, directory):
+    """writes every config as config_<router id>.txt in directory, in the read_config_file format"""
+    os.makedirs(directory, exist_ok=True)
+    for config in configs:
+        lines = [f"router-id {config['router-id']}",
+                 'input-ports ' + ' '.join(map(str, config['input-ports'])),
+                 'output-ports ' + ' '.join(config['output-ports'])]
+        lines += [f'{option} {value}' for option, value in config.items()
+                  if option not in ('router-id', 'input-ports', 'output-ports')]
+        with open(os.path.join(directory, f"config_{config['router-id']}.txt"), 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+
+
+def check_configs(configs):
+    """
+    Cross-validates the configs of a whole network. Returns a list of problems, empty if
+    router ids and input ports are unique, every output port is an input port of the
+    neighbor it names, and every link is listed at both ends with the same cost.
+    """
+    problems = []
+    routers = {}
+    owners = {}  # input port: router id
+    for config in configs:
+        router_id = config['router-id']
+        if router_id in routers:
+            problems.append(f"Router id {router_id} is used by more than one config.")
+        routers[router_id] = config
+        for port in config['input-ports']:
+            if port in owners:
+                problems.append(f"Input port {port} of router {router_id} is also an input port of router {owners[port]}.")
+            else:
+                owners[port] = router_id
+
+    outputs = {}  # router id: {neighbor id: cost}
+    for router_id, config in routers.items():
+        neighbors = outputs[router_id] = {}
+        for output in config['output-ports']:
+            port, cost, neighbor = map(int, output.split('-'))
+            if neighbor == router_id:
+                problems.append(f"Router {router_id} lists itself as a neighbor.")
+            elif neighbor in neighbors:
+                problems.append(f"Router {router_id} lists neighbor {neighbor} more than once.")
+            elif neighbor not in routers:
+                problems.append(f"Router {router_id} lists neighbor {neighbor}, which has no config.")
+            elif owners.get(port) != neighbor:
+                problems.append(f"Router {router_id} sends to port {port} for router {neighbor}, "
+                                f"but that is not one of router {neighbor}'s input ports.")
+            neighbors[neighbor] = cost
+
+    for router_id, neighbors in outputs.items():
+        for neighbor, cost in neighbors.items():
+            if neighbor not in outputs or neighbor == router_id:
+                continue
+            if router_id not in outputs[neighbor]:
+                problems.append(f"Router {router_id} lists neighbor {neighbor}, which does not list it back.")
+            elif router_id < neighbor and outputs[neighbor][router_id] != cost:
+                problems.append(f"Link {router_id}-{neighbor} costs {cost} one way and "
+                                f"{outputs[neighbor][router_id]} the other.")
+    return problems
+
+
+def load_configs(directory):
+    """
+    reads every config file of a directory and cross-validates them, see check_configs.
+    Returns the configs sorted by router id, raises an exception listing any problems.
+    """
+    configs = sorted((read_config_file(filename) for filename in config_files(directory)),
+                     key=lambda config: config['router-id'])
+    problems = check_configs(configs)
+    if problems:
+        raise Exception(f"Config files in '{directory}' are inconsistent:\n" + '\n'.join(problems))
+    return configs
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Generate or check a directory of RIPv2 router configs")
+    commands = parser.add_subparsers(dest='command', required=True)
+    generate = commands.add_parser('generate', help="write the configs of a generated topology")
+    generate.add_argument('topology', help="mesh:10, ring:30, grid:10x10, tree:100, random:200, geometric:1000 or scalefree:1000")
+    generate.add_argument('config_directory', help="directory to write config_<id>.txt files to")
+    generate.add_argument('--max-cost', type=int, default=1, help="highest link cost of the random topologies")
+    generate.add_argument('--base-port', type=int, default=BASE_PORT, help="first input port to allocate")
+    generate.add_argument('--seed', type=int, default=0)
+    check = commands.add_parser('check', help="check that a directory of configs is consistent")
+    check.add_argument('config_directory')
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_arguments(sys.argv[1:])
+    try:
+        if args.command == 'generate':
+            graph = build_topology(args.topology, args.seed, args.max_cost)
+            write_configs(to_configs(graph, args.base_port), args.config_directory)
+            print(f"Wrote {len(graph)} routers with {len(links(graph))} links to {args.config_directory}")
+        else:
+            configs = load_configs(args.config_directory)
+            print(f"{len(configs)} configs in {args.config_directory} are consistent")
+    except Exception as e:
+        raise SystemExit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
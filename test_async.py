@@ -0,0 +1,49 @@
+import unittest
+import time
+import asyncio
+import RIP_daemon as RIP
+from RIP_async import AsyncRouter
+
+
+class TestAsyncRouter(unittest.TestCase):
+    def setUp(self):
+        self.router1 = RIP.Router(1, [46001], ["46002-1-2"])
+        self.router2 = RIP.Router(2, [46002], ["46001-1-1", "46003-1-3"])
+
+    def tearDown(self):
+        self.router1.close()
+        self.router2.close()
+
+    def test_routers_exchange_updates(self):
+        async def run():
+            runners = [AsyncRouter(self.router1), AsyncRouter(self.router2)]
+            for runner in runners:
+                await runner.start()
+            await asyncio.sleep(0.2)
+            for runner in runners:
+                self.assertIsNotNone(runner.timer_handle)  # Next deadline is scheduled
+                runner.close()
+
+        asyncio.run(run())
+
+        # Router 1 learned router 3 through router 2's first update
+        self.assertIn(3, self.router1.routing_table)
+        self.assertEqual(self.router1.routing_table[3][0], 2)
+
+    def test_timer_follows_earliest_deadline(self):
+        async def run():
+            runner = AsyncRouter(self.router1)
+            runner.arm_timer()
+            first = runner.timer_deadline
+            self.router1.route_timers[2] = time.time() - RIP.ROUTE_TIMEOUT - 1  # Already expired
+            runner.arm_timer()
+            self.assertLess(runner.timer_deadline, first)
+            await asyncio.sleep(0.05)  # Timer is already due and fires
+            runner.close()
+
+        asyncio.run(run())
+        self.assertFalse(self.router1.routing_table[2][2])
+
+
+if __name__ == "__main__":
+    unittest.main()
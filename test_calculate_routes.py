@@ -18,7 +18,7 @@ class TestCalculateRoutes(unittest.TestCase):
             (self.router2_id, 4, 5001, 1),  # Route to destination 4 via Router 2
             (self.router3_id, 5, 5002, 1),  # Route to destination 5 via Router 3
         ]
-        self.router.calculate_routes(routes)
+        self.router.calculate_routes_batch(routes)
 
         # Assert the routes are added
         self.assertIn(4, self.router.routing_table)
@@ -31,27 +31,75 @@ class TestCalculateRoutes(unittest.TestCase):
         initial_routes = [
             (self.router2_id, 4, 5001, 5),  # Route to destination 4 via Router 2 with cost 5
         ]
-        self.router.calculate_routes(initial_routes)
+        self.router.calculate_routes_batch(initial_routes)
 
         # Update the route with a lower cost
         updated_routes = [
             (self.router2_id, 4, 5001, 2),  # Route to destination 4 via Router 2 with cost 2
         ]
-        self.router.calculate_routes(updated_routes)
+        self.router.calculate_routes_batch(updated_routes)
 
         # Assert the route is updated with the lower cost
         self.assertEqual(self.router.routing_table[4][0], 3)  # Cost = 1 (to Router 2) + 2
 
-        # Attempt to update the route with a higher cost
+        # Router 2 is the next hop, so its higher cost applies
         expensive_routes = [
             (self.router2_id, 4, 5001, 10),  # Route to destination 4 via Router 2 with cost 10
         ]
-        self.router.calculate_routes(expensive_routes)
+        self.router.calculate_routes_batch(expensive_routes)
+        self.assertEqual(self.router.routing_table[4][0], 11)  # Cost = 1 (to Router 2) + 10
 
-        # Assert the route is not updated with the higher cost
-        self.assertEqual(self.router.routing_table[4][0], 3)  # Cost remains 3 (lower cost route retained)
+        # A higher cost from another neighbor is ignored
+        self.router.calculate_routes_batch([(self.router3_id, 4, 5002, 12)])
+        self.assertEqual(self.router.routing_table[4][0], 11)
     
 
 
+class TestBatchRouteCalculation(unittest.TestCase):
+    def setUp(self):
+        self.router = Router(1, [], ["5001-2-2", "5002-1-3"], triggered_update_window=0, transmit=lambda *packet: None)
+        self.router.calculate_routes_batch([(2, 4, 2, 1), (3, 5, 3, 1)])
+        self.table = self.router.routing_table
+
+    def test_learns_from_many_senders(self):
+        self.assertEqual(self.table[2], (2, (2, 5001), True))
+        self.assertEqual(self.table[3], (1, (3, 5002), True))
+        self.assertEqual(self.table[4], (3, (2, 5001), True))
+        self.assertEqual(self.table[5], (2, (3, 5002), True))
+
+    def test_best_offer_is_committed_once(self):
+        changes = self.table.track()
+        version = self.table.version
+        # Router 2 offers 6 first, router 3 offers it cheaper later in the batch
+        self.router.calculate_routes_batch([(2, 6, 2, 1), (3, 6, 3, 3), (3, 6, 3, 1)])
+
+        self.assertEqual(self.table[6], (2, (3, 5002), True))
+        self.assertEqual(changes, {6})
+        self.assertEqual(self.table.version, version + 1)  # No intermediate route through router 2
+
+    def test_next_hop_cost_increase_applies(self):
+        self.router.calculate_routes_batch([(2, 4, 2, 5)])
+        self.assertEqual(self.table[4], (7, (2, 5001), True))
+
+    def test_poison_from_next_hop_with_alternative(self):
+        # Router 2 loses 4 while router 3 offers it in the same batch
+        self.router.calculate_routes_batch([(2, 4, 2, 16), (3, 4, 3, 2)])
+        self.assertEqual(self.table[4], (3, (3, 5002), True))
+        self.assertNotIn(4, self.router.garbage_timers)
+
+    def test_poison_from_next_hop_triggers_update(self):
+        self.router.calculate_routes_batch([(2, 4, 2, 16)])
+        self.assertFalse(self.table[4][2])
+        self.assertIn(4, self.router.garbage_timers)
+
+        self.router.update_timers()
+        self.assertEqual(self.router.stats['triggered_updates_sent'], 1)
+
+    def test_skips_loops(self):
+        self.router.calculate_routes_batch([(2, 1, 2, 1), (2, 7, 1, 1)])
+        self.assertNotIn(1, self.table)
+        self.assertNotIn(7, self.table)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
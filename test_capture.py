@@ -0,0 +1,125 @@
+import os
+import time
+import select
+import socket
+import tempfile
+import unittest
+import RIP_codec as codec
+import RIP_capture as capture
+import RIP_daemon as RIP
+from RIP_daemon import Router
+
+
+class TestCaptureFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'router-1.cap')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, records, router_id=1):
+        writer = capture.CaptureWriter(self.path, router_id)
+        for record in records:
+            writer.record(*record)
+        writer.close()
+
+    def read(self):
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        return capture.read_header(data), [(received_at, address, port, bytes(packet))
+                                           for received_at, address, port, packet in capture.iter_records(data)]
+
+    def test_records_round_trip(self):
+        update = codec.encode_response(2, [(4, 2, 1)])
+        self.write([(100.5, ('127.0.0.1', 5001), 6001, update), (100.5, ('127.0.0.1', 5002), 6002, b'')])
+        self.write([(101.0, ('10.0.0.3', 5003), 6001, update)])  # Appended, no second header
+
+        router_id, records = self.read()
+        self.assertEqual(router_id, 1)
+        self.assertEqual(records, [
+            (100.5, ('127.0.0.1', 5001), 6001, bytes(update)),
+            (100.5, ('127.0.0.1', 5002), 6002, b''),
+            (101.0, ('10.0.0.3', 5003), 6001, bytes(update)),
+        ])
+        self.assertEqual([len(batch) for batch in capture.batches(records)], [2, 1])
+
+    def test_cut_short_capture_is_rejected(self):
+        self.write([(1.0, ('127.0.0.1', 5001), 6001, codec.encode_response(2, [(4, 2, 1)]))])
+        with open(self.path, 'rb') as file:
+            data = file.read()[:-1]
+        with self.assertRaises(ValueError):
+            list(capture.iter_records(data))
+        with self.assertRaises(ValueError):
+            capture.read_header(b'RIPS' + data[4:])
+
+    def test_replay_skips_cut_short_last_record(self):
+        update = codec.encode_response(2, [(4, 2, 1)])
+        self.write([(1.0, ('127.0.0.1', 5001), 6001, update), (2.0, ('127.0.0.1', 5001), 6001, update)])
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        with open(self.path, 'wb') as file:
+            file.write(data[:-1])  # As left by kill -9 in the middle of a write
+
+        result = capture.replay_file(self.path)
+        self.assertEqual(result['packets'], 1)
+        self.assertEqual(result['truncated_bytes'], capture.RECORD_SIZE + len(update) - 1)
+
+    def test_replay_into_router(self):
+        neighbor = Router(2, [], ["6001-1-1"], transmit=lambda *packet: None)
+        neighbor.calculate_routes_batch([(3, dest_id, 3, 1) for dest_id in range(10, 70)])
+        records = []
+        for received_at in (1000.0, 1005.0, 1010.0):  # Three periodic updates of 3 segments each
+            records += [(received_at, ('127.0.0.1', 5001), 6001, segment) for segment in neighbor.construct_packets(1)]
+        self.write(records)
+
+        config = {'router-id': 1, 'input-ports': [6001], 'output-ports': ['5001-1-2']}
+        result = capture.replay_file(self.path, config)
+        self.assertEqual(result['packets'], 9)
+        self.assertEqual(result['batches'], 3)
+        self.assertEqual(result['update_cache_hits'], 6)  # The repeated updates only restart timers
+        self.assertEqual(result['routing_table_size'], 61)  # Router 2 and 10 .. 69 through it
+        self.assertGreater(result['decode_packets_per_second'], 0)
+
+    def test_paced_replay_keeps_recorded_gaps(self):
+        update = codec.encode_response(2, [(4, 2, 1)])
+        self.write([(50.0, ('127.0.0.1', 5001), 6001, update), (50.2, ('127.0.0.1', 5001), 6001, update)])
+        result = capture.replay_file(self.path, paced=True, speed=2)
+        self.assertGreaterEqual(result['seconds'], 0.1)
+
+
+class TestCaptureInRoutingLoop(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'router-1.cap')
+        self.router = Router(1, [46111], ["5001-1-2"])
+        self.sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sender.bind(('127.0.0.1', 0))
+
+    def tearDown(self):
+        self.router.close()
+        self.sender.close()
+        self.directory.cleanup()
+
+    def test_receive_batch_records_datagrams(self):
+        update = codec.encode_response(2, [(4, 2, 1)])
+        self.sender.sendto(update, ('127.0.0.1', 46111))
+        sock = self.router.sockets[0]
+        sock.setblocking(False)
+        select.select([sock], [], [], 1)
+        time.sleep(0.05)
+
+        writer = capture.CaptureWriter(self.path, self.router.id)
+        datagrams, routes = RIP.receive_batch(self.router, [sock], bytearray(RIP.RECEIVE_BUFFER_SIZE), writer)
+        writer.close()
+        self.assertEqual(routes, [(2, 4, 2, 1)])
+
+        with open(self.path, 'rb') as file:
+            (received_at, address, port, packet), = capture.iter_records(file.read())
+        self.assertEqual(address, self.sender.getsockname())
+        self.assertEqual(port, 46111)
+        self.assertEqual(bytes(packet), bytes(update))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import RIP_codec as codec
+from RIP_daemon import Router
+
+
+class TestCodec(unittest.TestCase):
+    def test_round_trip(self):
+        entries = [(4, 2, 3), (5, 3, 16)]
+        packet = codec.encode_response(7, entries)
+
+        self.assertEqual(len(packet), codec.HEADER_SIZE + 2 * codec.ENTRY_SIZE)
+        self.assertEqual(codec.decode_header(packet), (2, 2, 7))
+        decoded = [(dest, next_hop, cost) for _, _, dest, _, next_hop, cost in codec.iter_entries(packet)]
+        self.assertEqual(decoded, entries)
+
+    def test_matches_original_layout(self):
+        # Entry bytes must match the hand built layout used before the codec existed
+        packet = codec.encode_response(1, [(4, 2, 3)])
+        expected = bytes([2, 2, 0, 1]) + (2).to_bytes(2, 'big') + bytes(2) \
+            + (4).to_bytes(4, 'big') + bytes(4) + (2).to_bytes(4, 'big') + (3).to_bytes(4, 'big')
+        self.assertEqual(bytes(packet), expected)
+
+    def test_truncated_packet_rejected(self):
+        packet = codec.encode_response(1, [(4, 2, 3)])
+        with self.assertRaises(ValueError):
+            codec.iter_entries(packet[:-1])
+        with self.assertRaises(ValueError):
+            codec.decode_header(packet[:2])
+
+    def test_segments_hold_at_most_25_entries(self):
+        entries = [(dest_id, 2, 1) for dest_id in range(1, 61)]
+        segments = codec.encode_segments(7, entries)
+
+        self.assertEqual([len(segment) for segment in segments],
+                         [codec.MAX_PACKET_SIZE, codec.MAX_PACKET_SIZE, codec.HEADER_SIZE + 10 * codec.ENTRY_SIZE])
+        decoded = []
+        for segment in segments:
+            self.assertEqual(codec.decode_header(segment), (2, 2, 7))
+            decoded.extend((dest, next_hop, cost) for _, _, dest, _, next_hop, cost in codec.iter_entries(segment))
+        self.assertEqual(decoded, entries)
+
+    def test_no_entries_still_sends_header(self):
+        segment, = codec.encode_segments(7, [])
+        self.assertEqual(bytes(segment), bytes(codec.encode_response(7, [])))
+
+    def test_router_decodes_constructed_packet(self):
+        sender = Router(2, [], ["5000-1-1", "5003-1-4"])
+        receiver = Router(1, [], ["5001-1-2"])
+
+        receiver.decode_packet(sender.construct_packet(1))
+
+        self.assertIn(4, receiver.routing_table)
+        self.assertEqual(receiver.routing_table[4][0], 2)  # Cost = 1 (to Router 2) + 1
+
+
+class TestSegmentation(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.router = Router(1, [], ["5001-1-2", "5002-1-3"],
+                             transmit=lambda sender_id, port, packet: self.sent.append((port, bytes(packet))))
+        self.router.calculate_routes_batch([(2, dest_id, 2, 1) for dest_id in range(4, 104)])
+
+    def test_update_is_sent_as_burst_of_segments(self):
+        self.router.send_packets()
+
+        to_router_3 = [packet for port, packet in self.sent if port == 5002]
+        segments = [[dest_id for _, _, dest_id, _, _, _ in codec.iter_entries(packet)] for packet in to_router_3]
+        self.assertEqual(len(self.router.routing_table), 102)  # Neighbors 2 and 3, and destinations 4 - 103
+        self.assertEqual([len(segment) for segment in segments], [25, 25, 25, 25, 2])
+        self.assertTrue(all(len(packet) <= codec.MAX_PACKET_SIZE for packet in to_router_3))
+        self.assertEqual(sum(segments, []), list(range(2, 104)))
+
+    def test_receiver_learns_every_segment(self):
+        receiver = Router(3, [], ["5003-1-1"], transmit=lambda *packet: None)
+        routes = []
+        for segment in self.router.construct_packets(3):
+            routes.extend(receiver.parse_packet(segment))
+        receiver.calculate_routes_batch(routes)
+
+        self.assertEqual(len(receiver.routing_table), 102)
+        self.assertEqual(receiver.routing_table[103], (3, (1, 5003), True))
+
+
+if __name__ == "__main__":
+    unittest.main()
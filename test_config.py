@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+import RIP_daemon as RIP
+from RIP_daemon import Router
+
+
+class TestConfigOptions(unittest.TestCase):
+    def write_config(self, extra_lines):
+        path = os.path.join(self.directory.name, 'config.txt')
+        with open(path, 'w') as file:
+            file.write('router-id 1\ninput-ports 5000\noutput-ports 5001-1-2\n' + extra_lines)
+        return path
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_optional_settings(self):
+        config = RIP.read_config_file(self.write_config(
+            'triggered-update-window 0.2\ntriggered-update-suppression 2-4\nperiodic-update-jitter 0.5\n'))
+
+        self.assertEqual(RIP.router_options(config), {
+            'triggered_update_window': 0.2,
+            'triggered_update_suppression': (2.0, 4.0),
+            'periodic_update_jitter': 0.5,
+        })
+
+    def test_table_display_option(self):
+        config = RIP.read_config_file(self.write_config('table-display diff\n'))
+        self.assertEqual(RIP.router_options(config), {'table_display': 'diff'})
+        with self.assertRaises(ValueError):
+            RIP.read_config_file(self.write_config('table-display partial\n'))
+
+    def test_timer_profile(self):
+        config = RIP.read_config_file(self.write_config('timer-profile fast\nroute-timeout 2.5\n'))
+        options = RIP.router_options(config)
+        self.assertEqual(options, dict(RIP.TIMER_PROFILES['fast'], route_timeout=2.5))
+
+        router = Router(1, [], ['5001-1-2'], transmit=lambda *packet: None, **options)
+        self.assertEqual(router.route_timers.interval, 2.5)
+        self.assertLessEqual(router.next_timeout(), 0.6)  # First periodic update
+        with self.assertRaises(ValueError):
+            RIP.read_config_file(self.write_config('timer-profile slow\n'))
+        with self.assertRaises(Exception):
+            Router(1, [], ['5001-1-2'], transmit=lambda *packet: None,
+                   **dict(RIP.TIMER_PROFILES['fast'], route_timeout=0.4))  # Shorter than the update interval
+
+    def test_garbage_collection_interval_is_checked(self):
+        for interval, message in ((0, 'greater than 0'), (-1, 'greater than 0'), (0.5, 'longer than the periodic')):
+            with self.assertRaisesRegex(Exception, message):
+                Router(1, [], ['5001-1-2'], transmit=lambda *packet: None,
+                       **dict(RIP.TIMER_PROFILES['fast'], garbage_collection_interval=interval))
+
+    def test_invalid_settings(self):
+        with self.assertRaises(Exception):
+            RIP.read_config_file(self.write_config('unknown-option 1\n'))
+        with self.assertRaises(ValueError):
+            RIP.read_config_file(self.write_config('triggered-update-suppression 5-1\n'))
+
+
+if __name__ == "__main__":
+    unittest.main()
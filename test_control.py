@@ -0,0 +1,74 @@
+import json
+import select
+import socket
+import unittest
+import RIP_control as control
+from RIP_daemon import Router
+
+
+def request(routers, **fields):
+    return json.loads(control.handle_request(routers, json.dumps(fields)))
+
+
+class TestRequests(unittest.TestCase):
+    def setUp(self):
+        self.router = Router(1, [], ["5001-1-2", "5002-1-3"], transmit=lambda *packet: None)
+        self.router.calculate_routes_batch([(2, dest_id, 2, 1) for dest_id in range(4, 10)])
+        self.routers = {1: self.router}
+
+    def test_dump(self):
+        reply = request(self.routers, command='dump')
+        self.assertEqual(reply['router'], 1)
+        self.assertFalse(reply['more'])
+        self.assertEqual(reply['routes'][0], [2, 1, 2, True])
+        self.assertEqual([route[0] for route in reply['routes']], [2, 3, 4, 5, 6, 7, 8, 9])
+
+    def test_dump_pages(self):
+        page = control.dump_table(self.router, after=3, limit=2)
+        self.assertEqual([route[0] for route in page['routes']], [4, 5])
+        self.assertTrue(page['more'])
+
+    def test_route_lookup(self):
+        self.assertEqual(request(self.routers, command='route', destination=4)['route'], [4, 2, 2, True])
+        self.assertIsNone(request(self.routers, command='route', destination=40)['route'])
+
+    def test_counters(self):
+        reply = request(self.routers, command='counters')
+        self.assertEqual(reply['routes'], 8)
+        self.assertIn('packet_cache_hits', reply)
+
+    def test_errors(self):
+        self.assertIn('error', request(self.routers, command='reboot'))
+        self.assertIn('error', request(self.routers, command='counters', router=7))
+        self.assertIn('error', request({1: self.router, 2: self.router}, command='counters'))
+        self.assertIn('error', json.loads(control.handle_request(self.routers, b'not json')))
+
+    def test_malformed_requests_are_errors(self):
+        for data in (b'{"command":"route","destination":1e400}', b'{"command":"route","destination":"4"}',
+                     b'{"command":"route","destination":-1}', b'{"command":"dump","after":99999999999999999999}',
+                     b'{"command":"route"}', b'[' * 4000):
+            self.assertIn('error', json.loads(control.handle_request(self.routers, data)))
+
+
+class TestControlSocket(unittest.TestCase):
+    def setUp(self):
+        self.router = Router(1, [], ["5001-1-2"], transmit=lambda *packet: None)
+        self.control = control.ControlSocket({1: self.router}, 46201)
+        self.client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.client.settimeout(1)
+
+    def tearDown(self):
+        self.control.close()
+        self.client.close()
+
+    def test_answers_requests(self):
+        self.client.sendto(b'{"command": "route", "destination": 2}', (control.CONTROL_HOST, 46201))
+        select.select([self.control.sock], [], [], 1)
+        self.control.serve()
+
+        reply = json.loads(self.client.recv(65535))
+        self.assertEqual(reply['route'], [2, 1, 2, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
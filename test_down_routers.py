@@ -17,7 +17,7 @@ class TestRouterDownAndRecovery(unittest.TestCase):
             (self.router2_id, 4, 5001, 1),  # Route to destination 4 via Router 2
             (self.router3_id, 5, 5002, 1),  # Route to destination 5 via Router 3
         ]
-        self.router.calculate_routes(initial_routes)
+        self.router.calculate_routes_batch(initial_routes)
 
         # Assert the routes are added
         self.assertIn(4, self.router.routing_table)
@@ -36,7 +36,7 @@ class TestRouterDownAndRecovery(unittest.TestCase):
         recovery_routes = [
             (self.router2_id, 4, 5001, 1),  # Route to destination 4 via Router 2
         ]
-        self.router.calculate_routes(recovery_routes)
+        self.router.calculate_routes_batch(recovery_routes)
 
         # Assert the route to destination 4 is valid again
         self.assertIn(4, self.router.routing_table)
@@ -58,7 +58,7 @@ class TestRouterDownAndRecovery(unittest.TestCase):
 
     def test_garbage_collection(self):
         # Simulate a route to Router 4 via Router 2
-        self.router.calculate_routes([(self.router2_id, 4, 1, 1)])  # Add cost as the fourth element
+        self.router.calculate_routes_batch([(self.router2_id, 4, 1, 1)])  # Add cost as the fourth element
 
         # Mark the route as invalid
         self.router.routing_table[4] = (1, (self.router2_id, 5001), False)
@@ -0,0 +1,66 @@
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+from RIP_async import AsyncRouter
+from RIP_host import RouterHost, config_files
+
+CONFIGS = {
+    'config_1.txt': "router-id 1\ninput-ports 46011\noutput-ports 46012-1-2\n",
+    'config_2.txt': "router-id 2\ninput-ports 46012 46013\noutput-ports 46011-1-1 46014-3-3\n",
+    'config_3.txt': "router-id 3\ninput-ports 46014\noutput-ports 46013-3-2\n",
+}
+
+
+class TestRouterHost(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        for name, contents in CONFIGS.items():
+            with open(os.path.join(self.directory.name, name), 'w') as file:
+                file.write(contents)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_config_files(self):
+        self.assertEqual([os.path.basename(name) for name in config_files(self.directory.name)], sorted(CONFIGS))
+
+    def test_hosts_all_routers_in_one_loop(self):
+        host = RouterHost()
+
+        async def run():
+            await host.start_directory(self.directory.name)
+            await asyncio.sleep(0.2)
+            routing_table = dict(host.routers[1].router.routing_table)
+
+            # A stopped router can be started again from its config
+            host.stop_router(3)
+            self.assertNotIn(3, host.routers)
+            await host.start_router(host.configs[3])
+            host.close()
+            return routing_table
+
+        routing_table = asyncio.run(run())
+
+        self.assertEqual(routing_table[3][0], 4)     # Cost = 1 (to Router 2) + 3
+        self.assertEqual(routing_table[3][1][0], 2)  # Next hop is Router 2
+        self.assertEqual(host.routers, {})
+
+    def test_router_that_fails_to_start_is_not_registered(self):
+        host = RouterHost()
+        config = {'router-id': 1, 'input-ports': [46021], 'output-ports': ['46022-1-2']}
+
+        async def run():
+            with mock.patch.object(AsyncRouter, 'start', side_effect=OSError('no route')):
+                with self.assertRaises(OSError):
+                    await host.start_router(config)
+            self.assertEqual(host.routers, {})
+            await host.start_router(config)  # The id and its port are free again
+            host.close()
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
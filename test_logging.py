@@ -0,0 +1,120 @@
+import os
+import json
+import logging
+import tempfile
+import unittest
+import RIP_codec as codec
+import RIP_logging
+from RIP_daemon import Router
+
+
+def make_record(msg, *args, **extra):
+    record = logging.LogRecord(RIP_logging.LOGGER_NAME, logging.WARNING, __file__, 0, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestRateLimitFilter(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.filter = RIP_logging.RateLimitFilter(limit=2, interval=1, clock=lambda: self.now)
+
+    def test_limits_each_message_type(self):
+        passed = [self.filter.filter(make_record('Packet dropped %d', n)) for n in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(self.filter.filter(make_record('Route timed out')))  # Other types still get through
+
+    def test_reports_suppressed_count_in_next_window(self):
+        for n in range(5):
+            self.filter.filter(make_record('Packet dropped %d', n))
+        self.now = 1.5
+        record = make_record('Packet dropped %d', 6)
+        self.assertTrue(self.filter.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+    def test_event_field_sets_message_type(self):
+        self.filter.filter(make_record('%s', 'a', event='invalid_packet'))
+        self.filter.filter(make_record('%s', 'b', event='invalid_packet'))
+        self.assertFalse(self.filter.filter(make_record('%s', 'c', event='invalid_packet')))
+        self.assertTrue(self.filter.filter(make_record('%s', 'd')))
+
+
+class TestJsonLines(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'rip.log')
+        self.logger = logging.getLogger(RIP_logging.LOGGER_NAME)
+
+    def tearDown(self):
+        self.logger.handlers = []
+        self.logger.setLevel(logging.NOTSET)
+        self.logger.propagate = True
+        self.directory.cleanup()
+
+    def read_lines(self):
+        with open(self.path) as file:
+            return [json.loads(line) for line in file]
+
+    def test_router_messages_are_written_as_json(self):
+        listener = RIP_logging.configure('INFO', self.path)
+        router = Router(1, [], ["5001-1-2"], transmit=lambda *packet: None)
+        packet = bytearray(codec.encode_response(2, [(4, 2, 1)]))
+        packet[1] = 1  # Version 1
+        router.parse_packet(packet)
+        router.log.debug('Not written')
+        listener.stop()
+
+        line, = self.read_lines()
+        self.assertEqual(line['level'], 'WARNING')
+        self.assertEqual(line['router'], 1)
+        self.assertEqual(line['message'], 'Invalid packet header, version is not 2. Packet dropped')
+
+    def test_routing_table_is_one_record(self):
+        listener = RIP_logging.configure('INFO', self.path)
+        router = Router(1, [], ["5001-1-2"], transmit=lambda *packet: None)
+        router.display_routing_table()
+        listener.stop()
+
+        line, = self.read_lines()
+        self.assertEqual(line['routes'], [{'destination': 2, 'cost': 1, 'next_hop': 2, 'valid': True}])
+
+    def test_exception_is_its_own_field(self):
+        listener = RIP_logging.configure('INFO', self.path)
+        try:
+            raise ValueError('bad packet')
+        except ValueError:
+            RIP_logging.router_logger(1).exception('Packet %d failed', 3)
+        listener.stop()
+
+        line, = self.read_lines()
+        self.assertEqual(line['message'], 'Packet 3 failed')
+        self.assertIn("ValueError: bad packet", line['exception'])
+        self.assertEqual(line['router'], 1)
+
+
+class TestDiffDisplay(unittest.TestCase):
+    def setUp(self):
+        self.router = Router(1, [], ["5001-1-2", "5002-1-3"], table_display='diff', transmit=lambda *packet: None)
+        self.router.display_routing_table()
+
+    def displayed(self):
+        with self.assertLogs('rip', 'INFO') as logs:
+            self.router.display_routing_table()
+        record, = logs.records
+        return record
+
+    def test_only_changed_routes_are_displayed(self):
+        self.router.calculate_routes_batch([(2, 4, 2, 1)])
+        self.router.remove_route(3)
+
+        record = self.displayed()
+        self.assertEqual(record.routes, [{'destination': 4, 'cost': 2, 'next_hop': 2, 'valid': True}])
+        self.assertEqual(record.removed, [3])
+
+    def test_nothing_displayed_without_changes(self):
+        with self.assertNoLogs('rip', 'INFO'):
+            self.router.display_routing_table()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import json
+import tempfile
+import unittest
+import urllib.request
+import RIP_codec as codec
+import RIP_metrics as metrics
+from RIP_daemon import Router
+
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets(self):
+        histogram = metrics.Histogram('size', 'sizes', (1, 5, 10))
+        for value in (0, 1, 3, 10, 11):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [2, 1, 1, 1])
+        self.assertEqual(list(histogram.cumulative_counts()), [2, 3, 4, 5])
+        self.assertEqual(histogram.sum, 25)
+
+
+class TestRouterMetrics(unittest.TestCase):
+    def setUp(self):
+        self.router = Router(1, [], ["5001-1-2", "5002-1-3"], transmit=lambda *packet: None)
+
+    def test_router_counts_packets_and_routes(self):
+        self.router.calculate_routes_batch(self.router.receive_packet(codec.encode_response(2, [(4, 2, 1), (5, 2, 1)])))
+        self.router.calculate_routes_batch(self.router.receive_packet(codec.encode_response(2, [(4, 2, 16)])))
+        self.router.receive_packet(codec.encode_response(2, [(4, 2, 1)])[:-1])  # Truncated
+        self.router.send_packets()
+
+        stats = self.router.stats
+        self.assertEqual(stats['routes_added'], 2)
+        self.assertEqual(stats['routes_withdrawn'], 1)
+        self.assertEqual(stats['packets_dropped'], 1)
+        self.assertEqual(stats['packets_sent'], 2)
+        self.assertEqual(self.router.decode_seconds.count, 3)
+        self.assertEqual(self.router.calculate_seconds.count, 2)
+
+    def test_decode_packet_counts_routes(self):
+        self.router.decode_packet(codec.encode_response(2, [(4, 2, 1), (5, 2, 1)]))
+        self.router.calculate_routes([(2, 5, 2, 16)])
+
+        stats = self.router.stats
+        self.assertEqual(stats['routes_added'], 2)  # 4 and 5, the neighbors are in the table from the start
+        self.assertEqual(stats['routes_withdrawn'], 1)
+        self.assertEqual(len(self.router.routing_table), 2 + stats['routes_added'])
+
+    def test_prometheus_text(self):
+        self.router.receive_batch_size.observe(3)
+        text = metrics.render([self.router.metrics])
+
+        self.assertIn('# TYPE rip_packets_sent_total counter\n', text)
+        self.assertIn('rip_packets_sent_total{router="1"} 0\n', text)
+        self.assertIn('# TYPE rip_largest_receive_batch gauge\n', text)
+        self.assertIn('rip_receive_batch_size_bucket{router="1",le="4"} 1\n', text)
+        self.assertIn('rip_receive_batch_size_bucket{router="1",le="+Inf"} 1\n', text)
+        self.assertIn('rip_receive_batch_size_count{router="1"} 1\n', text)
+
+    def test_routers_share_metric_families(self):
+        other = Router(2, [], ["5003-1-1"], transmit=lambda *packet: None)
+        text = metrics.render([self.router.metrics, other.metrics])
+        self.assertEqual(text.count('# TYPE rip_packets_sent_total counter'), 1)
+        self.assertIn('rip_packets_sent_total{router="2"} 0\n', text)
+
+
+class TestExporters(unittest.TestCase):
+    def setUp(self):
+        self.router = Router(1, [], ["5001-1-2"], transmit=lambda *packet: None)
+        self.registries = lambda: [self.router.metrics]
+
+    def test_http_endpoint(self):
+        server = metrics.MetricsServer(self.registries, 0)
+        try:
+            with urllib.request.urlopen(f'http://{metrics.METRICS_HOST}:{server.port}/metrics', timeout=2) as response:
+                body = response.read().decode()
+        finally:
+            server.close()
+        self.assertIn('rip_routes_added_total{router="1"} 0', body)
+
+    def test_snapshot_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics.json')
+            writer = metrics.SnapshotWriter(self.registries, path, interval=60)
+            self.router.send_packets()
+            writer.close()  # Writes a final snapshot
+
+            with open(path) as file:
+                snapshot = json.load(file)
+        router, = snapshot['routers']
+        self.assertEqual(router['labels'], {'router': 1})
+        self.assertEqual(router['stats']['packets_sent'], 1)
+        self.assertIn('decode_seconds', router['histograms'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -55,13 +55,13 @@ class TestLargeNetwork(unittest.TestCase):
     def test_mesh_topology(self):
         self.routers = self.create_mesh_network()
         routes = [(i, j, 1) for i in range(1, 11) for j in range(1, 11) if i != j]
-        self.router.calculate_routes(routes)
+        self.router.calculate_routes_batch(routes)
         print(f"Final routing table (Mesh): {self.router.routing_table}")
 
     def test_star_topology(self):
         self.routers = self.create_star_network()
         routes = [(1, i, 1) for i in range(2, 11)] + [(i, 1, 1) for i in range(2, 11)]
-        self.router.calculate_routes(routes)
+        self.router.calculate_routes_batch(routes)
         print(f"Final routing table (Star): {self.router.routing_table}")
 
     def test_tree_topology(self):
@@ -71,7 +71,7 @@ class TestLargeNetwork(unittest.TestCase):
             (2, 4, 1), (2, 5, 1),
             (3, 6, 1), (3, 7, 1)
         ]
-        self.router.calculate_routes(routes)
+        self.router.calculate_routes_batch(routes)
         print(f"Final routing table (Tree): {self.router.routing_table}")
 
     def test_variable_costs(self):
@@ -81,7 +81,7 @@ class TestLargeNetwork(unittest.TestCase):
             (2, 3, 1), (2, 4, 2),
             (3, 4, 1)
         ]
-        self.router.calculate_routes(routes)
+        self.router.calculate_routes_batch(routes)
         print(f"Final routing table (Variable Costs): {self.router.routing_table}")
 
     def test_cyclic_topology(self):
@@ -91,7 +91,7 @@ class TestLargeNetwork(unittest.TestCase):
             (2, 3, 1), (2, 4, 1),
             (3, 4, 1), (3, 1, 1)
         ]
-        self.router.calculate_routes(routes)
+        self.router.calculate_routes_batch(routes)
         print(f"Final routing table (Cyclic): {self.router.routing_table}")
 
     def test_link_failure(self):
@@ -99,13 +99,13 @@ class TestLargeNetwork(unittest.TestCase):
         routes = [
             (1, 2, 1), (2, 3, 1), (3, 4, 1),  # Initial routes
         ]
-        self.router.calculate_routes(routes)
+        self.router.calculate_routes_batch(routes)
 
         # Simulate a link failure between Router 2 and Router 3
         routes = [
             (1, 2, 1), (3, 4, 1),  # Remove the route (2, 3)
         ]
-        self.router.calculate_routes(routes)
+        self.router.calculate_routes_batch(routes)
 
         # Assert that Router 3 is now unreachable
         self.assertEqual(self.router.routing_table.get(3), (16, None, False))
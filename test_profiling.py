@@ -0,0 +1,67 @@
+import os
+import json
+import types
+import tempfile
+import unittest
+import RIP_codec as codec
+import RIP_profiling as profiling
+from RIP_daemon import Router
+
+
+class TestPhaseProfiler(unittest.TestCase):
+    def setUp(self):
+        self.router = Router(1, [], ["5001-1-2", "5002-1-3"], transmit=lambda *packet: None)
+        self.profiler = profiling.PhaseProfiler('test')
+        self.profiler.hook(self.router, profiling.ROUTER_PHASES)
+
+    def test_off_leaves_router_untouched(self):
+        self.router.send_packets()
+        self.assertNotIn('send_packets', vars(self.router))
+        self.assertEqual(self.profiler.calls['send'], 0)
+
+    def test_records_phases_while_on(self):
+        self.profiler.start()
+        self.router.calculate_routes_batch(self.router.receive_packet(codec.encode_response(2, [(4, 2, 1)])))
+        self.router.update_timers()
+        self.router.send_packets()
+        self.profiler.stop()
+        self.router.send_packets()  # Not counted any more
+
+        phases = self.profiler.results()['phases']
+        for phase in ('decode', 'calculate', 'timers', 'send'):
+            self.assertEqual(phases[phase]['calls'], 1)
+        self.assertIn(4, self.router.routing_table)
+        self.assertNotIn('send_packets', vars(self.router))  # Originals are back
+
+    def test_module_functions_are_restored(self):
+        module = types.SimpleNamespace(wait_readable=lambda sockets, timeout: [])
+        original = module.wait_readable
+        self.profiler.hook(module, {'wait_readable': 'select'})
+        self.profiler.toggle()
+        module.wait_readable([], 0)
+        self.profiler.toggle()
+
+        self.assertIs(module.wait_readable, original)
+        self.assertEqual(self.profiler.calls['select'], 1)
+
+    def test_dump_with_bounded_cprofile_window(self):
+        now = [0.0]
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = profiling.PhaseProfiler('test', directory, window=5, use_cprofile=True, clock=lambda: now[0])
+            profiler.hook(self.router, profiling.ROUTER_PHASES)
+            profiler.start()
+            self.router.send_packets()
+            now[0] = 6.0
+            self.router.send_packets()  # Ends the window
+            self.assertIsNone(profiler.window_end)
+
+            json_path, pstats_path = profiler.dump()
+            with open(json_path) as file:
+                results = json.load(file)
+            self.assertTrue(os.path.exists(pstats_path))
+            profiler.stop()
+        self.assertEqual(results['phases']['send']['calls'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
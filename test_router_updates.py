@@ -0,0 +1,258 @@
+import select
+import socket
+import unittest
+import time
+import RIP_codec as codec
+import RIP_daemon as RIP
+from RIP_daemon import Router
+
+
+def make_router(output_ports=("5001-1-2", "5002-1-3"), **options):
+    """router 1 with neighbors and no sockets, returns it and the (port, packet) list it sends"""
+    sent = []
+    router = Router(1, [], list(output_ports),
+                    transmit=lambda sender_id, port, packet: sent.append((port, bytes(packet))), **options)
+    return router, sent
+
+
+class TestPacketCache(unittest.TestCase):
+    def setUp(self):
+        self.router, self.sent = make_router()
+
+    def test_stable_table_resends_cached_packets(self):
+        self.router.send_packets()
+        self.router.send_packets()
+
+        self.assertEqual(self.router.stats['packet_cache_misses'], 2)  # One per neighbor
+        self.assertEqual(self.router.stats['packet_cache_hits'], 2)
+        self.assertEqual(self.sent[:2], self.sent[2:])
+
+    def test_cache_is_per_neighbor(self):
+        # Split horizon with poison reverse gives each neighbor a different view
+        self.router.send_packets()
+        self.assertNotEqual(self.router.packet_cache[2], self.router.packet_cache[3])
+
+    def test_route_change_invalidates_cache(self):
+        self.router.send_packets()
+        self.router.calculate_routes_batch([(2, 4, 2, 1)])
+
+        self.router.send_packets()
+        self.assertEqual(self.router.stats['packet_cache_misses'], 4)
+        self.assertEqual(self.router.stats['packet_cache_hits'], 0)
+
+    def test_unchanged_routes_keep_cache(self):
+        self.router.calculate_routes_batch([(2, 4, 2, 1)])
+        self.router.send_packets()
+        self.router.calculate_routes_batch([(2, 4, 2, 1)])  # Same advertisement, only refreshes timers
+        self.assertEqual(len(self.router.packet_cache), 2)
+
+
+def destinations(packet):
+    """returns {dest_id: cost} carried by a packet"""
+    return {dest_id: cost for _, _, dest_id, _, _, cost in codec.iter_entries(packet)}
+
+
+class TestTriggeredUpdates(unittest.TestCase):
+    def setUp(self):
+        self.router, self.sent = make_router(triggered_update_window=0)
+        self.router.calculate_routes_batch([(2, 4, 2, 1), (3, 5, 3, 1)])
+        self.router.send_packets()  # Periodic update clears the change set
+        del self.sent[:]
+
+    def test_triggered_update_only_carries_changed_routes(self):
+        self.router.route_timers[4] = time.time() - RIP.ROUTE_TIMEOUT - 1  # Simulate timeout
+        self.router.update_timers()
+
+        self.assertEqual(len(self.sent), 2)
+        for _, packet in self.sent:
+            self.assertEqual(destinations(packet), {4: 16})
+        self.assertEqual(self.router.changed_routes, set())
+
+    def test_periodic_update_carries_full_table(self):
+        self.router.calculate_routes_batch([(3, 6, 3, 1)])
+        self.assertEqual(self.router.changed_routes, {6})
+
+        self.router.send_packets()
+        self.assertEqual(set(destinations(self.sent[0][1])), {2, 3, 4, 5, 6})
+        self.assertEqual(self.router.changed_routes, set())
+
+    def test_no_triggered_update_without_changes(self):
+        self.router.send_packets(triggered=True)
+        self.assertEqual(self.sent, [])
+
+
+class TestTriggeredUpdateCoalescing(unittest.TestCase):
+    def setUp(self):
+        self.router, self.sent = make_router(triggered_update_window=0.5)
+        self.router.calculate_routes_batch([(2, 4, 2, 1), (3, 5, 3, 1)])
+        self.router.send_packets()
+        del self.sent[:]
+
+    def time_out(self, dest_id):
+        self.router.route_timers[dest_id] = time.time() - RIP.ROUTE_TIMEOUT - 1
+        self.router.update_timers()
+
+    def test_changes_inside_window_are_merged(self):
+        self.time_out(4)
+        self.time_out(5)
+        self.assertEqual(self.sent, [])  # Still inside the coalescing window
+        self.assertEqual(self.router.stats['triggered_updates_merged'], 1)
+
+        self.router.update_timers()  # Nothing due yet
+        self.router.scheduler.schedule('triggered', None, time.time())
+        self.router.update_timers()
+        self.assertEqual(len(self.sent), 2)  # One packet per neighbor
+        self.assertEqual(destinations(self.sent[0][1]), {4: 16, 5: 16})
+        self.assertEqual(self.router.stats['triggered_updates_sent'], 1)
+
+    def test_updates_are_suppressed_after_a_triggered_update(self):
+        self.router.triggered_update_hold = time.time() + 3
+        self.time_out(4)
+
+        self.assertEqual(self.router.stats['triggered_updates_suppressed'], 1)
+        self.assertGreaterEqual(self.router.scheduler.pending[('triggered', None)], self.router.triggered_update_hold)
+
+    def test_periodic_update_absorbs_pending_triggered_update(self):
+        self.time_out(4)
+        self.router.scheduler.schedule('periodic', None, time.time())
+        self.router.update_timers()
+
+        self.assertNotIn(('triggered', None), self.router.scheduler.pending)
+        self.assertEqual(self.router.stats['triggered_updates_merged'], 1)
+        self.assertEqual(set(destinations(self.sent[0][1])), {2, 3, 4, 5})
+
+    def test_periodic_jitter(self):
+        intervals = {self.router.periodic_interval() for _ in range(20)}
+        self.assertGreater(len(intervals), 1)
+        for interval in intervals:
+            self.assertLessEqual(abs(interval - RIP.PERIODIC_UPDATE_INTERVAL), RIP.PERIODIC_UPDATE_JITTER)
+
+
+class TestNeighborIndexes(unittest.TestCase):
+    def setUp(self):
+        self.router, _ = make_router(["5001-2-2", "5002-1-3"], triggered_update_window=0)
+        self.router.calculate_routes_batch([(2, 4, 2, 1), (2, 5, 2, 1), (3, 6, 3, 1)])
+
+    def test_neighbor_ports(self):
+        self.assertEqual(self.router.find_output_port(3), 5002)
+        self.assertIsNone(self.router.find_output_port(9))
+
+    def test_next_hop_index_follows_table(self):
+        self.assertEqual(self.router.routing_table.routes_via(2), {2, 4, 5})
+        self.assertEqual(self.router.routing_table.routes_via(3), {3, 6})
+
+        self.router.calculate_routes_batch([(3, 4, 3, 1)])  # Cheaper route to 4 through router 3
+        self.assertEqual(self.router.routing_table[4][1][0], 3)
+        self.assertEqual(self.router.routing_table.routes_via(2), {2, 5})
+        self.assertEqual(self.router.routing_table.routes_via(3), {3, 4, 6})
+
+        self.router.remove_route(6)
+        self.assertEqual(self.router.routing_table.routes_via(3), {3, 4})
+
+    def test_neighbor_timeout_invalidates_dependent_routes(self):
+        # Only the neighbor's timer has run out, the routes through it are dropped with it
+        self.router.route_timers[2] = time.time() - RIP.ROUTE_TIMEOUT - 1
+        self.router.update_timers()
+
+        for dest_id in (2, 4, 5):
+            self.assertFalse(self.router.routing_table[dest_id][2])
+            self.assertIn(dest_id, self.router.garbage_timers)
+        self.assertTrue(self.router.routing_table[6][2])
+        self.assertEqual(self.router.stats['triggered_updates_sent'], 1)
+
+
+class TestBatchReceive(unittest.TestCase):
+    def setUp(self):
+        self.router = Router(1, [46101], ["5001-1-2", "5002-1-3"])
+        self.sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def tearDown(self):
+        self.router.close()
+        self.sender.close()
+
+    def test_drains_all_pending_datagrams(self):
+        for dest_id in (4, 5, 6):
+            self.sender.sendto(codec.encode_response(2, [(dest_id, 2, 1)]), ('localhost', 46101))
+        sock = self.router.sockets[0]
+        sock.setblocking(False)
+        select.select([sock], [], [], 1)
+        time.sleep(0.05)  # Let every datagram arrive
+
+        datagrams, routes = RIP.receive_batch(self.router, [sock], bytearray(RIP.RECEIVE_BUFFER_SIZE))
+        self.assertEqual(datagrams, 3)
+        self.assertEqual(routes, [(2, 4, 2, 1), (2, 5, 2, 1), (2, 6, 2, 1)])
+
+        self.router.record_receive_batch(datagrams)
+        self.assertEqual(self.router.stats['largest_receive_batch'], 3)
+        self.assertEqual(self.router.stats['datagrams_received'], 3)
+
+    def test_parse_packet_drops_invalid_packets(self):
+        packet = bytearray(codec.encode_response(2, [(4, 2, 1)]))
+        packet[1] = 1  # Version 1
+        self.assertEqual(self.router.parse_packet(packet), [])
+
+
+class TestDuplicateUpdates(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.router, _ = make_router(["5001-2-2", "5002-1-3"], clock=lambda: self.now)
+        self.update = codec.encode_response(2, [(4, 2, 1), (5, 2, 4)])
+        self.receive(self.update, codec.encode_response(3, [(5, 3, 1)]))
+        self.now = 10
+
+    def receive(self, *packets):
+        """receives packets as one batch, returns the routes calculated"""
+        routes = []
+        for packet in packets:
+            routes += self.router.receive_packet(memoryview(packet))
+        self.router.calculate_routes_batch(routes)
+        return routes
+
+    def test_repeated_update_only_restarts_timers(self):
+        version = self.router.routing_table.version
+        self.assertEqual(self.receive(bytearray(self.update)), [])
+
+        self.assertEqual(self.router.stats['update_cache_hits'], 1)
+        self.assertEqual(self.router.routing_table.version, version)
+        self.assertEqual(self.router.route_timers[2], 10)
+        self.assertEqual(self.router.route_timers[4], 10)
+        self.assertEqual(self.router.route_timers[5], 0)  # Routed through router 3, not confirmed by router 2
+
+    def test_changed_update_is_calculated(self):
+        routes = self.receive(codec.encode_response(2, [(4, 2, 3), (5, 2, 4)]))
+
+        self.assertEqual(len(routes), 2)
+        self.assertEqual(self.router.stats['update_cache_hits'], 0)
+        self.assertEqual(self.router.routing_table[4], (5, (2, 5001), True))
+
+    def test_unrelated_change_keeps_cache(self):
+        self.receive(codec.encode_response(3, [(6, 3, 1)]))
+        self.assertEqual(self.receive(self.update), [])
+        self.assertEqual(self.router.stats['update_cache_hits'], 1)
+
+    def test_change_to_a_carried_route_evicts_it(self):
+        self.receive(codec.encode_response(3, [(5, 3, 1), (4, 3, 1)]))  # 4 is now cheaper through router 3
+        self.assertEqual(len(self.receive(self.update)), 2)
+        self.assertEqual(self.router.stats['update_cache_hits'], 0)
+        self.assertEqual(self.receive(self.update), [])  # Cached again
+
+    def test_change_to_the_sender_evicts_its_packets(self):
+        self.router.route_timers[2] = -100
+        self.router.update_timers()  # Router 2 times out
+        self.assertEqual(len(self.receive(self.update)), 2)
+        self.assertEqual(self.router.stats['update_cache_hits'], 0)
+        self.assertTrue(self.router.routing_table.is_valid(4))
+
+    def test_segments_are_cached_separately(self):
+        segments = codec.encode_segments(2, [(dest_id, 2, 1) for dest_id in range(10, 40)])
+        self.receive(*segments)
+        self.now = 20
+        self.assertEqual(self.receive(*segments), [])
+
+        self.assertEqual(self.router.stats['update_cache_hits'], 2)
+        self.assertEqual(self.router.route_timers[10], 20)
+        self.assertEqual(self.router.route_timers[39], 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import time
+import RIP_codec as codec
+import RIP_daemon as RIP
+from RIP_scheduler import DeadlineScheduler, TimerMap
+
+
+class TestDeadlineScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = DeadlineScheduler()
+
+    def test_pops_only_due_events_in_order(self):
+        self.scheduler.schedule('route', 2, 20)
+        self.scheduler.schedule('route', 1, 10)
+        self.scheduler.schedule('garbage', 3, 30)
+
+        self.assertEqual(list(self.scheduler.pop_due(25)), [('route', 1), ('route', 2)])
+        self.assertEqual(self.scheduler.next_deadline(), 30)
+
+    def test_earliest_deadline_wins(self):
+        self.scheduler.schedule('route', 1, 10)
+        self.scheduler.schedule('route', 1, 50)  # later deadline is ignored
+        self.assertEqual(self.scheduler.next_deadline(), 10)
+
+        self.scheduler.schedule('route', 1, 5)  # earlier deadline replaces it
+        self.assertEqual(list(self.scheduler.pop_due(20)), [('route', 1)])
+        self.assertIsNone(self.scheduler.next_deadline())
+
+    def test_cancel_and_schedule_later(self):
+        self.scheduler.schedule('periodic', None, 10)
+        self.scheduler.cancel('periodic', None)
+        self.scheduler.schedule('periodic', None, 40)  # cancelled first, so the later deadline is kept
+        self.assertEqual(self.scheduler.next_deadline(), 40)
+
+        self.scheduler.cancel('periodic', None)
+        self.assertEqual(list(self.scheduler.pop_due(100)), [])
+
+    def test_timer_map_refresh_is_lazy(self):
+        timers = TimerMap(self.scheduler, 'route', 30)
+        timers[1] = 0
+        timers[1] = 20  # refreshed, the queued deadline stays at 30
+
+        self.assertEqual(list(self.scheduler.pop_due(30)), [('route', 1)])
+        self.assertFalse(timers.is_expired(1, 30))  # re-queued at 50
+        self.assertEqual(self.scheduler.next_deadline(), 50)
+        self.assertTrue(timers.is_expired(1, 50))
+
+
+class TestRouterTimers(unittest.TestCase):
+    def setUp(self):
+        self.router = RIP.Router(1, [], ["5001-1-2", "5002-1-3"])
+
+    def test_route_timeout_without_scanning(self):
+        self.router.route_timers[2] = time.time() - RIP.ROUTE_TIMEOUT - 1  # Simulate timeout
+        self.router.update_timers()
+
+        self.assertFalse(self.router.routing_table[2][2])  # Route to 2 is invalid
+        self.assertTrue(self.router.routing_table[3][2])   # Route to 3 is untouched
+        self.assertIn(2, self.router.garbage_timers)
+
+    def test_garbage_collection(self):
+        self.router.routing_table[2] = (16, (2, 5001), False)
+        self.router.garbage_timers[2] = time.time() - RIP.GARBAGE_COLLECTION_INTERVAL - 1
+        self.router.update_timers()
+
+        self.assertNotIn(2, self.router.routing_table)
+        self.assertNotIn(2, self.router.route_timers)
+
+    def test_next_timeout_is_next_deadline(self):
+        self.assertLessEqual(self.router.next_timeout(), RIP.PERIODIC_UPDATE_INTERVAL + RIP.PERIODIC_UPDATE_JITTER)
+        self.router.route_timers[2] = time.time() - RIP.ROUTE_TIMEOUT + 1
+        self.assertLessEqual(self.router.next_timeout(), 1)
+
+
+class TestFastTimers(unittest.TestCase):
+    def test_timer_work_stays_bounded_at_fast_rates(self):
+        now = [0.0]
+        router = RIP.Router(1, [], ["5001-1-2"], clock=lambda: now[0], transmit=lambda *packet: None,
+                            **RIP.TIMER_PROFILES['fast'])
+        update = codec.encode_segments(2, [(dest_id, 2, 1) for dest_id in range(10, 1010)])
+        for tick in range(200):  # 100 seconds of updates from the neighbor every half second
+            now[0] = tick * 0.5
+            routes = []
+            for segment in update:
+                routes += router.receive_packet(segment)
+            router.calculate_routes_batch(routes)
+            router.update_timers()
+
+        self.assertEqual(len(router.routing_table), 1001)
+        self.assertTrue(all(router.routing_table.is_valid(dest_id) for dest_id in range(10, 1010)))
+        # Refreshes don't queue timer events, only expiries re-queue them, about once per route timeout
+        self.assertLess(len(router.scheduler.heap), 2 * 1001 + 10)
+        self.assertGreater(router.stats['update_cache_hits'], 190 * len(update))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import logging
+import unittest
+from RIP_simulator import Simulator, VirtualClock
+import RIP_daemon as RIP
+
+
+def line_config(router_id, count):
+    """config for router_id in a line of routers 1 - 2 - ... - count, with port 20000 + 100 * id + neighbor"""
+    inputs, outputs = [], []
+    for neighbor in (router_id - 1, router_id + 1):
+        if 1 <= neighbor <= count:
+            inputs.append(20000 + 100 * router_id + neighbor)
+            outputs.append(f'{20000 + 100 * neighbor + router_id}-1-{neighbor}')
+    return {'router-id': router_id, 'input-ports': inputs, 'output-ports': outputs}
+
+
+class TestSimulator(unittest.TestCase):
+    def build(self, count, seed=0):
+        simulator = Simulator(seed=seed)
+        for router_id in range(1, count + 1):
+            simulator.add_config(line_config(router_id, count))
+        return simulator
+
+    def test_routers_use_virtual_clock_and_no_sockets(self):
+        clock = VirtualClock(100)
+        router = RIP.Router(1, [5000], ["5001-1-2"], clock=clock, transmit=lambda *packet: None)
+        self.assertEqual(router.sockets, [])
+        self.assertEqual(router.route_timers[2], 100)
+
+    def test_line_converges(self):
+        simulator = self.build(5)
+        self.assertIsNotNone(simulator.run_until_converged())
+
+        tables = simulator.tables()
+        self.assertEqual(tables[1][5], (4, 2, True))
+        self.assertEqual(tables[5][1], (4, 4, True))
+
+    def test_router_failure_reconverges(self):
+        simulator = self.build(4)
+        simulator.run_until_converged()
+
+        simulator.kill_router(4)
+        self.assertIsNotNone(simulator.run_until_converged())
+        for router_id in (1, 2, 3):
+            self.assertNotIn(4, simulator.tables()[router_id])  # Timed out and garbage collected
+
+        simulator.revive_router(4)
+        simulator.run_until_converged()
+        self.assertEqual(simulator.tables()[1][4], (3, 2, True))
+
+    def test_link_failure(self):
+        simulator = self.build(3)
+        simulator.run_until_converged()
+
+        simulator.fail_link(2, 3)
+        simulator.run_until_converged()
+        self.assertNotIn(3, simulator.tables()[1])
+        self.assertNotIn(1, simulator.tables()[3])
+
+    def test_fast_timer_profile_fails_over_in_seconds(self):
+        simulator = Simulator()
+        for router_id in range(1, 5):
+            simulator.add_config(dict(line_config(router_id, 4), **{'timer-profile': 'fast'}))
+        self.assertAlmostEqual(simulator.update_round(), 0.601)  # 0.5 ± 0.1 seconds between updates, plus delivery
+        simulator.run_until_converged()
+
+        simulator.kill_router(4)
+        self.assertLess(simulator.run_until_converged(), 6)  # Default timers take over 30 seconds
+        self.assertFalse(simulator.tables()[3].get(4, (16, 4, False))[2])
+
+    def test_quiet_simulation_leaves_loggers_alone(self):
+        logger = logging.getLogger('rip.simulator')
+        logger.setLevel(logging.INFO)
+        self.addCleanup(logger.setLevel, logging.NOTSET)
+        with self.assertNoLogs('rip'):
+            self.build(3).run_until_converged()
+        self.assertEqual(logger.level, logging.INFO)
+
+    def test_same_seed_is_reproducible(self):
+        runs = []
+        for _ in range(2):
+            simulator = self.build(4, seed=7)
+            converged = simulator.run_until_converged()
+            runs.append((converged, simulator.packets_delivered, simulator.tables()))
+        self.assertEqual(runs[0], runs[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+import RIP_snapshot as snapshot
+from RIP_daemon import Router, ROUTE_TIMEOUT
+from RIP_simulator import VirtualClock
+
+
+class TestSnapshotFormat(unittest.TestCase):
+    def test_round_trip(self):
+        entries = [(4, 2, 2, 1, 1.5), (5, 16, 3, 0, 4.0)]
+        encoded = snapshot.encode_snapshot(7, 100.0, entries)
+
+        self.assertEqual(len(encoded), snapshot.HEADER_SIZE + 2 * snapshot.ENTRY_SIZE)
+        self.assertEqual(snapshot.decode_snapshot(encoded), (7, 100.0, entries))
+
+    def test_invalid_snapshots_rejected(self):
+        encoded = snapshot.encode_snapshot(7, 100.0, [(4, 2, 2, 1, 1.5)])
+        with self.assertRaises(ValueError):
+            snapshot.decode_snapshot(encoded[:-1])
+        with self.assertRaises(ValueError):
+            snapshot.decode_snapshot(b'XXXX' + encoded[4:])
+
+    def test_file_is_replaced_atomically(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'table.snap')
+            snapshot.write_snapshot(path, 7, 1.0, [(4, 2, 2, 1, 0.0)])
+            snapshot.write_snapshot(path, 7, 2.0, [(4, 3, 2, 1, 0.0), (5, 1, 5, 1, 0.0)])
+
+            self.assertEqual(os.listdir(directory), ['table.snap'])  # No temporary file left behind
+            router_id, written_at, entries = snapshot.read_snapshot(path)
+        self.assertEqual((router_id, written_at, len(entries)), (7, 2.0, 2))
+
+
+class TestWarmStart(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'router1.snap')
+        self.clock = VirtualClock(0.0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def router(self):
+        return Router(1, [], ["5001-1-2", "5002-1-3"], clock=self.clock, transmit=lambda *packet: None,
+                      snapshot_file=self.path)
+
+    def test_routes_come_back_provisional_with_aged_timers(self):
+        router = self.router()
+        router.calculate_routes_batch([(2, 4, 2, 1), (3, 5, 3, 1)])  # Learned at 0
+        self.clock.now = 5.0
+        router.calculate_routes_batch([(2, 4, 2, 1)])  # 4 refreshed at 5
+        self.clock.now = 10.0
+        router.save_snapshot()
+
+        self.clock.now = 20.0  # Down for 10 seconds
+        restarted = self.router()
+        self.assertEqual(restarted.load_snapshot(), 2)
+
+        table = restarted.routing_table
+        self.assertEqual(table[4], (2, (2, 5001), True))
+        self.assertTrue(table.is_provisional(4))
+        self.assertFalse(table.is_provisional(2))  # Neighbors come from the config
+        self.assertEqual(restarted.route_timers[4], 5.0)
+        self.assertEqual(restarted.route_timers[5], 0.0)
+
+        restarted.calculate_routes_batch([(2, 4, 2, 1)])  # Next hop confirms the route
+        self.assertFalse(table.is_provisional(4))
+        self.assertEqual(restarted.route_timers[4], 20.0)
+
+    def test_expired_routes_are_not_loaded(self):
+        router = self.router()
+        router.calculate_routes_batch([(2, 4, 2, 1)])
+        router.save_snapshot()
+
+        self.clock.now = ROUTE_TIMEOUT + 1
+        restarted = self.router()
+        self.assertEqual(restarted.load_snapshot(), 0)
+        self.assertNotIn(4, restarted.routing_table)
+
+    def test_snapshot_of_another_router_rejected(self):
+        self.router().save_snapshot()
+        other = Router(2, [], ["5003-1-1"], clock=self.clock, transmit=lambda *packet: None)
+        with self.assertRaises(ValueError):
+            other.load_snapshot(self.path)
+
+    def test_snapshots_are_scheduled(self):
+        router = self.router()
+        self.clock.now = router.snapshot_interval
+        router.update_timers()
+        self.assertTrue(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
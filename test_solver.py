@@ -0,0 +1,64 @@
+import unittest
+import RIP_topology as topology
+from RIP_simulator import Simulator
+from RIP_control import dump_table
+
+try:
+    import numpy
+    import RIP_solver as solver
+except ImportError:
+    numpy = None
+
+
+@unittest.skipUnless(numpy, "numpy is not installed")
+class TestSolver(unittest.TestCase):
+    def test_costs_are_capped_at_infinity(self):
+        solution = solver.solve(topology.ring_topology(40))
+        tables = solution.tables()
+        self.assertEqual(tables[1][16], (15, 2, True))
+        self.assertEqual(tables[1][26], (15, 40, True))
+        self.assertNotIn(21, tables[1])  # 20 hops either way
+
+    def test_next_hop_is_lowest_neighbor_on_a_cheapest_path(self):
+        graph = {1: {2: 1, 3: 1}, 2: {1: 1, 4: 1}, 3: {1: 1, 4: 1}, 4: {2: 1, 3: 1}}
+        self.assertEqual(solver.solve(graph).tables()[1][4], (2, 2, True))
+
+    def test_link_costs_are_used(self):
+        graph = {1: {2: 5, 3: 1}, 2: {1: 5, 3: 1}, 3: {1: 1, 2: 1}}
+        self.assertEqual(solver.solve(graph).tables()[1][2], (2, 3, True))
+
+    def test_diff_reports_wrong_routes(self):
+        graph = {1: {2: 1, 3: 1}, 2: {1: 1, 4: 1}, 3: {1: 1, 4: 1}, 4: {2: 1, 3: 1}}
+        solution = solver.solve(graph)
+        tables = solution.tables()
+        self.assertEqual(solver.diff_tables(solution, tables), [])
+
+        tables[1][4] = (2, 3, True)  # Tied next hop, still right
+        self.assertEqual(solver.diff_tables(solution, tables), [])
+
+        tables[1][2] = (3, 3, True)   # Wrong cost
+        tables[2][3] = (2, 2, True)   # Next hop is itself
+        del tables[3][4]              # Missing
+        tables[4][9] = (1, 9, True)   # Not in the topology
+        self.assertEqual(sorted(solver.diff_tables(solution, tables)), [
+            (1, 2, 1, (3, 3, True)),
+            (2, 3, 2, (2, 2, True)),
+            (3, 4, 1, None),
+            (4, 9, None, (1, 9, True)),
+        ])
+
+    def test_simulated_network_matches_solution(self):
+        graph = topology.random_topology(30, degree=3, max_cost=3, seed=4)
+        simulator = Simulator()
+        for config in topology.to_configs(graph):
+            simulator.add_config(config)
+        self.assertIsNotNone(simulator.run_until_converged())
+
+        solution = solver.solve(graph)
+        self.assertEqual(solver.diff_tables(solution, simulator.tables()), [])
+        dumps = [dump_table(router) for router in simulator.routers.values()]
+        self.assertEqual(solver.diff_tables(solution, solver.tables_from_dumps(dumps)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
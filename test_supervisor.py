@@ -0,0 +1,78 @@
+import os
+import time
+import tempfile
+import unittest
+from RIP_supervisor import Supervisor, shard_configs
+
+CONFIGS = {
+    'config_1.txt': "router-id 1\ninput-ports 46021\noutput-ports 46022-1-2\n",
+    'config_2.txt': "router-id 2\ninput-ports 46022 46023\noutput-ports 46021-1-1 46024-3-3\n",
+    'config_3.txt': "router-id 3\ninput-ports 46024\noutput-ports 46023-3-2\n",
+}
+
+
+class TestSharding(unittest.TestCase):
+    def test_round_robin(self):
+        configs = [{'router-id': router_id} for router_id in (5, 1, 4, 2, 3)]
+        shards = shard_configs(configs, 2)
+        self.assertEqual([[config['router-id'] for config in shard] for shard in shards], [[1, 3, 5], [2, 4]])
+        self.assertEqual(len(shard_configs(configs, 8)), 5)  # No empty workers
+
+
+class TestSupervisor(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        for name, contents in CONFIGS.items():
+            with open(os.path.join(self.directory.name, name), 'w') as file:
+                file.write(contents)
+        self.supervisor = Supervisor(self.directory.name, workers=2, log_level='ERROR')
+        self.supervisor.start()
+
+    def tearDown(self):
+        self.supervisor.shutdown()
+        self.directory.cleanup()
+
+    def wait_for_route(self, router_id, dest_id, timeout=15):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            routes = {route[0]: route for route in self.supervisor.dump(router_id)['routes']}
+            if dest_id in routes:
+                return routes[dest_id]
+            time.sleep(0.1)
+        self.fail(f"Router {router_id} never learned a route to {dest_id}")
+
+    def test_routers_route_across_workers(self):
+        self.assertEqual(self.supervisor.status(), {0: [1, 3], 1: [2]})
+        # Through router 2 in the other worker, new routes can wait for a periodic update
+        self.assertEqual(self.wait_for_route(1, 3), [3, 4, 2, True])
+
+    def test_kill_and_revive_router(self):
+        self.supervisor.kill_router(3)
+        self.assertEqual(self.supervisor.status()[0], [1])
+        with self.assertRaises(Exception):
+            self.supervisor.kill_router(3)
+
+        self.supervisor.revive_router(3)
+        self.assertEqual(self.supervisor.status()[0], [1, 3])
+
+    def test_crashed_worker_is_restarted_without_killed_routers(self):
+        self.supervisor.kill_router(3)
+        worker = self.supervisor.workers[0]
+        worker.process.kill()
+        worker.process.join()
+
+        self.assertEqual(self.supervisor.check_workers(), [0])
+        self.assertEqual(self.supervisor.restarts, 1)
+        self.assertEqual(self.supervisor.status()[0], [1])
+        self.supervisor.revive_router(3)  # Its config came with the new worker
+        self.assertEqual(self.supervisor.status()[0], [1, 3])
+
+    def test_graceful_shutdown(self):
+        processes = [worker.process for worker in self.supervisor.workers]
+        self.supervisor.shutdown()
+        for process in processes:
+            self.assertEqual(process.exitcode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
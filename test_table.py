@@ -0,0 +1,64 @@
+import unittest
+from RIP_table import RoutingTable
+
+
+class TestRoutingTable(unittest.TestCase):
+    def setUp(self):
+        self.table = RoutingTable({2: (1, (2, 5001), True), 4: (3, (2, 5001), True)})
+
+    def test_mapping_view(self):
+        self.assertEqual(len(self.table), 2)
+        self.assertIn(4, self.table)
+        self.assertNotIn(3, self.table)
+        self.assertNotIn(4000, self.table)
+        self.assertEqual(self.table[4], (3, (2, 5001), True))
+        self.assertEqual(self.table.get(3), None)
+        self.assertEqual(dict(self.table), {2: (1, (2, 5001), True), 4: (3, (2, 5001), True)})
+
+        self.table[4] = (16, (2, 5001), False)
+        self.assertEqual(self.table[4], (16, (2, 5001), False))
+        del self.table[4]
+        self.assertNotIn(4, self.table)
+        with self.assertRaises(KeyError):
+            del self.table[4]
+
+    def test_missing_next_hop_and_port(self):
+        self.table[5] = (16, (None, None), False)
+        self.assertEqual(self.table[5], (16, (None, None), False))
+
+    def test_accessors_and_entries(self):
+        self.assertEqual(self.table.cost(4), 3)
+        self.assertEqual(self.table.next_hop(4), 2)
+        self.assertEqual(self.table.port(4), 5001)
+        self.assertTrue(self.table.is_valid(4))
+        self.assertEqual(list(self.table.entries()), [(2, 1, 2, True), (4, 3, 2, True)])
+        self.table.set(4, 16, 2, 5001, False)
+        self.assertIs(list(self.table.entries(3))[0][3], False)
+
+    def test_next_hop_index(self):
+        self.assertEqual(self.table.routes_via(2), {2, 4})
+        self.table.set(4, 2, 3, 5002, True)
+        self.assertEqual(self.table.routes_via(2), {2})
+        self.assertEqual(self.table.routes_via(3), {4})
+        self.table.remove(4)
+        self.assertEqual(self.table.routes_via(3), set())
+
+    def test_change_tracking(self):
+        changes = self.table.track()
+        version = self.table.version
+
+        self.assertFalse(self.table.set(4, 3, 2, 5001, True))  # Unchanged
+        self.assertEqual((changes, self.table.version), (set(), version))
+
+        self.assertTrue(self.table.set(4, 16, 2, 5001, False))
+        self.table.remove(2)
+        self.assertEqual(changes, {2, 4})
+        self.assertEqual(self.table.version, version + 2)
+
+    def test_invalid_destination(self):
+        with self.assertRaises(KeyError):
+            self.table.set(0, 1, 2, 5001, True)
+
+
+if __name__ == "__main__":
+    unittest.main()
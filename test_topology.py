@@ -0,0 +1,133 @@
+import os
+import tempfile
+import unittest
+import RIP_topology as topology
+from RIP_benchmark import bench_convergence, build_topology
+
+
+class TestTopologies(unittest.TestCase):
+    def test_mesh(self):
+        graph = topology.mesh_topology(5)
+        self.assertEqual(len(topology.links(graph)), 10)
+        self.assertEqual(topology.hop_diameter(graph), 1)
+
+    def test_ring(self):
+        graph = topology.ring_topology(6)
+        self.assertEqual(graph[1], {2: 1, 6: 1})
+        self.assertEqual(topology.hop_diameter(graph), 3)
+
+    def test_grid(self):
+        graph = topology.grid_topology(3, 4)
+        self.assertEqual(len(graph), 12)
+        self.assertEqual(len(topology.links(graph)), 17)  # 3 * 3 across + 2 * 4 down
+        self.assertEqual(topology.hop_diameter(graph), 5)
+
+    def test_random_is_connected_and_seeded(self):
+        graph = topology.random_topology(50, degree=4, max_cost=3, seed=1)
+        self.assertEqual(len(topology.links(graph)), 100)
+        self.assertLess(topology.hop_diameter(graph), 50)  # Every router is reachable
+        self.assertEqual(graph, topology.random_topology(50, degree=4, max_cost=3, seed=1))
+
+    def test_configs_have_unique_matching_ports(self):
+        graph = topology.random_topology(20, seed=2)
+        configs = topology.to_configs(graph)
+
+        owners = {port: config['router-id'] for config in configs for port in config['input-ports']}
+        self.assertEqual(len(owners), 2 * len(topology.links(graph)))
+        for config in configs:
+            for output in config['output-ports']:
+                port, cost, neighbor = map(int, output.split('-'))
+                self.assertEqual(owners[port], neighbor)
+                self.assertEqual(graph[config['router-id']][neighbor], cost)
+
+    def test_build_topology_specs(self):
+        self.assertEqual(len(build_topology('grid:3x2')), 6)
+        with self.assertRaises(ValueError):
+            build_topology('torus:3')
+
+
+    def test_tree(self):
+        graph = topology.tree_topology(15)
+        self.assertEqual(len(topology.links(graph)), 14)
+        self.assertEqual(graph[1], {2: 1, 3: 1})
+        self.assertEqual(topology.hop_diameter(graph), 6)
+
+    def test_geometric_is_connected_and_seeded(self):
+        graph = topology.geometric_topology(300, degree=5, max_cost=4, seed=3)
+        self.assertEqual(len(topology.reachable(graph, 1)), 300)
+        self.assertTrue(all(1 <= cost <= 4 for _, _, cost in topology.links(graph)))
+        self.assertEqual(graph, topology.geometric_topology(300, degree=5, max_cost=4, seed=3))
+
+    def test_scale_free_has_hubs(self):
+        graph = topology.scale_free_topology(500, links_per_router=2, seed=5)
+        self.assertEqual(len(topology.links(graph)), 1 + 2 * 498)
+        self.assertEqual(len(topology.reachable(graph, 1)), 500)
+        self.assertGreater(max(len(neighbors) for neighbors in graph.values()), 20)
+
+    def test_large_topology_fits_the_port_range(self):
+        configs = topology.to_configs(topology.build_topology('scalefree:5000', seed=1))
+        self.assertEqual(topology.check_configs(configs), [])
+
+
+class TestConfigFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+        self.graph = topology.random_topology(12, max_cost=3, seed=6)
+        self.configs = topology.to_configs(self.graph)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_written_configs_load_back(self):
+        topology.write_configs(self.configs, self.path)
+        self.assertEqual(len(os.listdir(self.path)), 12)
+        configs = topology.load_configs(self.path)
+        self.assertEqual(configs, self.configs)
+        self.assertEqual(topology.graph_from_configs(configs), self.graph)
+
+    def test_figure_1_is_consistent(self):
+        self.assertEqual(len(topology.load_configs('figure_1')), 7)
+
+    def test_check_finds_inconsistencies(self):
+        configs = [
+            {'router-id': 1, 'input-ports': [5001, 5002], 'output-ports': ['5003-1-2', '5004-2-3', '5009-1-4']},
+            {'router-id': 2, 'input-ports': [5003, 5001], 'output-ports': ['5001-1-1']},
+            {'router-id': 3, 'input-ports': [5004], 'output-ports': ['5002-5-1', '5004-1-3']},
+        ]
+        self.assertEqual(topology.check_configs(configs), [
+            "Input port 5001 of router 2 is also an input port of router 1.",
+            "Router 1 lists neighbor 4, which has no config.",
+            "Router 3 lists itself as a neighbor.",
+            "Link 1-3 costs 2 one way and 5 the other.",
+        ])
+
+    def test_load_reports_one_sided_links(self):
+        self.configs[0]['output-ports'].pop()
+        topology.write_configs(self.configs, self.path)
+        with self.assertRaisesRegex(Exception, 'does not list it back'):
+            topology.load_configs(self.path)
+
+    def test_graph_from_configs_keeps_links_listed_at_both_ends(self):
+        configs = [
+            {'router-id': 1, 'input-ports': [5001], 'output-ports': ['5002-3-2', '5003-1-3']},
+            {'router-id': 2, 'input-ports': [5002], 'output-ports': ['5001-4-1']},
+            {'router-id': 3, 'input-ports': [5003], 'output-ports': []},
+        ]
+        self.assertEqual(topology.graph_from_configs(configs), {1: {2: 3}, 2: {1: 4}, 3: {}})
+
+
+class TestConvergenceBenchmark(unittest.TestCase):
+    def test_reports_convergence(self):
+        result, = bench_convergence(['ring:6'])
+        self.assertEqual(result['routers'], 6)
+        for phase in ('cold_start', 'link_failure', 'router_failure'):
+            self.assertIsNotNone(result[phase]['virtual_seconds'])
+
+    def test_rejects_topologies_wider_than_rip_routes(self):
+        with self.assertRaisesRegex(ValueError, r'grid:10x10 \(18 hops\)'):
+            bench_convergence(['ring:6', 'grid:10x10'])
+
+
+if __name__ == "__main__":
+    unittest.main()